@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from academics.models import Semester
+
+
+class Command(BaseCommand):
+    help = (
+        "Switch the active semester to the one scheduled for today or "
+        "earlier. Meant to run daily from cron."
+    )
+
+    def handle(self, *args, **options):
+        semester = Semester.activate_scheduled(timezone.now().date())
+
+        if semester is None:
+            self.stdout.write("No semester scheduled for activation.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{semester.name} is now the active semester."))
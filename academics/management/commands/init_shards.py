@@ -0,0 +1,210 @@
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models.fields import AutoFieldMixin
+
+from academics.models import (
+    Course,
+    CourseOffering,
+    CoursePrerequisiteClosure,
+    CourseRequisite,
+    CourseSection,
+    Department,
+    MeetingTime,
+    ProgramRequirement,
+    RequirementCourse,
+)
+from accounts.models import Student, StudentSearchTerm
+from config.sharding import (
+    REFERENCE_MODELS,
+    SHARDED_MODELS,
+    mirror_reference_rows,
+    shard_aliases,
+    shard_id_start,
+    sharding_enabled,
+)
+from enrollment.models import (
+    ArchivedCourseOffering,
+    ArchivedEnrollment,
+    CoursePreference,
+    Enrollment,
+    EnrollmentHold,
+)
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Prepare department shards: migrate them, reserve each shard's id "
+        "range, copy reference data and optionally move existing department "
+        "rows out of the default database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--move-data",
+            action="store_true",
+            help="Move courses, offerings, students and enrollments of sharded "
+                 "departments from 'default' into their shard (ids change)",
+        )
+
+    def handle(self, *args, **options):
+        if not sharding_enabled():
+            raise CommandError("No shards configured. Set DB_DEPARTMENT_SHARDS first.")
+
+        for alias in shard_aliases()[1:]:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"{alias}: only SQLite shards are supported.")
+
+            self.stdout.write(f"Migrating {alias}")
+            call_command("migrate", database=alias, verbosity=0)
+            self._reserve_id_range(alias)
+            self._copy_reference_data(alias)
+
+        if options["move_data"]:
+            from django.conf import settings
+
+            for code, alias in settings.DEPARTMENT_SHARDS.items():
+                department = Department.objects.filter(code=code).first()
+                if department:
+                    self._move_department(department, alias)
+
+        self.stdout.write(self.style.SUCCESS("Shards ready"))
+
+    def _reserve_id_range(self, alias):
+        start = shard_id_start(alias)
+        with connections[alias].cursor() as cursor:
+            for label in SHARDED_MODELS:
+                model = apps.get_model(label)
+                if not isinstance(model._meta.pk, AutoFieldMixin):
+                    continue  # archive tables keep the ids of the live rows
+                table = model._meta.db_table
+                cursor.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) SELECT %s, 0 "
+                    "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+                    [table, table],
+                )
+                cursor.execute(
+                    "UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s",
+                    [start, table],
+                )
+
+    def _copy_reference_data(self, alias):
+        for label in REFERENCE_MODELS:
+            model = apps.get_model(label)
+            last_pk = 0
+            copied = 0
+            while True:
+                rows = list(
+                    model._base_manager.using("default")
+                    .filter(pk__gt=last_pk)
+                    .order_by("pk")[:BATCH_SIZE]
+                )
+                if not rows:
+                    break
+                mirror_reference_rows(model, rows)
+                last_pk = rows[-1].pk
+                copied += len(rows)
+            self.stdout.write(f"  {label}: {copied} rows mirrored")
+
+    def _copy_rows(self, queryset, alias, remap):
+        """Insert copies of `queryset` rows into `alias` with new ids."""
+        id_map = {}
+        model = queryset.model
+        fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+        # Archive rows keep their ids, which lie below every shard's range
+        keep_pk = not isinstance(model._meta.pk, AutoFieldMixin)
+
+        def flush(batch):
+            model._base_manager.using(alias).bulk_create([copy for _, copy in batch])
+            id_map.update((old_pk, copy.pk) for old_pk, copy in batch)
+
+        batch = []
+        for obj in queryset.order_by("pk").iterator(chunk_size=BATCH_SIZE):
+            values = {f.attname: getattr(obj, f.attname) for f in fields}
+            for attname, mapping in remap.items():
+                if values[attname] is not None:
+                    values[attname] = mapping[values[attname]]
+            if keep_pk:
+                values["pk"] = obj.pk
+            batch.append((obj.pk, model(**values)))
+            if len(batch) >= BATCH_SIZE:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        return id_map
+
+    def _move_department(self, department, alias):
+        self.stdout.write(f"Moving {department.code} into {alias}")
+
+        courses = Course.all_objects.using("default").filter(department=department)
+        requisites = CourseRequisite.objects.using("default").filter(course__in=courses)
+        closure = CoursePrerequisiteClosure.objects.using("default").filter(course__in=courses)
+        requirements = ProgramRequirement.objects.using("default").filter(department=department)
+        requirement_courses = RequirementCourse.objects.using("default").filter(
+            requirement__in=requirements
+        )
+        offerings = CourseOffering.all_objects.using("default").filter(course__in=courses)
+        sections = CourseSection.objects.using("default").filter(course_offering__in=offerings)
+        meetings = MeetingTime.objects.using("default").filter(course_offering__in=offerings)
+        students = Student.all_objects.using("default").filter(department=department)
+        enrollments = Enrollment.all_objects.using("default").filter(student__in=students)
+        preferences = CoursePreference.objects.using("default").filter(student__in=students)
+        holds = EnrollmentHold.objects.using("default").filter(student__in=students)
+        search_terms = StudentSearchTerm.objects.using("default").filter(student__in=students)
+        archived_offerings = ArchivedCourseOffering.objects.using("default").filter(course__in=courses)
+        archived_enrollments = ArchivedEnrollment.objects.using("default").filter(student__in=students)
+
+        with transaction.atomic(using=alias), transaction.atomic(using="default"):
+            course_ids = self._copy_rows(courses, alias, {})
+            for rows in (requisites, closure):
+                self._copy_rows(rows, alias, {"course_id": course_ids, "requires_id": course_ids})
+            requirement_ids = self._copy_rows(requirements, alias, {})
+            self._copy_rows(
+                requirement_courses, alias,
+                {"requirement_id": requirement_ids, "course_id": course_ids},
+            )
+            offering_ids = self._copy_rows(offerings, alias, {"course_id": course_ids})
+            section_ids = self._copy_rows(sections, alias, {"course_offering_id": offering_ids})
+            self._copy_rows(meetings, alias, {"course_offering_id": offering_ids})
+            student_ids = self._copy_rows(students, alias, {})
+            self._copy_rows(
+                enrollments, alias,
+                {
+                    "student_id": student_ids,
+                    "course_offering_id": offering_ids,
+                    "section_id": section_ids,
+                },
+            )
+            self._copy_rows(
+                preferences, alias,
+                {"student_id": student_ids, "course_offering_id": offering_ids},
+            )
+            self._copy_rows(holds, alias, {"student_id": student_ids})
+            self._copy_rows(search_terms, alias, {"student_id": student_ids})
+            self._copy_rows(archived_offerings, alias, {"course_id": course_ids})
+            self._copy_rows(archived_enrollments, alias, {"student_id": student_ids})
+
+            archived_enrollments.delete()
+            archived_offerings.delete()
+            holds.delete()
+            search_terms.delete()
+            preferences.delete()
+            enrollments.delete()
+            sections.delete()
+            meetings.delete()
+            offerings.delete()
+            closure.delete()
+            requirement_courses.delete()
+            requirements.delete()
+            requisites.delete()
+            courses.delete()
+            students.delete()
+
+        self.stdout.write(
+            f"  {len(course_ids)} courses, {len(offering_ids)} offerings, "
+            f"{len(student_ids)} students moved"
+        )
@@ -0,0 +1,85 @@
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from academics.softdelete import purge_aliases, purge_rows
+from config.sharding import is_sharded, shard_aliases
+
+# Leaves first, so most batches have nothing left to cascade into
+PURGE_ORDER = (
+    "enrollment.Enrollment",
+    "academics.CourseOffering",
+    "accounts.Student",
+    "academics.Course",
+    "academics.DegreeProgram",
+    "academics.Semester",
+    "academics.Department",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Permanently remove soft-deleted rows and their dependants in "
+        "bounded batches of raw DELETE statements."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--older-than", type=int, default=0, metavar="MINUTES",
+            help="Only purge rows deleted at least this many minutes ago",
+        )
+        parser.add_argument(
+            "--interval", type=float,
+            help="Keep purging every N seconds instead of running once",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            cutoff = timezone.now() - timedelta(minutes=options["older_than"])
+            counts = self.purge(cutoff, options["batch_size"])
+
+            if counts:
+                summary = ", ".join(f"{count} {label}" for label, count in sorted(counts.items()))
+                self.stdout.write(self.style.SUCCESS(f"Purged {summary}"))
+            else:
+                self.stdout.write("Nothing to purge")
+
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
+
+    def purge(self, cutoff, batch_size):
+        counts = Counter()
+        for label in PURGE_ORDER:
+            model = apps.get_model(label)
+            # Sharded rows are found on their shard, shared rows on default
+            for alias in shard_aliases() if is_sharded(model) else ["default"]:
+                counts += self._purge_model(model, alias, cutoff, batch_size)
+        return counts
+
+    def _purge_model(self, model, alias, cutoff, batch_size):
+        counts = Counter()
+        pending = model._base_manager.using(alias).filter(
+            deleted_at__isnull=False, deleted_at__lte=cutoff
+        )
+
+        while True:
+            pks = list(pending.order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                return counts
+
+            owned = model.owned_rows(pks, alias)
+            for target in purge_aliases(model, alias):
+                purge_rows(model, pks, target, batch_size, counts)
+            for owned_model, owned_pks in owned:
+                for target in purge_aliases(owned_model, alias):
+                    purge_rows(owned_model, owned_pks, target, batch_size, counts)
+
+            self.stdout.write(
+                f"  {alias}: {counts[model._meta.label]} {model._meta.label} purged"
+            )
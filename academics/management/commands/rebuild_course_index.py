@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from academics.search import rebuild_index
+from config.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = "Recreate the full-text course search index on every database."
+
+    def handle(self, *args, **options):
+        for alias in shard_aliases():
+            count = rebuild_index(alias)
+            if count is None:
+                self.stdout.write(f"[{alias}] FTS5 not available; search uses LIKE lookups.")
+            else:
+                self.stdout.write(f"[{alias}] {count} courses indexed")
+        self.stdout.write(self.style.SUCCESS("Course search index rebuilt."))
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0002_degreeprogram_max_credits_per_semester'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semester',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='semester',
+            name='is_archived',
+            field=models.BooleanField(default=False),
+        ),
+    ]
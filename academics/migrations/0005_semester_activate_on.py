@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0004_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semester',
+            name='activate_on',
+            field=models.DateField(blank=True, help_text='Date on which this semester replaces the active one', null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_semester_activate_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semester',
+            name='enrollment_mode',
+            field=models.CharField(choices=[('FCFS', 'First come, first served'), ('PREFERENCE', 'Ranked preferences')], default='FCFS', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='semester',
+            name='preferences_allocated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
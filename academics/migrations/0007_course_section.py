@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0006_semester_enrollment_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=20)),
+                ('capacity', models.PositiveIntegerField()),
+                ('current_enrollment', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course_offering', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sections', to='academics.courseoffering')),
+            ],
+            options={
+                'ordering': ('name',),
+                'unique_together': {('course_offering', 'name')},
+            },
+        ),
+    ]
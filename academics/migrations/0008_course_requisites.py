@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0007_course_section'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoursePrerequisiteClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.course')),
+                ('requires', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.course')),
+            ],
+            options={
+                'unique_together': {('course', 'requires')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseRequisite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('PRE', 'Prerequisite'), ('CO', 'Corequisite')], default='PRE', max_length=3)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requisites', to='academics.course')),
+                ('requires', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='required_by', to='academics.course')),
+            ],
+            options={
+                'unique_together': {('course', 'requires')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0008_course_requisites'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingTime',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.PositiveSmallIntegerField(choices=[(0, 'Mon'), (1, 'Tue'), (2, 'Wed'), (3, 'Thu'), (4, 'Fri'), (5, 'Sat'), (6, 'Sun')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('room', models.CharField(blank=True, max_length=50)),
+                ('course_offering', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meetings', to='academics.courseoffering')),
+            ],
+            options={
+                'ordering': ('day', 'start_time'),
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+def create_course_index(apps, schema_editor):
+    from academics.search import FTS_TABLE, create_index
+
+    connection = schema_editor.connection
+    if not create_index(connection):
+        return  # not SQLite, or built without FTS5: search falls back to LIKE
+
+    Course = apps.get_model("academics", "Course")
+    rows = [
+        (c.pk, c.course_code, c.course_name, f"{c.department.code} {c.department.name}", c.department_id)
+        for c in Course.objects.using(connection.alias)
+        .select_related("department")
+        .filter(deleted_at__isnull=True)
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, course_code, course_name, department, department_id) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def drop_course_index(apps, schema_editor):
+    from academics.search import FTS_TABLE
+
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0009_meeting_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_course_index, drop_course_index),
+    ]
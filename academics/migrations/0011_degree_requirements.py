@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0010_course_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='degreeprogram',
+            name='credits_required',
+            field=models.PositiveIntegerField(default=0, help_text='Total credits needed to graduate (0 = not tracked)'),
+        ),
+        migrations.CreateModel(
+            name='ProgramRequirement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('REQUIRED', 'Required courses'), ('ELECTIVE', 'Elective pool')], max_length=10)),
+                ('credits_required', models.PositiveIntegerField(default=0, help_text='Elective pools: credits to earn from the pool')),
+                ('degree_program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requirements', to='academics.degreeprogram')),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.department')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RequirementCourse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.course')),
+                ('requirement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='courses', to='academics.programrequirement')),
+            ],
+            options={
+                'unique_together': {('requirement', 'course')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0011_degree_requirements'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseoffering',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
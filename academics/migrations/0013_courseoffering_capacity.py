@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0012_courseoffering_change_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseoffering',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
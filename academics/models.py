@@ -1,6 +1,14 @@
-from django.db import models
+import heapq
 
-class Department(models.Model):
+from django.db import models, transaction
+from django.db.models import ExpressionWrapper, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from config.sharding import cross_shard_querysets
+from .search import unindex_courses
+from .softdelete import SoftDeleteModel
+
+class Department(SoftDeleteModel):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=10, unique=True)
     is_active = models.BooleanField(default=True)
@@ -10,7 +18,7 @@ class Department(models.Model):
         return self.name
 
 
-class DegreeProgram(models.Model):
+class DegreeProgram(SoftDeleteModel):
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
     max_credits_per_semester = models.PositiveIntegerField(
@@ -19,6 +27,10 @@ class DegreeProgram(models.Model):
     )
     level = models.CharField(max_length=50)
     duration_years = models.PositiveIntegerField()
+    credits_required = models.PositiveIntegerField(
+        default=0,
+        help_text="Total credits needed to graduate (0 = not tracked)"
+    )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -26,20 +38,63 @@ class DegreeProgram(models.Model):
         return self.name
 
 
-class Semester(models.Model):
+class Semester(SoftDeleteModel):
+    ENROLLMENT_MODE_CHOICES = (
+        ('FCFS', 'First come, first served'),
+        ('PREFERENCE', 'Ranked preferences'),
+    )
+
     name = models.CharField(max_length=50)
     start_date = models.DateField()
     end_date = models.DateField()
     enrollment_open_date = models.DateField()
     enrollment_close_date = models.DateField()
     is_active = models.BooleanField(default=True)
+    is_archived = models.BooleanField(default=False)
+    archived_at = models.DateTimeField(null=True, blank=True)
+    activate_on = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Date on which this semester replaces the active one"
+    )
+    enrollment_mode = models.CharField(
+        max_length=10, choices=ENROLLMENT_MODE_CHOICES, default='FCFS'
+    )
+    # Set once the preference lottery has run; seats left over are then
+    # taken first come, first served
+    preferences_allocated_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @staticmethod
+    def activate_scheduled(today):
+        """
+        Make the latest semester scheduled on or before `today` the active
+        one. Run by `manage.py activate_scheduled_semesters`.
+        """
+        with transaction.atomic():
+            semester = (
+                Semester.objects
+                .filter(activate_on__lte=today, is_archived=False)
+                .order_by("-activate_on", "-start_date")
+                .select_for_update()
+                .first()
+            )
+            if semester is None:
+                return None
+
+            Semester.objects.filter(is_active=True).exclude(pk=semester.pk).update(is_active=False)
+            # Older schedules that were overtaken are dropped
+            Semester.objects.filter(activate_on__lte=today).update(activate_on=None)
+            semester.is_active = True
+            semester.activate_on = None
+            semester.save(update_fields=["is_active", "activate_on"])
+        return semester
+
     def __str__(self):
         return self.name
 
 
-class Course(models.Model):
+class Course(SoftDeleteModel):
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
     course_code = models.CharField(max_length=20)
     course_name = models.CharField(max_length=100)
@@ -54,16 +109,343 @@ class Course(models.Model):
     def __str__(self):
         return self.course_name
 
+    @classmethod
+    def after_soft_delete(cls, queryset):
+        # Cascaded deletes are plain UPDATEs, which the search signals miss
+        unindex_courses(list(queryset.values_list("pk", flat=True)), queryset.db)
+
+
+class CourseRequisite(models.Model):
+    """
+    `course` requires `requires` to have been completed (prerequisite) or
+    to be taken in the same semester at the latest (corequisite). Both
+    courses belong to the same department.
+    """
+    KIND_CHOICES = (
+        ('PRE', 'Prerequisite'),
+        ('CO', 'Corequisite'),
+    )
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="requisites")
+    requires = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="required_by")
+    kind = models.CharField(max_length=3, choices=KIND_CHOICES, default='PRE')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('course', 'requires')
+
+    @staticmethod
+    def add(course, requires, kind='PRE'):
+        """
+        Add an edge and extend the closure table. Raises ValueError for
+        edges that would make a course (transitively) require itself.
+        """
+        if course.department_id != requires.department_id:
+            raise ValueError("Requisites must belong to the same department.")
+
+        with transaction.atomic(using=course._state.db):
+            if kind == 'PRE':
+                ancestors = {requires.pk} | set(
+                    CoursePrerequisiteClosure.objects.filter(course=requires)
+                    .values_list("requires_id", flat=True)
+                )
+                if course.pk in ancestors:
+                    raise ValueError(
+                        f"{requires.course_code} already requires {course.course_code}."
+                    )
+            edge = CourseRequisite.objects.create(course=course, requires=requires, kind=kind)
+            if kind == 'PRE':
+                # Every course reaching `course` now also reaches `requires`
+                # and everything `requires` needs
+                descendants = {course.pk} | set(
+                    CoursePrerequisiteClosure.objects.filter(requires=course)
+                    .values_list("course_id", flat=True)
+                )
+                CoursePrerequisiteClosure.objects.bulk_create(
+                    [
+                        CoursePrerequisiteClosure(course_id=d, requires_id=a)
+                        for d in descendants
+                        for a in ancestors
+                    ],
+                    ignore_conflicts=True,
+                )
+        return edge
+
+    def remove(self):
+        """Delete the edge and rebuild the closure rows of affected courses."""
+        with transaction.atomic(using=self._state.db):
+            affected = {self.course_id} | set(
+                CoursePrerequisiteClosure.objects.filter(requires_id=self.course_id)
+                .values_list("course_id", flat=True)
+            )
+            self.delete()
+            if self.kind == 'PRE':
+                CoursePrerequisiteClosure.rebuild(affected, self.course.department_id)
+
+    def __str__(self):
+        return f"{self.course.course_code} {self.get_kind_display().lower()} {self.requires.course_code}"
+
+
+class CoursePrerequisiteClosure(models.Model):
+    """
+    Transitive closure of the prerequisite edges: one row for every course
+    that `course` needs before it, directly or through other courses.
+    Maintained by CourseRequisite.add() and remove().
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+    requires = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        unique_together = ('course', 'requires')
+
+    @staticmethod
+    def rebuild(course_ids, department_id):
+        """Recompute the closure rows of `course_ids` from the edges."""
+        edges = {}
+        for course_id, requires_id in CourseRequisite.objects.filter(
+            kind='PRE', course__department_id=department_id
+        ).values_list("course_id", "requires_id"):
+            edges.setdefault(course_id, []).append(requires_id)
+
+        rows = []
+        for course_id in course_ids:
+            seen, stack = set(), list(edges.get(course_id, ()))
+            while stack:
+                node = stack.pop()
+                if node not in seen:
+                    seen.add(node)
+                    stack.extend(edges.get(node, ()))
+            rows.extend(CoursePrerequisiteClosure(course_id=course_id, requires_id=r) for r in seen)
+
+        CoursePrerequisiteClosure.objects.filter(course_id__in=course_ids).delete()
+        CoursePrerequisiteClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class ProgramRequirement(models.Model):
+    """
+    Group of courses a degree program requires: every course of a REQUIRED
+    group, or `credits_required` credits from an ELECTIVE pool.
+    """
+    KIND_CHOICES = (
+        ('REQUIRED', 'Required courses'),
+        ('ELECTIVE', 'Elective pool'),
+    )
+
+    degree_program = models.ForeignKey(
+        DegreeProgram, on_delete=models.CASCADE, related_name="requirements"
+    )
+    # Copy of degree_program.department; places the row on that department's shard
+    department = models.ForeignKey(Department, on_delete=models.CASCADE)
+    name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    credits_required = models.PositiveIntegerField(
+        default=0,
+        help_text="Elective pools: credits to earn from the pool"
+    )
+
+    def save(self, *args, **kwargs):
+        self.department_id = self.degree_program.department_id
+        super().save(*args, **kwargs)
 
-class CourseOffering(models.Model):
+    def __str__(self):
+        return f"{self.degree_program.name}: {self.name}"
+
+
+class RequirementCourse(models.Model):
+    requirement = models.ForeignKey(
+        ProgramRequirement, on_delete=models.CASCADE, related_name="courses"
+    )
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        unique_together = ('requirement', 'course')
+
+    def __str__(self):
+        return f"{self.requirement.name}: {self.course.course_code}"
+
+
+class CourseOffering(SoftDeleteModel):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
+    # Seat counter of offerings without sections; once an offering has
+    # sections, their counters are used instead (see with_seats)
     current_enrollment = models.PositiveIntegerField(default=0)
+    # Seats of this offering when it has no sections; the course capacity if unset
+    capacity = models.PositiveIntegerField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set by database triggers on every write (see enrollment/changefeed.py)
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
 
     class Meta:
         unique_together = ('course', 'semester')
 
+    @staticmethod
+    def clone_to_semester(offering_ids, semester):
+        """
+        Copy offerings into `semester` with one bulk INSERT per database.
+        Courses already offered there are skipped; returns how many were
+        created.
+        """
+        created = 0
+        for offerings in cross_shard_querysets(CourseOffering.objects.all(), pks=offering_ids):
+            alias = offerings.db
+            capacities = dict(offerings.values_list("course_id", "capacity"))
+            existing = CourseOffering.all_objects.using(alias).filter(
+                semester=semester, course_id__in=capacities
+            )
+            before = existing.count()
+            CourseOffering.objects.using(alias).bulk_create(
+                [
+                    CourseOffering(
+                        course_id=course_id, semester=semester, capacity=capacity, is_active=True
+                    )
+                    for course_id, capacity in capacities.items()
+                ],
+                ignore_conflicts=True,
+            )
+            created += existing.count() - before
+        return created
+
+    @staticmethod
+    def with_seats(queryset):
+        """
+        Annotate `seats_taken` and `seat_capacity`: the totals of the
+        offering's sections, or its own counter and capacity (the course
+        capacity unless set) when it has none.
+        """
+        sections = CourseSection.objects.filter(
+            course_offering=OuterRef("pk")
+        ).order_by().values("course_offering")
+        return queryset.annotate(
+            seats_taken=Coalesce(
+                Subquery(sections.annotate(total=Sum("current_enrollment")).values("total")),
+                F("current_enrollment"),
+            ),
+            seat_capacity=Coalesce(
+                Subquery(sections.annotate(total=Sum("capacity")).values("total")),
+                F("capacity"),
+                F("course__max_capacity"),
+            ),
+        )
+
     def __str__(self):
         return f"{self.course.course_code} - {self.semester.name}"
+
+
+class MeetingTime(models.Model):
+    """A weekly meeting of an offering."""
+    DAY_CHOICES = (
+        (0, 'Mon'),
+        (1, 'Tue'),
+        (2, 'Wed'),
+        (3, 'Thu'),
+        (4, 'Fri'),
+        (5, 'Sat'),
+        (6, 'Sun'),
+    )
+
+    course_offering = models.ForeignKey(
+        CourseOffering, on_delete=models.CASCADE, related_name="meetings"
+    )
+    day = models.PositiveSmallIntegerField(choices=DAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    room = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        ordering = ('day', 'start_time')
+
+    def overlaps(self, other):
+        return (
+            self.day == other.day
+            and self.start_time < other.end_time
+            and other.start_time < self.end_time
+        )
+
+    def __str__(self):
+        return f"{self.get_day_display()} {self.start_time:%H:%M}–{self.end_time:%H:%M}"
+
+
+class CourseSection(models.Model):
+    """
+    A section of an offering with its own seat counter, so enrollments in
+    a popular course update several rows instead of one.
+    """
+    course_offering = models.ForeignKey(
+        CourseOffering, on_delete=models.CASCADE, related_name="sections"
+    )
+    name = models.CharField(max_length=20)
+    capacity = models.PositiveIntegerField()
+    current_enrollment = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('course_offering', 'name')
+        ordering = ('name',)
+
+    @staticmethod
+    def take_seat(offering_id):
+        """
+        Take a seat in the least-full section that still has room and
+        return its id, or None when all sections are full. Each attempt is
+        a conditional UPDATE, so a section filled by a concurrent
+        enrollment is skipped rather than overbooked.
+        """
+        candidates = (
+            CourseSection.objects.filter(
+                course_offering_id=offering_id,
+                current_enrollment__lt=F("capacity"),
+            )
+            .annotate(fill=ExpressionWrapper(
+                F("current_enrollment") * 1.0 / F("capacity"), output_field=FloatField()
+            ))
+            .order_by("fill", "name")
+            .values_list("pk", flat=True)
+        )
+        for pk in candidates:
+            taken = CourseSection.objects.filter(
+                pk=pk, current_enrollment__lt=F("capacity")
+            ).update(current_enrollment=F("current_enrollment") + 1)
+            if taken:
+                return pk
+        return None
+
+    @staticmethod
+    def assign_seats(offering_id, count, using=None):
+        """
+        Bulk version of take_seat for batch enrollment: spread `count`
+        seats over the sections, least-full first, with one UPDATE per
+        section. Returns one section id per seat handed out (fewer than
+        `count` when the sections fill up). Call inside a transaction.
+        """
+        heap = [
+            (taken / capacity, name, pk, taken, capacity)
+            for pk, name, taken, capacity in CourseSection.objects.using(using)
+            .select_for_update()
+            .filter(course_offering_id=offering_id, current_enrollment__lt=F("capacity"))
+            .values_list("pk", "name", "current_enrollment", "capacity")
+        ]
+        heapq.heapify(heap)
+
+        seats = []
+        while heap and len(seats) < count:
+            _, name, pk, taken, capacity = heapq.heappop(heap)
+            seats.append(pk)
+            if taken + 1 < capacity:
+                heapq.heappush(heap, ((taken + 1) / capacity, name, pk, taken + 1, capacity))
+
+        for pk in set(seats):
+            CourseSection.objects.using(using).filter(pk=pk).update(
+                current_enrollment=F("current_enrollment") + seats.count(pk)
+            )
+        return seats
+
+    @staticmethod
+    def release_seat(section_id):
+        CourseSection.objects.filter(
+            pk=section_id, current_enrollment__gt=0
+        ).update(current_enrollment=F("current_enrollment") - 1)
+
+    def __str__(self):
+        return f"{self.course_offering} ({self.name})"
@@ -0,0 +1,187 @@
+"""
+Full-text course search backed by an SQLite FTS5 table.
+
+`academics_course_fts` holds the code, name and department of every live
+course, with the course id as rowid. Signals keep it in sync when
+courses and departments are saved. `manage.py rebuild_course_index`
+recreates it from scratch. Each shard indexes its own courses. On
+databases without FTS5, the search falls back to icontains lookups.
+"""
+import re
+
+from django.db import OperationalError, connections
+from django.db.models import Q
+
+from config.sharding import shard_aliases
+
+FTS_TABLE = "academics_course_fts"
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "course_code, course_name, department, department_id UNINDEXED, "
+    "tokenize = 'unicode61', prefix = '2 3')"
+)
+
+# bm25 column weights: a code hit beats a name hit beats a department hit
+RANK_SQL = f"bm25({FTS_TABLE}, 10.0, 4.0, 1.0)"
+
+_available = {}
+
+
+def fts_available(using):
+    if using not in _available:
+        connection = connections[using]
+        _available[using] = (
+            connection.vendor == "sqlite"
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _available[using]
+
+
+def create_index(connection):
+    """Create the FTS table; returns False when SQLite lacks FTS5."""
+    if connection.vendor != "sqlite":
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_SQL)
+    except OperationalError:
+        return False
+    _available.pop(connection.alias, None)
+    return True
+
+
+def _row(course):
+    return (
+        course.pk,
+        course.course_code,
+        course.course_name,
+        f"{course.department.code} {course.department.name}",
+        course.department_id,
+    )
+
+
+def index_courses(courses, using):
+    """(Re)index `courses`; deleted ones are only removed."""
+    if not fts_available(using):
+        return
+    courses = list(courses)
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(c.pk,) for c in courses]
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, course_code, course_name, department, department_id) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [_row(c) for c in courses if c.deleted_at is None],
+        )
+
+
+def unindex_courses(pks, using):
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in pks])
+
+
+def rebuild_index(using, batch_size=1000):
+    """Recreate the index of one database; returns the number of courses."""
+    from .models import Course
+
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    if not create_index(connection):
+        return None
+
+    count = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            Course.objects.using(using).select_related("department")
+            .filter(pk__gt=last_pk).order_by("pk")[:batch_size]
+        )
+        if not batch:
+            return count
+        index_courses(batch, using)
+        count += len(batch)
+        last_pk = batch[-1].pk
+
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query: every word must match, as a
+    prefix of a token ("data str" finds "Data Structures").
+    """
+    words = re.findall(r"\w+", query or "")
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _search_alias(using, expression, department_id, limit):
+    where = f"{FTS_TABLE} MATCH %s"
+    params = [expression]
+    if department_id:
+        where += " AND department_id = %s"
+        params.append(department_id)
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {where}", params)
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT rowid, {RANK_SQL} AS rank FROM {FTS_TABLE} "
+            f"WHERE {where} ORDER BY rank LIMIT %s",
+            params + [limit],
+        )
+        return total, [(rank, pk, using) for pk, rank in cursor.fetchall()]
+
+
+def _fallback_alias(using, query, department_id, limit):
+    from .models import Course
+
+    courses = Course.objects.using(using)
+    for word in re.findall(r"\w+", query or ""):
+        courses = courses.filter(
+            Q(course_code__icontains=word)
+            | Q(course_name__icontains=word)
+            | Q(department__name__icontains=word)
+            | Q(department__code__iexact=word)
+        )
+    if department_id:
+        courses = courses.filter(department_id=department_id)
+    pks = list(courses.order_by("course_code").values_list("pk", flat=True)[:limit])
+    return courses.count(), [(position, pk, using) for position, pk in enumerate(pks)]
+
+
+def search_courses(query, department_id=None, offset=0, limit=20, aliases=None):
+    """
+    Ranked, paged course search. Returns (courses, total). With several
+    databases each one returns its best `offset + limit` hits and the
+    merged list is cut to the requested page.
+    """
+    from .models import Course
+
+    expression = match_expression(query)
+    if not expression:
+        return [], 0
+
+    total = 0
+    hits = []
+    for using in aliases or shard_aliases():
+        if fts_available(using):
+            count, found = _search_alias(using, expression, department_id, offset + limit)
+        else:
+            count, found = _fallback_alias(using, query, department_id, offset + limit)
+        total += count
+        hits.extend(found)
+
+    hits.sort(key=lambda hit: hit[0])
+    page = hits[offset:offset + limit]
+
+    loaded = {}
+    for using in {hit[2] for hit in page}:
+        loaded.update(
+            Course.objects.using(using).select_related("department")
+            .in_bulk([pk for _, pk, alias in page if alias == using])
+        )
+    # Rows deleted since indexing are skipped
+    return [loaded[pk] for _, pk, _ in page if pk in loaded], total
@@ -0,0 +1,43 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from academics.search import index_courses, unindex_courses
+from config.sharding import (
+    REFERENCE_MODELS,
+    forget_department_codes,
+    mirror_reference_delete,
+    mirror_reference_save,
+)
+
+for label in REFERENCE_MODELS:
+    model = apps.get_model(label)
+    post_save.connect(mirror_reference_save, sender=model, dispatch_uid=f"shard_mirror_save_{label}")
+    post_delete.connect(mirror_reference_delete, sender=model, dispatch_uid=f"shard_mirror_delete_{label}")
+
+Department = apps.get_model("academics.department")
+post_save.connect(forget_department_codes, sender=Department, dispatch_uid="shard_department_codes_save")
+post_delete.connect(forget_department_codes, sender=Department, dispatch_uid="shard_department_codes_delete")
+
+
+def index_course(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        index_courses([instance], using)
+
+
+def unindex_course(sender, instance, using, **kwargs):
+    unindex_courses([instance.pk], using)
+
+
+def reindex_department_courses(sender, instance, using, raw=False, **kwargs):
+    # Department names are part of every course row of that database
+    if not raw:
+        index_courses(
+            Course.objects.using(using).select_related("department").filter(department=instance),
+            using,
+        )
+
+
+Course = apps.get_model("academics.course")
+post_save.connect(index_course, sender=Course, dispatch_uid="course_search_save")
+post_delete.connect(unindex_course, sender=Course, dispatch_uid="course_search_delete")
+post_save.connect(reindex_department_courses, sender=Department, dispatch_uid="course_search_department")
@@ -0,0 +1,140 @@
+"""
+Soft delete for the large academic tables.
+
+Deleting a department, program, semester, course, offering or student only
+stamps `deleted_at` on the row and, with one UPDATE per child table, on
+everything that would have been cascaded. `objects` hides stamped rows at
+once; `manage.py purge_deleted` removes them later in bounded batches with
+raw DELETEs, children first, instead of Django's in-memory collector.
+"""
+from collections import Counter
+
+from django.db import models
+from django.utils import timezone
+
+from config.sharding import REFERENCE_MODELS, is_sharded, shard_aliases
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def alive(self):
+        return self.filter(deleted_at__isnull=True)
+
+    def deleted(self):
+        return self.filter(deleted_at__isnull=False)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().alive()
+
+
+class SoftDeleteModel(models.Model):
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager.from_queryset(SoftDeleteQuerySet)()
+
+    class Meta:
+        abstract = True
+
+    def soft_delete(self):
+        now = timezone.now()
+        self.deleted_at = now
+        # A real save, so post_save receivers (stats, shard mirrors) run
+        self.save(update_fields=["deleted_at"])
+        type(self).after_soft_delete(
+            type(self)._base_manager.using(self._state.db).filter(pk=self.pk)
+        )
+        _mark_children(type(self), "pk__in", [self.pk], now, self._state.db)
+
+    @classmethod
+    def after_soft_delete(cls, queryset):
+        """Hook for side effects on rows that were just soft deleted."""
+
+    @classmethod
+    def owned_rows(cls, pks, using):
+        """(model, pks) pairs to purge together with these rows."""
+        return []
+
+
+def _child_aliases(parent, child, parent_alias):
+    # Children of shared rows may live on any department shard
+    if is_sharded(child) and not is_sharded(parent):
+        return shard_aliases()
+    return [parent_alias]
+
+
+def _mark_children(model, lookup, values, now, alias):
+    for rel in model._meta.related_objects:
+        child = rel.related_model
+        if rel.on_delete is not models.CASCADE or not issubclass(child, SoftDeleteModel):
+            continue
+
+        child_lookup = f"{rel.field.name}__{lookup}"
+        for child_alias in _child_aliases(model, child, alias):
+            marked = child._base_manager.using(child_alias).filter(
+                deleted_at__isnull=True, **{child_lookup: values}
+            ).update(deleted_at=now)
+            if marked:
+                child.after_soft_delete(
+                    child._base_manager.using(child_alias).filter(
+                        deleted_at=now, **{child_lookup: values}
+                    )
+                )
+                _mark_children(child, child_lookup, values, now, child_alias)
+
+
+def _present_on(model, alias):
+    # Shards only hold sharded tables and the mirrored reference tables
+    return (
+        alias == "default"
+        or is_sharded(model)
+        or model._meta.label_lower in REFERENCE_MODELS
+    )
+
+
+def purge_rows(model, pks, using, batch_size, counts=None):
+    """
+    Delete rows and everything referencing them on one database, children
+    first, each child table in batches of `batch_size` ids.
+    Returns a Counter of deleted rows per model label.
+    """
+    counts = Counter() if counts is None else counts
+    if not pks:
+        return counts
+
+    for rel in model._meta.related_objects:
+        child = rel.related_model
+        if not _present_on(child, using):
+            continue
+
+        children = child._base_manager.using(using).filter(**{f"{rel.field.name}__in": pks})
+        if rel.on_delete is models.SET_NULL:
+            children.update(**{rel.field.name: None})
+            continue
+        if rel.on_delete is not models.CASCADE:
+            continue
+
+        while True:
+            child_pks = list(children.values_list("pk", flat=True)[:batch_size])
+            if not child_pks:
+                break
+            purge_rows(child, child_pks, using, batch_size, counts)
+
+    for field in model._meta.local_many_to_many:
+        through = field.remote_field.through
+        through._base_manager.using(using).filter(
+            **{f"{field.m2m_field_name()}__in": pks}
+        )._raw_delete(using)
+
+    queryset = model._base_manager.using(using).filter(pk__in=pks)
+    counts[model._meta.label] += queryset._raw_delete(using)
+    return counts
+
+
+def purge_aliases(model, using):
+    """Databases to purge rows of `model` found on `using` from."""
+    if is_sharded(model):
+        return [using]
+    # Shared rows: remove the shard copies first, then the original
+    return shard_aliases()[1:] + ["default"]
@@ -10,15 +10,19 @@ urlpatterns = [
     path("degree-programs/", views.degree_program_list, name="degree_program_list"),
     path("degree-programs/add/", views.degree_program_add, name="degree_program_add"),
     path("degree-programs/<int:pk>/edit/", views.degree_program_edit, name="degree_program_edit",),
+    path("degree-programs/<int:pk>/requirements/", views.degree_program_requirements, name="degree_program_requirements"),
     path("degree-programs/<int:pk>/delete/", views.degree_program_delete, name="degree_program_delete",),
 
     path("courses/", views.course_list, name="course_list"),
+    path("courses/search/", views.course_search, name="course_search"),
     path("courses/add/", views.course_add, name="course_add"),
     path("courses/edit/<int:pk>/", views.course_edit, name="course_edit"),
+    path("courses/<int:pk>/requisites/", views.course_requisites, name="course_requisites"),
     path("courses/delete/<int:pk>/", views.course_delete, name="course_delete"),
 
     path("semesters/", views.semester_list, name="semester_list"),
     path("semesters/add/", views.semester_add, name="semester_add"),
+    path("semesters/rollover/", views.semester_rollover, name="semester_rollover"),
     path("semesters/edit/<int:pk>/", views.semester_edit, name="semester_edit"),
     path("semesters/delete/<int:pk>/", views.semester_delete, name="semester_delete"),
 
@@ -26,5 +30,8 @@ urlpatterns = [
     path("course-offerings/add/", views.course_offering_add, name="course_offering_add"),
     path("course-offerings/<int:pk>/edit/", views.course_offering_edit, name="course_offering_edit"),
     path("course-offerings/<int:pk>/delete/", views.course_offering_delete, name="course_offering_delete"),
+    path("course-offerings/<int:pk>/sections/", views.course_section_list, name="course_section_list"),
+    path("course-offerings/<int:pk>/meetings/", views.course_offering_meetings, name="course_offering_meetings"),
+    path("course-offerings/bulk/", views.course_offering_bulk_action, name="course_offering_bulk_action"),
 
 ]
@@ -1,12 +1,45 @@
 from django.db import IntegrityError
+from django.db.models import Count
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from academics.models import Department, DegreeProgram, Course, Semester, CourseOffering
+from academics.models import (
+    Course,
+    CourseOffering,
+    CoursePrerequisiteClosure,
+    CourseRequisite,
+    CourseSection,
+    DegreeProgram,
+    Department,
+    MeetingTime,
+    ProgramRequirement,
+    RequirementCourse,
+    Semester,
+)
+from academics.search import search_courses
+from enrollment.models import Enrollment
 from accounts.decorators import guest_only, student_required, super_admin_required, department_admin_required, admin_required
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
+from config.db import retry_on_lock
+from config.routers import read_from_replica
+from config.sharding import (
+    cross_shard_list,
+    cross_shard_querysets,
+    cross_shard_update,
+    shard_by_pk,
+    shard_for_department_id,
+    shard_for_pk,
+    use_shard,
+)
+
+COURSE_SEARCH_PAGE_SIZE = 20
+# Course list search shows the best matches only
+COURSE_SEARCH_LIMIT = 200
 
 @super_admin_required
+@read_from_replica
 def department_list(request):
     departments = Department.objects.all().order_by('name')
     return render(request, 'academics/department_list.html', {
@@ -34,7 +67,7 @@ def department_add(request):
 @super_admin_required
 def department_delete(request, pk):
     dept = get_object_or_404(Department, pk=pk)
-    dept.delete()
+    dept.soft_delete()
     messages.success(request, "Department deleted")
     return redirect('department_list')
 
@@ -56,6 +89,7 @@ def department_edit(request, pk):
     })
 
 @super_admin_required
+@read_from_replica
 def degree_program_list(request):
     programs = DegreeProgram.objects.select_related("department").all()
     return render(
@@ -75,6 +109,7 @@ def degree_program_add(request):
             level=request.POST.get("level"),
             duration_years=request.POST.get("duration_years"),
             max_credits_per_semester=request.POST.get("max_credits_per_semester"),
+            credits_required=request.POST.get("credits_required") or 0,
             is_active=request.POST.get("is_active") == "1",
         )
 
@@ -100,6 +135,7 @@ def degree_program_edit(request, pk):
         program.level = request.POST.get("level")
         program.duration_years = request.POST.get("duration_years")
         program.max_credits_per_semester = request.POST.get("max_credits_per_semester")
+        program.credits_required = request.POST.get("credits_required") or 0
         program.is_active = request.POST.get("is_active") == "1"
         program.save()
 
@@ -115,19 +151,58 @@ def degree_program_edit(request, pk):
         },
     )
 
+@super_admin_required
+def degree_program_requirements(request, pk):
+    program = get_object_or_404(DegreeProgram.objects.select_related("department"), pk=pk)
+
+    # Requirements live on the shard of the program's department, with its courses
+    with use_shard(shard_for_department_id(program.department_id)):
+        if request.method == "POST":
+            update_program_requirements(request, program)
+            return redirect("degree_program_requirements", pk=program.pk)
+
+        return render(request, "academics/degree_program_requirements.html", {
+            "program": program,
+            "requirements": ProgramRequirement.objects.filter(
+                degree_program=program
+            ).prefetch_related("courses__course").order_by("kind", "name"),
+            "courses": Course.objects.filter(
+                department_id=program.department_id, is_active=True
+            ).order_by("course_code"),
+            "kind_choices": ProgramRequirement.KIND_CHOICES,
+        })
+
 @super_admin_required
 def degree_program_delete(request, pk):
     program = get_object_or_404(DegreeProgram, pk=pk)
-    program.delete()
+    program.soft_delete()
     messages.success(request, "Degree program deleted successfully")
     return redirect("degree_program_list")
 
 @admin_required
+@read_from_replica
 def course_list(request):
     user = request.user
+    query = request.GET.get("q", "").strip()
+
+    if query:
+        # Ranked full-text matches instead of the whole catalog
+        department_id = None
+        if user.role == "DEPARTMENT_ADMIN":
+            department_id = user.departmentadmin.department_id
+        courses, total = search_courses(
+            query, **catalog_search_scope(department_id), limit=COURSE_SEARCH_LIMIT
+        )
+        return render(request, "academics/course_list.html", {
+            "courses": courses,
+            "query": query,
+            "total": total,
+        })
 
     if user.role == "SUPER_ADMIN":
-        courses = Course.objects.select_related("department").order_by("-created_at")
+        courses = cross_shard_list(
+            Course.objects.select_related("department").order_by("-created_at")
+        )
 
     elif user.role == "DEPARTMENT_ADMIN":
         department = user.departmentadmin.department
@@ -143,6 +218,48 @@ def course_list(request):
         "courses": courses
     })
 
+@login_required(login_url='login')
+@read_from_replica
+def course_search(request):
+    """
+    JSON catalog search: ?q=<words>&page=<n>. Department admins and
+    students only see their own department's courses.
+    """
+    user = request.user
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+
+    department_id = None
+    if user.role == "DEPARTMENT_ADMIN":
+        department_id = user.departmentadmin.department_id
+    elif user.role == "STUDENT":
+        department_id = user.student.department_id
+
+    courses, total = search_courses(
+        request.GET.get("q", ""),
+        **catalog_search_scope(department_id),
+        offset=(page - 1) * COURSE_SEARCH_PAGE_SIZE,
+        limit=COURSE_SEARCH_PAGE_SIZE,
+    )
+    return JsonResponse({
+        "total": total,
+        "page": page,
+        "page_size": COURSE_SEARCH_PAGE_SIZE,
+        "results": [
+            {
+                "id": course.id,
+                "course_code": course.course_code,
+                "course_name": course.course_name,
+                "department": course.department.code,
+                "credit_points": course.credit_points,
+                "is_active": course.is_active,
+            }
+            for course in courses
+        ],
+    })
+
 @admin_required
 def course_add(request):
     user = request.user
@@ -165,14 +282,15 @@ def course_add(request):
         else:
             department_id = fixed_department.id  # force department
 
-        Course.objects.create(
-            department_id=department_id,
-            course_name=request.POST.get("course_name"),
-            course_code=request.POST.get("course_code"),
-            credit_points=request.POST.get("credit_points"),
-            max_capacity=request.POST.get("max_capacity"),
-            is_active=request.POST.get("is_active") == "1",
-        )
+        with use_shard(shard_for_department_id(department_id)):
+            Course.objects.create(
+                department_id=department_id,
+                course_name=request.POST.get("course_name"),
+                course_code=request.POST.get("course_code"),
+                credit_points=request.POST.get("credit_points"),
+                max_capacity=request.POST.get("max_capacity"),
+                is_active=request.POST.get("is_active") == "1",
+            )
 
         messages.success(request, "Course added successfully")
         return redirect("course_list")
@@ -183,6 +301,7 @@ def course_add(request):
     })
 
 @admin_required
+@shard_by_pk
 def course_edit(request, pk):
     user = request.user
     course = get_object_or_404(Course, pk=pk)
@@ -222,6 +341,51 @@ def course_edit(request, pk):
     })
 
 @admin_required
+@shard_by_pk
+def course_requisites(request, pk):
+    user = request.user
+    course = get_object_or_404(Course, pk=pk)
+
+    if user.role == "DEPARTMENT_ADMIN" and course.department != user.departmentadmin.department:
+        messages.error(request, "You are not allowed to edit this course.")
+        return redirect("course_list")
+
+    if request.method == "POST" and request.POST.get("action") == "remove":
+        edge = get_object_or_404(CourseRequisite, pk=request.POST.get("requisite_id"), course=course)
+        edge.remove()
+        messages.success(request, f"{edge.requires.course_code} removed.")
+        return redirect("course_requisites", pk=course.pk)
+
+    if request.method == "POST":
+        requires = Course.objects.filter(
+            pk=request.POST.get("requires"), department=course.department
+        ).first()
+        kind = request.POST.get("kind")
+        if requires is None or requires.pk == course.pk or kind not in dict(CourseRequisite.KIND_CHOICES):
+            messages.error(request, "Choose another course of this department and a type.")
+        elif CourseRequisite.objects.filter(course=course, requires=requires).exists():
+            messages.error(request, f"{requires.course_code} is already a requisite.")
+        else:
+            try:
+                CourseRequisite.add(course, requires, kind)
+                messages.success(request, f"{requires.course_code} added.")
+            except ValueError as exc:
+                messages.error(request, str(exc))
+        return redirect("course_requisites", pk=course.pk)
+
+    return render(request, "academics/course_requisites.html", {
+        "course": course,
+        "requisites": CourseRequisite.objects.filter(course=course).select_related("requires"),
+        "all_prerequisites": Course.objects.filter(
+            pk__in=CoursePrerequisiteClosure.objects.filter(course=course).values("requires_id")
+        ).order_by("course_code"),
+        "courses": Course.objects.filter(
+            department=course.department, is_active=True
+        ).exclude(pk=course.pk).order_by("course_code"),
+    })
+
+@admin_required
+@shard_by_pk
 def course_delete(request, pk):
     user = request.user
     course = get_object_or_404(Course, pk=pk)
@@ -231,11 +395,12 @@ def course_delete(request, pk):
             messages.error(request, "You are not allowed to delete this course.")
             return redirect("course_list")
 
-    course.delete()
+    course.soft_delete()
     messages.success(request, "Course deleted successfully")
     return redirect("course_list")
 
 @super_admin_required
+@read_from_replica
 def semester_list(request):
     semesters = Semester.objects.all().order_by("-created_at")
     return render(request, "academics/semester_list.html", {
@@ -245,48 +410,95 @@ def semester_list(request):
 @super_admin_required
 def semester_add(request):
     if request.method == "POST":
-        today = timezone.now().date()
+        error = semester_form_error(request.POST)
+        if error:
+            messages.error(request, error)
+            return redirect("semester_add")
 
-        active_semester = Semester.objects.filter(is_active=True).first()
+        semester = create_scheduled_semester(request.POST)
 
-        # If there is already an active semester
-        if active_semester:
-            # If the active semester has NOT ended
-            if active_semester.end_date >= today:
-                messages.error(
-                    request,
-                    f"Cannot add new semester. "
-                    f"The current active semester '{active_semester.name}' "
-                    f"ends on {active_semester.end_date}."
-                )
-                return redirect("semester_list")
+        if semester.is_active:
+            messages.success(request, "Semester added successfully")
+        else:
+            messages.success(
+                request,
+                f"Semester added. It becomes active on {semester.activate_on}."
+            )
+        return redirect("semester_list")
 
-            # If the active semester HAS ended
-            active_semester.is_active = False
-            active_semester.save(update_fields=["is_active"])
+    return render(request, "academics/semester_form.html")
 
-        # Create the new semester
-        Semester.objects.create(
-            name=request.POST.get("name"),
-            start_date=request.POST.get("start_date"),
-            end_date=request.POST.get("end_date"),
-            enrollment_open_date=request.POST.get("enrollment_open_date"),
-            enrollment_close_date=request.POST.get("enrollment_close_date"),
-            is_active=request.POST.get("is_active") == "1",
+@super_admin_required
+def semester_rollover(request):
+    """
+    Create the next semester (or pick an upcoming one) and clone the
+    selected offerings of a previous semester into it in bulk.
+    """
+    source = (
+        Semester.objects.filter(pk=request.GET.get("source")).first()
+        or Semester.objects.filter(is_active=True).first()
+    )
+    offerings = cross_shard_list(
+        CourseOffering.with_seats(
+            CourseOffering.objects.select_related("course", "course__department")
         )
+        .filter(semester=source)
+        .order_by("course__course_code")
+    ) if source else []
+    targets = Semester.objects.filter(
+        is_active=False, is_archived=False, start_date__gt=timezone.now().date()
+    ).order_by("start_date")
 
-        messages.success(request, "Semester added successfully")
+    if request.method == "POST":
+        offering_ids = [int(pk) for pk in request.POST.getlist("offering_ids") if pk.isdigit()]
+        if not offering_ids:
+            messages.error(request, "Select at least one offering to clone.")
+            return redirect(f"{request.path}?source={source.pk if source else ''}")
+
+        target_id = request.POST.get("target_semester")
+        if target_id:
+            semester = get_object_or_404(targets, pk=target_id)
+        else:
+            error = semester_form_error(request.POST)
+            if error:
+                messages.error(request, error)
+                return redirect(f"{request.path}?source={source.pk if source else ''}")
+            semester = create_scheduled_semester(request.POST)
+
+        created = CourseOffering.clone_to_semester(offering_ids, semester)
+        skipped = len(offering_ids) - created
+
+        summary = f"{created} offering(s) cloned into {semester.name}."
+        if skipped:
+            summary += f" {skipped} skipped (already offered)."
+        if not semester.is_active and semester.activate_on:
+            summary += f" It becomes active on {semester.activate_on}."
+        messages.success(request, summary)
         return redirect("semester_list")
 
-    return render(request, "academics/semester_form.html")
+    return render(request, "academics/semester_rollover.html", {
+        "source": source,
+        "semesters": Semester.objects.order_by("-start_date"),
+        "targets": targets,
+        "offerings": offerings,
+    })
 
 @super_admin_required
 def semester_edit(request, pk):
     semester = get_object_or_404(Semester, pk=pk)
 
     if request.method == "POST":
+        error = semester_form_error(request.POST)
+        if error:
+            messages.error(request, error)
+            return redirect("semester_edit", pk=semester.pk)
+
         wants_active = request.POST.get("is_active") == "1"
 
+        if wants_active and semester.is_archived:
+            messages.error(request, "Archived semesters cannot be activated.")
+            return redirect("semester_edit", pk=semester.pk)
+
         # If admin is trying to activate this semester
         if wants_active:
             other_active_semester = Semester.objects.filter(
@@ -308,6 +520,10 @@ def semester_edit(request, pk):
         semester.enrollment_open_date = request.POST.get("enrollment_open_date")
         semester.enrollment_close_date = request.POST.get("enrollment_close_date")
         semester.is_active = wants_active
+        semester.activate_on = None if wants_active else request.POST.get("activate_on") or None
+        mode = request.POST.get("enrollment_mode")
+        if mode in dict(Semester.ENROLLMENT_MODE_CHOICES) and not semester.preferences_allocated_at:
+            semester.enrollment_mode = mode
         semester.save()
 
         messages.success(request, "Semester updated successfully")
@@ -322,17 +538,18 @@ def semester_edit(request, pk):
 @super_admin_required
 def semester_delete(request, pk):
     semester = get_object_or_404(Semester, pk=pk)
-    semester.delete()
+    semester.soft_delete()
     messages.success(request, "Semester deleted successfully")
     return redirect("semester_list")
 
 @admin_required
+@read_from_replica
 def course_offering_list(request):
     user = request.user
 
-    offerings = CourseOffering.objects.select_related(
-        "course", "semester", "course__department"
-    )
+    offerings = CourseOffering.with_seats(
+        CourseOffering.objects.select_related("course", "semester", "course__department")
+    ).annotate(section_count=Count("sections"))
 
     if user.role == "DEPARTMENT_ADMIN":
         offerings = offerings.filter(
@@ -340,7 +557,7 @@ def course_offering_list(request):
         )
 
     return render(request, "academics/course_offering_list.html", {
-        "offerings": offerings.order_by("-created_at")
+        "offerings": cross_shard_list(offerings.order_by("-created_at"))
     })
 
 @admin_required
@@ -350,7 +567,7 @@ def course_offering_add(request):
     semesters = Semester.objects.filter(is_active=True)
 
     if user.role == "SUPER_ADMIN":
-        courses = Course.objects.filter(is_active=True)
+        courses = cross_shard_list(Course.objects.filter(is_active=True))
     else:
         courses = Course.objects.filter(
             department=user.departmentadmin.department,
@@ -360,29 +577,42 @@ def course_offering_add(request):
     if request.method == "POST":
         course_id = request.POST.get("course")
         semester_id = request.POST.get("semester")
+        capacity = request.POST.get("capacity", "")
 
-        if CourseOffering.objects.filter(
+        # Offerings live on the shard of their course; deleted rows count
+        # until they are purged, as they still hold the unique key
+        if CourseOffering.all_objects.using(shard_for_pk(course_id)).filter(
             course_id=course_id,
             semester_id=semester_id
         ).exists():
             messages.error(request, "This course is already offered in this semester.")
             return redirect("course_offering_add")
 
-        CourseOffering.objects.create(
-            course_id=course_id,
-            semester_id=semester_id,
-            is_active=True
-        )
+        with use_shard(shard_for_pk(course_id)):
+            # Without a capacity the offering takes its seats from the course
+            CourseOffering.objects.create(
+                course_id=course_id,
+                semester_id=semester_id,
+                capacity=int(capacity) if capacity.isdigit() and int(capacity) > 0 else None,
+                is_active=True
+            )
 
         messages.success(request, "Course offering created successfully.")
         return redirect("course_offering_list")
 
+    courses = list(courses)
+    forecasts = offering_demand_forecasts(courses, semesters)
+    for course in courses:
+        course.forecast = forecasts.get(course.id)
+
     return render(request, "academics/course_offering_form.html", {
         "courses": courses,
-        "semesters": semesters
+        "semesters": semesters,
+        "show_forecasts": bool(forecasts),
     })
 
 @admin_required
+@shard_by_pk
 def course_offering_edit(request, pk):
     user = request.user
     offering = get_object_or_404(CourseOffering, pk=pk)
@@ -394,7 +624,7 @@ def course_offering_edit(request, pk):
 
     # Fetch courses & semesters
     if user.role == "SUPER_ADMIN":
-        courses = Course.objects.filter(is_active=True)
+        courses = cross_shard_list(Course.objects.filter(is_active=True))
     else:
         # department admin: only his department courses
         courses = Course.objects.filter(department=user.departmentadmin.department, is_active=True)
@@ -407,7 +637,7 @@ def course_offering_edit(request, pk):
         is_active = request.POST.get("is_active") == "1"
 
         # Check uniqueness before saving
-        if CourseOffering.objects.exclude(pk=offering.pk).filter(course_id=course_id, semester_id=semester_id).exists():
+        if CourseOffering.all_objects.exclude(pk=offering.pk).filter(course_id=course_id, semester_id=semester_id).exists():
             messages.error(request, "This course is already offered in the selected semester.")
             return redirect("course_offering_edit", pk=offering.pk)
 
@@ -429,6 +659,7 @@ def course_offering_edit(request, pk):
     })
 
 @admin_required
+@shard_by_pk
 def course_offering_delete(request, pk):
     user = request.user
     offering = get_object_or_404(CourseOffering, pk=pk)
@@ -438,6 +669,302 @@ def course_offering_delete(request, pk):
             messages.error(request, "You are not allowed to delete this offering.")
             return redirect("course_offering_list")
 
-    offering.delete()
+    offering.soft_delete()
     messages.success(request, "Course offering deleted successfully.")
     return redirect("course_offering_list")
+
+@admin_required
+@shard_by_pk
+def course_section_list(request, pk):
+    user = request.user
+    offering = get_object_or_404(
+        CourseOffering.objects.select_related("course", "semester"), pk=pk
+    )
+
+    if user.role == "DEPARTMENT_ADMIN" and offering.course.department != user.departmentadmin.department:
+        messages.error(request, "You are not allowed to manage this course offering.")
+        return redirect("course_offering_list")
+
+    sections = offering.sections.all()
+
+    if request.method == "POST" and request.POST.get("action") == "delete":
+        section = get_object_or_404(CourseSection, pk=request.POST.get("section_id"), course_offering=offering)
+        if remove_course_section(section):
+            messages.success(request, f"Section {section.name} deleted.")
+        else:
+            messages.error(request, "Only empty sections can be deleted.")
+        return redirect("course_section_list", pk=offering.pk)
+
+    if request.method == "POST":
+        name = request.POST.get("name", "").strip()
+        capacity = request.POST.get("capacity", "")
+        if not name or not capacity.isdigit() or int(capacity) < 1:
+            messages.error(request, "Enter a section name and a capacity of at least 1.")
+            return redirect("course_section_list", pk=offering.pk)
+        if sections.filter(name=name).exists():
+            messages.error(request, f"Section {name} already exists.")
+            return redirect("course_section_list", pk=offering.pk)
+
+        add_course_section(offering, name, int(capacity))
+        messages.success(request, f"Section {name} added.")
+        return redirect("course_section_list", pk=offering.pk)
+
+    return render(request, "academics/course_sections.html", {
+        "offering": CourseOffering.with_seats(CourseOffering.objects.filter(pk=offering.pk)).first(),
+        "sections": sections,
+    })
+
+@admin_required
+@shard_by_pk
+def course_offering_meetings(request, pk):
+    user = request.user
+    offering = get_object_or_404(
+        CourseOffering.objects.select_related("course", "semester"), pk=pk
+    )
+
+    if user.role == "DEPARTMENT_ADMIN" and offering.course.department != user.departmentadmin.department:
+        messages.error(request, "You are not allowed to manage this course offering.")
+        return redirect("course_offering_list")
+
+    if request.method == "POST" and request.POST.get("action") == "delete":
+        get_object_or_404(MeetingTime, pk=request.POST.get("meeting_id"), course_offering=offering).delete()
+        messages.success(request, "Meeting time deleted.")
+        return redirect("course_offering_meetings", pk=offering.pk)
+
+    if request.method == "POST":
+        day = request.POST.get("day", "")
+        start_time = parse_time(request.POST.get("start_time") or "")
+        end_time = parse_time(request.POST.get("end_time") or "")
+        if not day.isdigit() or int(day) not in dict(MeetingTime.DAY_CHOICES) or not start_time or not end_time:
+            messages.error(request, "Enter a day, a start time and an end time.")
+        elif end_time <= start_time:
+            messages.error(request, "The meeting must end after it starts.")
+        else:
+            meeting = MeetingTime(
+                course_offering=offering,
+                day=int(day),
+                start_time=start_time,
+                end_time=end_time,
+                room=request.POST.get("room", "").strip(),
+            )
+            if any(meeting.overlaps(other) for other in offering.meetings.all()):
+                messages.error(request, "This overlaps another meeting of the offering.")
+            else:
+                meeting.save()
+                messages.success(request, f"Meeting {meeting} added.")
+        return redirect("course_offering_meetings", pk=offering.pk)
+
+    return render(request, "academics/course_offering_meetings.html", {
+        "offering": offering,
+        "meetings": offering.meetings.all(),
+        "days": MeetingTime.DAY_CHOICES,
+    })
+
+@admin_required
+def course_offering_bulk_action(request):
+    if request.method != "POST":
+        return redirect("course_offering_list")
+
+    user = request.user
+    action = request.POST.get("action")
+    offering_ids = [int(pk) for pk in request.POST.getlist("offering_ids") if pk.isdigit()]
+
+    if action not in ("open", "close"):
+        messages.error(request, "Unknown bulk action.")
+        return redirect("course_offering_list")
+    if not offering_ids:
+        messages.error(request, "Select at least one course offering.")
+        return redirect("course_offering_list")
+
+    offerings = CourseOffering.objects.all()
+    if user.role == "DEPARTMENT_ADMIN":
+        offerings = offerings.filter(course__department=user.departmentadmin.department)
+
+    updated = cross_shard_update(
+        cross_shard_querysets(offerings, pks=offering_ids),
+        is_active=action == "open",
+    )
+
+    summary = f"{'Opened' if action == 'open' else 'Closed'}: {updated} offering(s) updated."
+    skipped = len(set(offering_ids)) - updated
+    if skipped:
+        summary += f" {skipped} skipped (not found or outside your department)."
+    messages.success(request, summary)
+    return redirect("course_offering_list")
+
+
+SEMESTER_DATE_FIELDS = (
+    ("start_date", "Start date"),
+    ("end_date", "End date"),
+    ("enrollment_open_date", "Enrollment open date"),
+    ("enrollment_close_date", "Enrollment close date"),
+    ("activate_on", "Activation date"),
+)
+
+
+def semester_form_error(data):
+    """Message for the first unusable field of a semester form, or None."""
+    if not (data.get("name") or "").strip():
+        return "Semester name is required."
+    dates = {}
+    for field, label in SEMESTER_DATE_FIELDS:
+        value = data.get(field)
+        if field == "activate_on" and not value:
+            # Optional: defaults to the enrollment open date
+            continue
+        try:
+            dates[field] = parse_date(value or "")
+        except ValueError:
+            # Well formed but impossible, e.g. 2026-02-30
+            dates[field] = None
+        if dates[field] is None:
+            return f"{label} is missing or not a valid date."
+    if dates["start_date"] > dates["end_date"]:
+        return "The semester cannot end before it starts."
+    if dates["enrollment_open_date"] > dates["enrollment_close_date"]:
+        return "Enrollment cannot close before it opens."
+    return None
+
+
+def create_scheduled_semester(data):
+    """
+    Create a semester from form data. It is active right away only when no
+    other semester is; otherwise it is scheduled, and the
+    activate_scheduled_semesters command switches over on its activation
+    date (the enrollment open date unless given).
+    """
+    activate_on = parse_date(data.get("activate_on") or data.get("enrollment_open_date"))
+    today = timezone.now().date()
+    activate_now = (
+        not Semester.objects.filter(is_active=True).exists()
+        and activate_on <= today
+    )
+
+    return Semester.objects.create(
+        name=data.get("name"),
+        start_date=data.get("start_date"),
+        end_date=data.get("end_date"),
+        enrollment_open_date=data.get("enrollment_open_date"),
+        enrollment_close_date=data.get("enrollment_close_date"),
+        is_active=activate_now,
+        activate_on=None if activate_now else activate_on,
+        enrollment_mode=(
+            data.get("enrollment_mode")
+            if data.get("enrollment_mode") in dict(Semester.ENROLLMENT_MODE_CHOICES)
+            else "FCFS"
+        ),
+    )
+
+
+@retry_on_lock
+def add_course_section(offering, name, capacity):
+    """
+    Add a section to an offering. The first section takes over the seats
+    already counted on the offering, and their enrollments, since the
+    offering counter stops being used once it has sections.
+    """
+    first = not offering.sections.exists()
+    section = CourseSection.objects.create(
+        course_offering=offering,
+        name=name,
+        capacity=capacity,
+        current_enrollment=offering.current_enrollment if first else 0,
+    )
+    if first:
+        Enrollment.objects.filter(
+            course_offering=offering, status="ENROLLED"
+        ).update(section=section)
+    return section
+
+
+@retry_on_lock
+def remove_course_section(section):
+    """
+    Delete a section without enrolled students; False when it has some.
+    Deleting the last section hands the seat count back to the offering,
+    whose counter is used again once it has no sections.
+    """
+    if Enrollment.objects.filter(section=section, status="ENROLLED").exists():
+        return False
+    deleted, _ = CourseSection.objects.filter(pk=section.pk, current_enrollment=0).delete()
+    if not deleted:
+        return False
+
+    offering_id = section.course_offering_id
+    if not CourseSection.objects.filter(course_offering_id=offering_id).exists():
+        CourseOffering.objects.filter(pk=offering_id).update(
+            current_enrollment=Enrollment.objects.filter(
+                course_offering_id=offering_id, status="ENROLLED"
+            ).count()
+        )
+    return True
+
+
+def catalog_search_scope(department_id=None):
+    """search_courses() arguments limiting a search to one department."""
+    if department_id is None:
+        return {}
+    return {
+        "department_id": department_id,
+        "aliases": [shard_for_department_id(department_id)],
+    }
+
+
+def update_program_requirements(request, program):
+    action = request.POST.get("action")
+
+    if action == "add_requirement":
+        name = request.POST.get("name", "").strip()
+        kind = request.POST.get("kind")
+        if not name or kind not in dict(ProgramRequirement.KIND_CHOICES):
+            messages.error(request, "Enter a name and a type.")
+            return
+        ProgramRequirement.objects.create(
+            degree_program=program,
+            name=name,
+            kind=kind,
+            credits_required=request.POST.get("credits_required") or 0,
+        )
+        messages.success(request, f"{name} added.")
+        return
+
+    requirement = get_object_or_404(
+        ProgramRequirement, pk=request.POST.get("requirement_id"), degree_program=program
+    )
+
+    if action == "delete_requirement":
+        requirement.delete()
+        messages.success(request, f"{requirement.name} removed.")
+
+    elif action == "add_course":
+        course = Course.objects.filter(
+            pk=request.POST.get("course"), department_id=program.department_id
+        ).first()
+        if course is None:
+            messages.error(request, "Choose a course of this department.")
+        elif RequirementCourse.objects.filter(requirement=requirement, course=course).exists():
+            messages.error(request, f"{course.course_code} is already listed.")
+        else:
+            RequirementCourse.objects.create(requirement=requirement, course=course)
+            messages.success(request, f"{course.course_code} added to {requirement.name}.")
+
+    elif action == "remove_course":
+        RequirementCourse.objects.filter(
+            requirement=requirement, pk=request.POST.get("requirement_course_id")
+        ).delete()
+        messages.success(request, "Course removed.")
+
+
+def offering_demand_forecasts(courses, semesters):
+    """
+    Demand forecasts for `courses` in the earliest of `semesters`; empty
+    without NumPy.
+    """
+    semester = semesters.order_by("start_date").first()
+    if semester is None or not courses:
+        return {}
+    try:
+        from enrollment.forecast import forecast_demand
+    except ImportError:
+        return {}
+    return forecast_demand(courses, semester)
@@ -1,6 +1,10 @@
 from functools import wraps
+from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.utils import timezone
+
+from .models import ApiToken
 
 
 def role_required(allowed_roles=None):
@@ -51,3 +55,26 @@ def admin_required(view_func):
 def student_required(view_func):
     return role_required(["STUDENT"])(view_func)
 
+
+def api_token_required(view_func):
+    """
+    For external systems: requires an `Authorization: Bearer <key>` header
+    of an active ApiToken and answers with JSON errors instead of redirects.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        scheme, _, key = request.headers.get("Authorization", "").partition(" ")
+        token = None
+        if scheme.lower() == "bearer" and key.strip():
+            token = ApiToken.objects.filter(
+                key_digest=ApiToken.digest(key.strip()), is_active=True
+            ).first()
+
+        if token is None:
+            return JsonResponse({"error": "Invalid or missing API token"}, status=401)
+
+        ApiToken.objects.filter(pk=token.pk).update(last_used_at=timezone.now())
+        request.api_token = token
+        return view_func(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+
+def student_credentials_email(first_name, student_id, username, email, password, otp, verify_link):
+    subject = "Student Account Credentials and Verification OTP"
+    message = (
+        f"Hello {first_name},\n\n"
+        f"Your student account has been created successfully.\n\n"
+        f"Student ID: {student_id}\n"
+        f"Username: {username}\n"
+        f"Email: {email}\n"
+        f"Temporary Password: {password}\n"
+        f"Your OTP: {otp}\n\n"
+        f"Verify your account using the link below:\n\n"
+        f"{verify_link}\n\n"
+        f"OTP will expire in 30 minutes.\n\n"
+        f"Regards,\nVIT - Course Enrollment Portal"
+    )
+    return subject, message
+
+
+def send_queued_emails(batch_size=100):
+    """
+    Send one batch of queued emails over a single SMTP connection.
+    Returns (sent, failed).
+    """
+    queued = list(
+        QueuedEmail.objects.filter(status="QUEUED").order_by("created_at")[:batch_size]
+    )
+    if not queued:
+        return 0, 0
+
+    sent_ids = []
+    failed = []
+
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    try:
+        for item in queued:
+            email = EmailMessage(
+                subject=item.subject,
+                body=item.message,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[item.recipient],
+                connection=connection,
+            )
+            try:
+                email.send()
+                sent_ids.append(item.id)
+            except Exception as exc:
+                failed.append((item, str(exc)))
+    finally:
+        connection.close()
+
+    now = timezone.now()
+    # Bodies can hold temporary passwords and OTPs: keep them only while queued
+    QueuedEmail.objects.filter(id__in=sent_ids).update(status="SENT", sent_at=now, message="")
+
+    for item, error in failed:
+        item.attempts += 1
+        item.last_error = error
+        if item.attempts >= settings.QUEUED_EMAIL_MAX_ATTEMPTS:
+            item.status = "FAILED"
+            item.message = ""
+        item.save(update_fields=["attempts", "last_error", "status", "message"])
+
+    return len(sent_ids), len(failed)
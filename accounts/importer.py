@@ -0,0 +1,358 @@
+import csv
+import os
+import tempfile
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.validators import validate_email
+from django.db import close_old_connections, connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from academics.models import Department, DegreeProgram
+from config.sharding import mirror_reference_rows, shard_for_department_id
+from config.workers import worker_pool
+from enrollment.slots import invalidate_enrollment_slots
+from .emails import student_credentials_email
+from .models import QueuedEmail, Student, StudentIdSequence, StudentImport, User
+from .search import index_students
+from .stats import invalidate_dashboard_stats
+
+IMPORT_COLUMNS = (
+    "first_name",
+    "last_name",
+    "email",
+    "username",
+    "department_code",
+    "degree_program",
+    "enrollment_year",
+)
+
+ERROR_COLUMNS = ("row",) + IMPORT_COLUMNS + ("error",)
+
+
+def hash_temporary_password(raw_password):
+    """
+    Hash an emailed temporary password. With STUDENT_IMPORT_PASSWORD_ITERATIONS
+    set, a cheaper PBKDF2 work factor is used; Django re-hashes it at the full
+    cost the first time the student logs in.
+    """
+    iterations = settings.STUDENT_IMPORT_PASSWORD_ITERATIONS
+    if not iterations:
+        return make_password(raw_password)
+
+    hasher = PBKDF2PasswordHasher()
+    return hasher.encode(raw_password, hasher.salt(), iterations=iterations)
+
+
+def iter_import_rows(path):
+    """
+    Yield (row_number, row_dict) from a CSV or XLSX file without loading it
+    into memory. Row numbers match the spreadsheet (header is row 1).
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("XLSX import requires the openpyxl package.")
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(h or "").strip().lower() for h in next(rows, ())]
+            for number, values in enumerate(rows, start=2):
+                if not any(values):
+                    continue
+                yield number, {
+                    key: "" if value is None else str(value).strip()
+                    for key, value in zip(header, values)
+                }
+        finally:
+            workbook.close()
+        return
+
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        reader = csv.DictReader(handle)
+        reader.fieldnames = [f.strip().lower() for f in reader.fieldnames or []]
+        for number, row in enumerate(reader, start=2):
+            if not any(row.values()):
+                continue
+            yield number, {key: (value or "").strip() for key, value in row.items() if key}
+
+
+def count_import_rows(path):
+    return sum(1 for _ in iter_import_rows(path))
+
+
+class StudentImporter:
+    """
+    Import students in chunks: every chunk is validated with a fixed number
+    of set-based queries, inserted with bulk_create inside one transaction,
+    and the credential emails are queued instead of sent inline.
+    """
+
+    def __init__(self, student_import, base_url, chunk_size=None, hash_workers=None):
+        self.student_import = student_import
+        self.base_url = base_url.rstrip("/")
+        self.chunk_size = chunk_size or settings.STUDENT_IMPORT_CHUNK_SIZE
+        self.hash_workers = hash_workers or settings.STUDENT_IMPORT_HASH_WORKERS
+
+        departments = Department.objects.filter(is_active=True)
+        if student_import.department_id:
+            departments = departments.filter(id=student_import.department_id)
+        self.departments = {d.code.upper(): d for d in departments}
+
+        self.programs = {
+            (p["department_id"], p["name"].lower()): p["id"]
+            for p in DegreeProgram.objects.filter(
+                department__in=self.departments.values(),
+                is_active=True,
+            ).values("id", "name", "department_id")
+        }
+
+        self.seen_usernames = set()
+        self.seen_emails = set()
+
+    def run(self, progress=None):
+        path = self.student_import.source_file.path
+        total = count_import_rows(path)
+        StudentImport.objects.filter(pk=self.student_import.pk).update(
+            status="RUNNING", total_rows=total
+        )
+
+        processed = created = errors = 0
+
+        error_handle = tempfile.NamedTemporaryFile(
+            "w+", newline="", suffix=".csv", delete=False
+        )
+        try:
+            with error_handle, worker_pool(self.hash_workers) as pool:
+                error_writer = csv.writer(error_handle)
+                error_writer.writerow(ERROR_COLUMNS)
+
+                chunk = []
+                for row in iter_import_rows(path):
+                    chunk.append(row)
+                    if len(chunk) >= self.chunk_size:
+                        created_now, failed = self._process_chunk(chunk, pool)
+                        processed, created, errors = self._record_chunk(
+                            chunk, created_now, failed, error_writer,
+                            processed, created, errors, progress,
+                        )
+                        chunk = []
+
+                if chunk:
+                    created_now, failed = self._process_chunk(chunk, pool)
+                    processed, created, errors = self._record_chunk(
+                        chunk, created_now, failed, error_writer,
+                        processed, created, errors, progress,
+                    )
+
+            if errors:
+                with open(error_handle.name, "rb") as handle:
+                    self.student_import.error_file.save(
+                        f"import_{self.student_import.pk}_errors.csv",
+                        File(handle),
+                        save=False,
+                    )
+        finally:
+            os.unlink(error_handle.name)
+
+        self.student_import.status = "COMPLETED"
+        self.student_import.total_rows = total
+        self.student_import.processed_rows = processed
+        self.student_import.created_count = created
+        self.student_import.error_count = errors
+        self.student_import.finished_at = timezone.now()
+        self.student_import.save()
+        return self.student_import
+
+    def _record_chunk(self, chunk, created_now, failed, error_writer,
+                      processed, created, errors, progress):
+        for number, row, error in sorted(failed, key=lambda item: item[0]):
+            error_writer.writerow(
+                [number] + [row.get(column, "") for column in IMPORT_COLUMNS] + [error]
+            )
+
+        processed += len(chunk)
+        created += created_now
+        errors += len(failed)
+
+        StudentImport.objects.filter(pk=self.student_import.pk).update(
+            processed_rows=processed,
+            created_count=created,
+            error_count=errors,
+        )
+        if progress:
+            progress(processed, created, errors)
+        return processed, created, errors
+
+    def _process_chunk(self, chunk, pool):
+        failed = []
+        valid = []
+
+        for number, row in chunk:
+            error = self._validate_row(row)
+            if error:
+                failed.append((number, row, error))
+            else:
+                valid.append((number, row))
+
+        # Set-based uniqueness checks: one query each for the whole chunk
+        usernames = {row["username"] for _, row in valid}
+        emails = {row["email"] for _, row in valid}
+        taken_usernames = set(
+            User.objects.filter(username__in=usernames).values_list("username", flat=True)
+        )
+        taken_emails = set(
+            User.objects.filter(email__in=emails).values_list("email", flat=True)
+        )
+
+        accepted = []
+        for number, row in valid:
+            if row["username"] in taken_usernames or row["username"] in self.seen_usernames:
+                failed.append((number, row, "Username already exists"))
+            elif row["email"] in taken_emails or row["email"] in self.seen_emails:
+                failed.append((number, row, "Email already exists"))
+            else:
+                self.seen_usernames.add(row["username"])
+                self.seen_emails.add(row["email"])
+                accepted.append((number, row))
+
+        if not accepted:
+            return 0, failed
+
+        passwords = [get_random_string(10) for _ in accepted]
+        hashes = list(pool.map(hash_temporary_password, passwords, chunksize=32))
+        otp_expiry = timezone.now() + timedelta(minutes=30)
+
+        with transaction.atomic():
+            student_ids = self._allocate_student_ids(accepted)
+
+            users = [
+                User(
+                    username=row["username"],
+                    email=row["email"],
+                    password=password_hash,
+                    first_name=row["first_name"],
+                    last_name=row["last_name"],
+                    role="STUDENT",
+                    otp=generate_import_otp(),
+                    otp_expiry=otp_expiry,
+                )
+                for (_, row), password_hash in zip(accepted, hashes)
+            ]
+            User.objects.bulk_create(users, batch_size=self.chunk_size)
+            # bulk_create sends no post_save, so shard copies and search
+            # terms are made here
+            mirror_reference_rows(User, users)
+
+            students_by_shard = defaultdict(list)
+            for (_, row), user, student_id in zip(accepted, users, student_ids):
+                students_by_shard[shard_for_department_id(row["department"].id)].append(
+                    Student(
+                        user=user,
+                        student_id=student_id,
+                        department_id=row["department"].id,
+                        degree_program_id=row["program_id"],
+                        enrollment_year=row["year"],
+                    )
+                )
+            for alias, students in students_by_shard.items():
+                Student.objects.using(alias).bulk_create(students, batch_size=self.chunk_size)
+                index_students(students, alias)
+
+            emails_to_queue = []
+            for (_, row), user, student_id, password in zip(
+                accepted, users, student_ids, passwords
+            ):
+                verify_link = self.base_url + reverse("verify_otp", args=[user.id])
+                subject, message = student_credentials_email(
+                    row["first_name"], student_id, row["username"], row["email"],
+                    password, user.otp, verify_link,
+                )
+                emails_to_queue.append(
+                    QueuedEmail(subject=subject, message=message, recipient=row["email"])
+                )
+            QueuedEmail.objects.bulk_create(emails_to_queue, batch_size=self.chunk_size)
+
+        # bulk_create skips post_save, so the dashboard counters and slot
+        # lookups are reset here
+        invalidate_dashboard_stats()
+        invalidate_enrollment_slots()
+
+        return len(accepted), failed
+
+    def _validate_row(self, row):
+        missing = [column for column in IMPORT_COLUMNS if not row.get(column)]
+        if missing:
+            return f"Missing value(s): {', '.join(missing)}"
+
+        try:
+            validate_email(row["email"])
+        except ValidationError:
+            return "Invalid email address"
+
+        try:
+            row["year"] = int(row["enrollment_year"])
+        except ValueError:
+            return "Enrollment year must be a number"
+
+        department = self.departments.get(row["department_code"].upper())
+        if department is None:
+            return "Unknown or inaccessible department code"
+        row["department"] = department
+
+        program_id = self.programs.get((department.id, row["degree_program"].lower()))
+        if program_id is None:
+            return "Degree program not found in this department"
+        row["program_id"] = program_id
+
+        return None
+
+    def _allocate_student_ids(self, accepted):
+        # One counter update per (year, department) group in the chunk
+        group_sizes = Counter(
+            (row["year"], row["department"].code) for _, row in accepted
+        )
+        next_numbers = {
+            key: StudentIdSequence.reserve(key[0], key[1], count=size)
+            for key, size in group_sizes.items()
+        }
+
+        student_ids = []
+        for _, row in accepted:
+            key = (row["year"], row["department"].code)
+            student_ids.append(StudentIdSequence.format_student_id(key[0], key[1], next_numbers[key]))
+            next_numbers[key] += 1
+        return student_ids
+
+
+def generate_import_otp():
+    return get_random_string(6, allowed_chars="0123456789")
+
+
+def run_student_import(import_id, base_url):
+    """
+    Entry point for background threads: runs the import and records any
+    unexpected failure on the StudentImport row.
+    """
+    close_old_connections()
+    student_import = StudentImport.objects.get(pk=import_id)
+    try:
+        StudentImporter(student_import, base_url).run()
+    except Exception as exc:
+        StudentImport.objects.filter(pk=import_id).update(
+            status="FAILED",
+            message=str(exc),
+            finished_at=timezone.now(),
+        )
+    finally:
+        connection.close()
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import ApiToken
+
+
+class Command(BaseCommand):
+    help = "List, create or revoke the API tokens of external systems."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--create", metavar="NAME", help="Issue a token for a system")
+        parser.add_argument("--revoke", type=int, metavar="ID", help="Deactivate a token")
+
+    def handle(self, *args, **options):
+        if options["create"]:
+            token, key = ApiToken.issue(options["create"])
+            self.stdout.write(self.style.SUCCESS(f"Token #{token.pk} created for {token.name}."))
+            self.stdout.write("Send it as 'Authorization: Bearer <key>'. It is not shown again:")
+            self.stdout.write(key)
+            return
+
+        if options["revoke"]:
+            if not ApiToken.objects.filter(pk=options["revoke"]).update(is_active=False):
+                raise CommandError(f"No token #{options['revoke']}.")
+            self.stdout.write(self.style.SUCCESS(f"Token #{options['revoke']} revoked."))
+            return
+
+        for token in ApiToken.objects.order_by("pk"):
+            state = "active" if token.is_active else "revoked"
+            last_used = token.last_used_at.strftime("%Y-%m-%d %H:%M") if token.last_used_at else "never"
+            self.stdout.write(f"#{token.pk} {token.name} ({state}, last used {last_used})")
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from academics.models import Department, DegreeProgram
+from accounts.models import Student, StudentIdSequence, User
+
+BENCH_YEAR = 9999
+BENCH_CODE = "BENCH"
+
+
+def legacy_next_student_id(enrollment_year, department_code):
+    # The previous implementation: scan the prefix range for the highest ID
+    prefix = f"{enrollment_year}-{department_code}-"
+    last_student = (
+        Student.objects
+        .filter(student_id__startswith=prefix)
+        .order_by("-student_id")
+        .first()
+    )
+    next_number = int(last_student.student_id[-4:]) + 1 if last_student else 1
+    return f"{prefix}{str(next_number).zfill(4)}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark student ID generation: the legacy prefix scan against the "
+        "StudentIdSequence counter, plus a concurrent collision check. "
+        f"The timed part seeds students under year {BENCH_YEAR} inside a "
+        "transaction that is rolled back; the collision check commits only "
+        "its counter row, which is removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--existing", type=int, default=5000,
+                            help="Students to seed under the benchmark prefix")
+        parser.add_argument("--calls", type=int, default=1000,
+                            help="ID generations to time per strategy")
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--per-thread", type=int, default=200)
+
+    def handle(self, *args, **options):
+        calls = options["calls"]
+
+        with transaction.atomic():
+            self._setup(options["existing"])
+
+            started = time.perf_counter()
+            for _ in range(calls):
+                legacy_next_student_id(BENCH_YEAR, BENCH_CODE)
+            legacy = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for _ in range(calls):
+                StudentIdSequence.reserve(BENCH_YEAR, BENCH_CODE)
+            sequence = time.perf_counter() - started
+
+            # Nothing seeded or reserved above is kept
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Legacy prefix scan : {calls / legacy:10.0f} ids/s ({legacy * 1000 / calls:.3f} ms/id)")
+        self.stdout.write(f"Sequence counter   : {calls / sequence:10.0f} ids/s ({sequence * 1000 / calls:.3f} ms/id)")
+
+        # Threads use their own connections, so this part has to commit
+        try:
+            issued, elapsed, errors = self._concurrent(options["threads"], options["per_thread"])
+        finally:
+            StudentIdSequence.objects.filter(
+                enrollment_year=BENCH_YEAR, department_code=BENCH_CODE
+            ).delete()
+
+        duplicates = len(issued) - len(set(issued))
+        self.stdout.write(
+            f"Concurrent reserve : {len(issued)} ids from {options['threads']} threads "
+            f"in {elapsed:.2f}s, {duplicates} duplicates, {errors} errors"
+        )
+        if duplicates:
+            self.stdout.write(self.style.ERROR("Collision detected"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No collisions"))
+
+    def _setup(self, existing):
+        department, _ = Department.objects.get_or_create(
+            code=BENCH_CODE, defaults={"name": "Benchmark", "is_active": False}
+        )
+        program = DegreeProgram.objects.create(
+            department=department, name="Benchmark", level="-", duration_years=1, is_active=False
+        )
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            [
+                User(username=f"bench-student-{i}", email=f"bench-{i}@example.invalid",
+                     password=password, role="STUDENT")
+                for i in range(existing)
+            ],
+            batch_size=500,
+        )
+        Student.objects.bulk_create(
+            [
+                Student(
+                    user_id=user.id,
+                    student_id=StudentIdSequence.format_student_id(BENCH_YEAR, BENCH_CODE, i + 1),
+                    department=department,
+                    degree_program=program,
+                    enrollment_year=BENCH_YEAR,
+                )
+                for i, user in enumerate(users)
+            ],
+            batch_size=500,
+        )
+
+    def _concurrent(self, threads, per_thread):
+        issued = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            local = []
+            try:
+                for _ in range(per_thread):
+                    local.append(StudentIdSequence.reserve(BENCH_YEAR, BENCH_CODE))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+            with lock:
+                issued.extend(local)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return issued, time.perf_counter() - started, len(errors)
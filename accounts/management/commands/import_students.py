@@ -0,0 +1,67 @@
+import os
+import time
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from academics.models import Department
+from accounts.importer import StudentImporter
+from accounts.models import StudentImport
+
+
+class Command(BaseCommand):
+    help = "Import students from a CSV or XLSX file and queue their credential emails."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or XLSX file to import")
+        parser.add_argument(
+            "--department",
+            help="Restrict the import to one department code",
+        )
+        parser.add_argument(
+            "--base-url",
+            default="http://localhost:8000",
+            help="Site URL used in the verification links",
+        )
+        parser.add_argument("--chunk-size", type=int)
+        parser.add_argument("--hash-workers", type=int)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+
+        department = None
+        if options["department"]:
+            department = Department.objects.filter(code=options["department"]).first()
+            if department is None:
+                raise CommandError(f"Unknown department code: {options['department']}")
+
+        with open(path, "rb") as handle:
+            student_import = StudentImport(department=department)
+            student_import.source_file.save(os.path.basename(path), File(handle))
+
+        started = time.perf_counter()
+
+        def progress(processed, created, errors):
+            self.stdout.write(
+                f"{processed} rows processed, {created} created, {errors} errors "
+                f"({time.perf_counter() - started:.1f}s)"
+            )
+
+        try:
+            result = StudentImporter(
+                student_import,
+                options["base_url"],
+                chunk_size=options["chunk_size"],
+                hash_workers=options["hash_workers"],
+            ).run(progress=progress)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Import #{result.pk}: {result.created_count} students created, "
+            f"{result.error_count} rows rejected in {time.perf_counter() - started:.1f}s"
+        ))
+        if result.error_file:
+            self.stdout.write(f"Error rows written to {result.error_file.path}")
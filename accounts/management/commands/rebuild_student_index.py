@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from accounts.search import rebuild_index
+from config.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = "Recreate the student directory search terms on every database."
+
+    def handle(self, *args, **options):
+        for alias in shard_aliases():
+            count = rebuild_index(alias)
+            self.stdout.write(f"[{alias}] {count} students indexed")
+        self.stdout.write(self.style.SUCCESS("Student search index rebuilt."))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.emails import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Send queued emails in batches over a reused SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the queue instead of exiting when it is empty",
+        )
+        parser.add_argument("--interval", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = send_queued_emails(options["batch_size"])
+            total_sent += sent
+            total_failed += failed
+
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}")
+                continue
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {total_sent} sent, {total_failed} failed"
+        ))
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_studentimport_queuedemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrollment_year', models.PositiveIntegerField()),
+                ('department_code', models.CharField(max_length=10)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('enrollment_year', 'department_code')},
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_existing_students(apps, schema_editor):
+    from accounts.search import student_terms
+
+    Student = apps.get_model("accounts", "Student")
+    StudentSearchTerm = apps.get_model("accounts", "StudentSearchTerm")
+    using = schema_editor.connection.alias
+
+    rows = []
+    for student in Student.objects.using(using).select_related("user").filter(deleted_at__isnull=True):
+        rows.extend(
+            StudentSearchTerm(
+                student_id=student.pk,
+                department_id=student.department_id,
+                student_number=student.student_id,
+                term=term,
+            )
+            for term in student_terms(student, student.user)
+        )
+    StudentSearchTerm.objects.using(using).bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_student_deleted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department_id', models.PositiveIntegerField()),
+                ('student_number', models.CharField(max_length=20)),
+                ('term', models.CharField(max_length=254)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='accounts.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'student_number'], name='accounts_st_term_004590_idx'), models.Index(fields=['department_id', 'term', 'student_number'], name='accounts_st_departm_187595_idx')],
+            },
+        ),
+        migrations.RunPython(index_existing_students, migrations.RunPython.noop),
+    ]
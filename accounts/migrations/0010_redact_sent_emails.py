@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:10
+
+from django.db import migrations
+
+
+def redact_sent_emails(apps, schema_editor):
+    # Bodies of sent and failed emails are no longer kept (see send_queued_emails)
+    QueuedEmail = apps.get_model("accounts", "QueuedEmail")
+    QueuedEmail.objects.using(schema_editor.connection.alias).exclude(
+        status="QUEUED"
+    ).update(message="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(redact_sent_emails, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,13 @@
+import hashlib
+import secrets
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import F
+from django.db.models.functions import Length
 from academics.models import Department, DegreeProgram
+from academics.softdelete import SoftDeleteModel
+from config.sharding import shard_aliases
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -33,7 +40,7 @@ class DepartmentAdmin(models.Model):
         return f"{self.user.username} - {self.department.name}"
 
 
-class Student(models.Model):
+class Student(SoftDeleteModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     student_id = models.CharField(max_length=20, unique=True)
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
@@ -41,6 +48,213 @@ class Student(models.Model):
     enrollment_year = models.PositiveIntegerField()
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set by database triggers on every write (see enrollment/changefeed.py)
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
+
+    @classmethod
+    def after_soft_delete(cls, queryset):
+        # Deleted students can no longer log in; their users go with the purge
+        user_ids = list(queryset.values_list("user_id", flat=True))
+        for start in range(0, len(user_ids), 1000):
+            User.objects.filter(pk__in=user_ids[start:start + 1000]).update(is_active=False)
+        StudentSearchTerm.objects.using(queryset.db).filter(student__in=queryset).delete()
+
+    @classmethod
+    def owned_rows(cls, pks, using):
+        user_ids = list(
+            cls._base_manager.using(using).filter(pk__in=pks).values_list("user_id", flat=True)
+        )
+        return [(User, user_ids)]
+
+    def __str__(self):
+        return self.student_id
+
+
+class StudentIdSequence(models.Model):
+    """
+    Last issued student number per (enrollment year, department code).
+    Student IDs have the form YEAR-CODE-NNNN.
+    """
+    enrollment_year = models.PositiveIntegerField()
+    department_code = models.CharField(max_length=10)
+    last_number = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('enrollment_year', 'department_code')
+
+    def __str__(self):
+        return f"{self.enrollment_year}-{self.department_code}: {self.last_number}"
+
+    @staticmethod
+    def format_student_id(enrollment_year, department_code, number):
+        return f"{enrollment_year}-{department_code}-{str(number).zfill(4)}"
+
+    @classmethod
+    def reserve(cls, enrollment_year, department_code, count=1):
+        """
+        Atomically reserve `count` consecutive numbers and return the first.
+        The increment is a single row UPDATE, so concurrent callers are
+        serialised on the counter row and never receive the same number.
+        """
+        key = {"enrollment_year": enrollment_year, "department_code": department_code}
+        using = router.db_for_write(cls)
+
+        with transaction.atomic(using=using):
+            last_number = cls._increment(using, key, count)
+
+            if last_number is None:
+                try:
+                    with transaction.atomic(using=using):
+                        last_number = cls._highest_issued(enrollment_year, department_code) + count
+                        cls.objects.using(using).create(last_number=last_number, **key)
+                except IntegrityError:
+                    # Another request created the counter first
+                    last_number = cls._increment(using, key, count)
+
+        return last_number - count + 1
+
+    @classmethod
+    def _increment(cls, using, key, count):
+        """Add `count` to the counter; its new value, or None when it does not exist."""
+        connection = connections[using]
+        if connection.features.can_return_columns_from_insert:
+            # UPDATE ... RETURNING (SQLite 3.35+, PostgreSQL): one statement
+            quote = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {quote(cls._meta.db_table)} "
+                    f"SET {quote('last_number')} = {quote('last_number')} + %s "
+                    f"WHERE {quote('enrollment_year')} = %s AND {quote('department_code')} = %s "
+                    f"RETURNING {quote('last_number')}",
+                    [count, key["enrollment_year"], key["department_code"]],
+                )
+                row = cursor.fetchone()
+            return row[0] if row else None
+
+        # Elsewhere the new value is read back inside the same transaction
+        counter = cls.objects.using(using).filter(**key)
+        if not counter.update(last_number=F("last_number") + count):
+            return None
+        return counter.values_list("last_number", flat=True).get()
+
+    @staticmethod
+    def _highest_issued(enrollment_year, department_code):
+        # One-off scan that seeds a new counter from IDs issued before it
+        # existed, on every shard and including soft-deleted students
+        prefix = f"{enrollment_year}-{department_code}-"
+        highest = 0
+        for alias in shard_aliases():
+            last_id = (
+                Student.all_objects.using(alias)
+                .filter(student_id__startswith=prefix)
+                .order_by(Length("student_id").desc(), "-student_id")
+                .values_list("student_id", flat=True)
+                .first()
+            )
+            if last_id:
+                highest = max(highest, int(last_id[len(prefix):]))
+        return highest
+
+class StudentSearchTerm(models.Model):
+    """
+    Lowercased student number, names, email and username of a student,
+    one row per term, for prefix search in the student directory. Rows
+    are maintained by accounts/search.py.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="search_terms")
+    department_id = models.PositiveIntegerField()
+    # Copy of Student.student_id: results are ordered and paged by it
+    student_number = models.CharField(max_length=20)
+    term = models.CharField(max_length=254)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'student_number']),
+            models.Index(fields=['department_id', 'term', 'student_number']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_number}: {self.term}"
+
+
+class StudentImport(models.Model):
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    )
+
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="Department the import is restricted to (department admins)"
+    )
+    source_file = models.FileField(upload_to='imports/')
+    error_file = models.FileField(upload_to='imports/errors/', null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import #{self.pk} ({self.get_status_display()})"
+
+
+class ApiToken(models.Model):
+    """
+    Bearer token of an external system calling the API. Only the SHA-256
+    digest of the key is stored; the key is shown once when created.
+    """
+    name = models.CharField(max_length=100)
+    key_digest = models.CharField(max_length=64, unique=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def digest(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, name, created_by=None):
+        """Create a token; returns (token, key)."""
+        key = secrets.token_urlsafe(32)
+        token = cls.objects.create(name=name, key_digest=cls.digest(key), created_by=created_by)
+        return token, key
+
+
+class QueuedEmail(models.Model):
+    STATUS_CHOICES = (
+        ('QUEUED', 'Queued'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    )
+
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+    recipient = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
 
     def __str__(self):
-        return self.student_id
\ No newline at end of file
+        return f"{self.recipient} - {self.subject}"
@@ -0,0 +1,131 @@
+"""
+Student directory search.
+
+Each student has a few StudentSearchTerm rows: the lowercased student
+number, first name, last name, full name, email and username. A query is
+normalised the same way and matched as a prefix with a range condition on
+the indexed `term` column (term >= q AND term < q + U+10FFFF), so finding
+a student is an index seek on any database. Results are ordered by student
+number and paged with a keyset cursor (the last number shown), never an
+offset.
+"""
+import re
+
+from django.db import transaction
+
+from config.sharding import shard_aliases
+from .models import Student, StudentSearchTerm, User
+
+TERM_END = "\U0010ffff"
+TERM_MAX_LENGTH = StudentSearchTerm._meta.get_field("term").max_length
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+def student_terms(student, user):
+    full_name = normalize(f"{user.first_name} {user.last_name}")
+    terms = {
+        normalize(student.student_id),
+        normalize(user.username),
+        normalize(user.email),
+        full_name,
+        *full_name.split(" "),
+    }
+    terms.discard("")
+    return {term[:TERM_MAX_LENGTH] for term in terms}
+
+
+def index_students(students, using):
+    """(Re)build the search terms of `students`, which all live on `using`."""
+    students = list(students)
+    if not students:
+        return
+
+    users = {s.user_id: s.user for s in students if Student.user.is_cached(s)}
+    missing = {s.user_id for s in students} - users.keys()
+    if missing:
+        users.update(User.objects.in_bulk(missing))
+
+    with transaction.atomic(using=using):
+        StudentSearchTerm.objects.using(using).filter(
+            student_id__in=[s.pk for s in students]
+        ).delete()
+        StudentSearchTerm.objects.using(using).bulk_create(
+            [
+                StudentSearchTerm(
+                    student_id=s.pk,
+                    department_id=s.department_id,
+                    student_number=s.student_id,
+                    term=term,
+                )
+                for s in students
+                if s.deleted_at is None and s.user_id in users
+                for term in student_terms(s, users[s.user_id])
+            ],
+            batch_size=1000,
+        )
+
+
+def rebuild_index(using, batch_size=1000):
+    """Recreate the terms of every student of one database; returns the count."""
+    StudentSearchTerm.objects.using(using).all().delete()
+
+    count = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            Student.objects.using(using).select_related("user")
+            .filter(pk__gt=last_pk).order_by("pk")[:batch_size]
+        )
+        if not batch:
+            return count
+        index_students(batch, using)
+        count += len(batch)
+        last_pk = batch[-1].pk
+
+
+def _search_alias(using, prefix, department_id, after, limit):
+    terms = StudentSearchTerm.objects.using(using).filter(
+        term__gte=prefix, term__lt=prefix + TERM_END
+    )
+    if department_id:
+        terms = terms.filter(department_id=department_id)
+    if after:
+        terms = terms.filter(student_number__gt=after)
+    return list(
+        terms.order_by("student_number")
+        .values_list("student_number", "student_id")
+        .distinct()[:limit]
+    )
+
+
+def search_students(query, department_id=None, after="", limit=25, aliases=None):
+    """
+    Students whose number, name, email or username starts with `query`,
+    ordered by student number and starting after `after`. Returns
+    (students, next_cursor); next_cursor is None on the last page.
+    """
+    prefix = normalize(query)
+    if not prefix:
+        return [], None
+
+    hits = []
+    for using in aliases or shard_aliases():
+        hits.extend(
+            (number, pk, using)
+            for number, pk in _search_alias(using, prefix, department_id, after, limit + 1)
+        )
+    hits.sort()
+    page = hits[:limit]
+    next_cursor = page[-1][0] if len(hits) > limit else None
+
+    loaded = {}
+    for using in {hit[2] for hit in page}:
+        loaded.update(
+            Student.objects.using(using)
+            .select_related("user", "department", "degree_program")
+            .in_bulk([pk for _, pk, alias in page if alias == using])
+        )
+    return [loaded[pk] for _, pk, _ in page if pk in loaded], next_cursor
@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+
+from academics.models import Department, DegreeProgram, Course
+from config.sharding import shard_aliases
+from .models import DepartmentAdmin, Student, User
+from .search import index_students
+from .stats import invalidate_dashboard_stats
+
+DASHBOARD_MODELS = (Student, User, DepartmentAdmin, Department, DegreeProgram, Course)
+
+for model in DASHBOARD_MODELS:
+    post_save.connect(
+        invalidate_dashboard_stats, sender=model,
+        dispatch_uid=f"dashboard_stats_save_{model._meta.label_lower}",
+    )
+    post_delete.connect(
+        invalidate_dashboard_stats, sender=model,
+        dispatch_uid=f"dashboard_stats_delete_{model._meta.label_lower}",
+    )
+
+
+SEARCH_USER_FIELDS = {"first_name", "last_name", "email", "username"}
+
+
+def index_student(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        index_students([instance], using)
+
+
+def reindex_student_user(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Logins only touch last_login; skip saves that change no searchable field
+    if raw or instance.role != "STUDENT":
+        return
+    if update_fields is not None and not SEARCH_USER_FIELDS & set(update_fields):
+        return
+    for alias in shard_aliases():
+        students = list(Student.objects.using(alias).filter(user_id=instance.pk))
+        if students:
+            students[0].user = instance
+            index_students(students, alias)
+            return
+
+
+post_save.connect(index_student, sender=Student, dispatch_uid="student_search_save")
+post_save.connect(reindex_student_user, sender=User, dispatch_uid="student_search_user_save")
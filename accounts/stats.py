@@ -0,0 +1,164 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, connections
+
+from academics.models import Department, DegreeProgram, Course
+from config.cache import bump_cache_version, cache_version
+from config.sharding import shard_aliases, shard_for_department_id, sharding_enabled
+from .models import Student, User
+
+VERSION_KEY = "dashboard_stats:version"
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _cache_key(*parts):
+    version = cache_version(VERSION_KEY)
+    return ":".join(["dashboard_stats", str(version)] + [str(p) for p in parts])
+
+
+def invalidate_dashboard_stats(**kwargs):
+    """
+    Bump the stats version so every cached dashboard is recomputed. Accepts
+    signal kwargs so it can be connected directly as a receiver.
+    """
+    bump_cache_version(VERSION_KEY)
+
+
+def _fetch_one(sql, params, using="default"):
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        return dict(zip(columns, cursor.fetchone()))
+
+
+def estimated_row_count(model):
+    """
+    Planner statistics row estimate (PostgreSQL reltuples, SQLite
+    sqlite_stat1 after ANALYZE). Returns None when no estimate exists.
+    """
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s", [table])
+            elif connection.vendor == "sqlite":
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+
+    if not row or row[0] is None:
+        return None
+    estimate = int(float(str(row[0]).split()[0]))
+    return estimate if estimate >= 0 else None
+
+
+def _apply_estimates(stats, totals):
+    threshold = settings.DASHBOARD_STATS_ESTIMATE_ABOVE
+    if not threshold:
+        return stats
+
+    for key, model in totals.items():
+        estimate = estimated_row_count(model)
+        if estimate is not None and estimate >= threshold:
+            stats[key] = estimate
+    return stats
+
+
+def super_admin_stats():
+    sql = f"""
+        SELECT
+            s.total_students,
+            s.active_students,
+            s.inactive_students,
+            (SELECT COUNT(*) FROM {_table(Department)}
+                WHERE deleted_at IS NULL) AS total_departments,
+            (SELECT COUNT(*) FROM {_table(DegreeProgram)}
+                WHERE deleted_at IS NULL) AS total_degree_programs,
+            (SELECT COUNT(*) FROM {_table(Course)}
+                WHERE deleted_at IS NULL) AS total_courses,
+            (SELECT COUNT(*) FROM {_table(User)}
+                WHERE role = %s AND is_active) AS department_admin_count
+        FROM (
+            SELECT
+                COUNT(*) AS total_students,
+                COUNT(CASE WHEN is_active THEN 1 END) AS active_students,
+                COUNT(CASE WHEN NOT is_active THEN 1 END) AS inactive_students
+            FROM {_table(Student)}
+            WHERE deleted_at IS NULL
+        ) s
+    """
+    stats = _fetch_one(sql, ["DEPARTMENT_ADMIN"])
+
+    if sharding_enabled():
+        shard_sql = f"""
+            SELECT
+                s.total_students,
+                s.active_students,
+                s.inactive_students,
+                (SELECT COUNT(*) FROM {_table(Course)}
+                    WHERE deleted_at IS NULL) AS total_courses
+            FROM (
+                SELECT
+                    COUNT(*) AS total_students,
+                    COUNT(CASE WHEN is_active THEN 1 END) AS active_students,
+                    COUNT(CASE WHEN NOT is_active THEN 1 END) AS inactive_students
+                FROM {_table(Student)}
+                WHERE deleted_at IS NULL
+            ) s
+        """
+        for alias in shard_aliases()[1:]:
+            for key, value in _fetch_one(shard_sql, [], using=alias).items():
+                stats[key] += value
+        return stats
+
+    return _apply_estimates(stats, {"total_students": Student, "total_courses": Course})
+
+
+def department_admin_stats(department_id):
+    sql = f"""
+        SELECT
+            s.total_students,
+            s.active_students,
+            s.inactive_students,
+            (SELECT COUNT(*) FROM {_table(DegreeProgram)}
+                WHERE department_id = %s AND deleted_at IS NULL) AS total_degree_programs,
+            (SELECT COUNT(*) FROM {_table(Course)}
+                WHERE department_id = %s AND deleted_at IS NULL) AS total_courses
+        FROM (
+            SELECT
+                COUNT(*) AS total_students,
+                COUNT(CASE WHEN is_active THEN 1 END) AS active_students,
+                COUNT(CASE WHEN NOT is_active THEN 1 END) AS inactive_students
+            FROM {_table(Student)}
+            WHERE department_id = %s AND deleted_at IS NULL
+        ) s
+    """
+    return _fetch_one(
+        sql,
+        [department_id, department_id, department_id],
+        using=shard_for_department_id(department_id),
+    )
+
+
+def get_dashboard_stats(role, department_id=None):
+    """
+    Cached dashboard counters for admins: one aggregate query per role,
+    invalidated by signals whenever a counted model changes.
+    """
+    key = _cache_key(role, department_id or "all")
+    stats = cache.get(key)
+
+    if stats is None:
+        if role == "SUPER_ADMIN":
+            stats = super_admin_stats()
+        else:
+            stats = department_admin_stats(department_id)
+        cache.set(key, stats, settings.DASHBOARD_STATS_TIMEOUT)
+
+    return stats
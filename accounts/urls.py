@@ -14,13 +14,19 @@ urlpatterns = [
 
 
     path("students/", views.student_list, name="student_list"),
+    path("students/search/", views.student_search, name="student_search"),
     path("students/add/", views.student_add, name="student_add"),
     path("students/<int:pk>/edit/", views.student_edit, name="student_edit"),
     path("students/<int:pk>/delete/", views.student_delete, name="student_delete"),
+    path("students/bulk/", views.student_bulk_action, name="student_bulk_action"),
+    path("students/import/", views.student_import, name="student_import"),
+    path("students/import/<int:pk>/", views.student_import_detail, name="student_import_detail"),
+    path("students/import/<int:pk>/progress/", views.student_import_progress, name="student_import_progress"),
     path("ajax/degree-programs/", views.get_degree_programs, name="get_degree_programs"),
 
     path("department-admins/", views.department_admin_list, name="department_admin_list"),
     path("department-admins/add/", views.department_admin_add, name="department_admin_add"),
     path("department-admins/<int:pk>/edit/", views.department_admin_edit, name="department_admin_edit"),
     path("department-admins/<int:pk>/delete/", views.department_admin_delete, name="department_admin_delete"),
+    path("department-admins/bulk/", views.department_admin_bulk_action, name="department_admin_bulk_action"),
 ]
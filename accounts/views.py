@@ -9,17 +9,37 @@ from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 from django.http import JsonResponse
+from enrollment.completion import invalidate_students_courses, student_degree_audit
 from enrollment.models import Enrollment
-from .models import Student, User, DepartmentAdmin
+from enrollment.slots import enrollment_opens_at, invalidate_enrollment_slots
+from .models import Student, User, DepartmentAdmin, StudentImport, StudentIdSequence
+from .emails import student_credentials_email
+from .importer import run_student_import
+from .search import search_students
+from .stats import get_dashboard_stats, invalidate_dashboard_stats
 from academics.models import Department, DegreeProgram, Course, Semester
+import os
 import random
+import threading
 from datetime import timedelta
 from django.urls import reverse
 from accounts.decorators import guest_only, student_required, super_admin_required, department_admin_required, admin_required
+from config.routers import read_from_replica
+from config.sharding import (
+    cross_shard_list,
+    cross_shard_querysets,
+    cross_shard_update,
+    shard_by_pk,
+    shard_for_department_id,
+    use_shard,
+)
 
 User = get_user_model()
 
+STUDENT_SEARCH_PAGE_SIZE = 25
+
 @login_required(login_url='login')
+@read_from_replica
 def dashboard(request):
     user = request.user
 
@@ -37,40 +57,14 @@ def dashboard(request):
 
     if user.role == "SUPER_ADMIN":
         # Super Admin sees everything
-        context["total_students"] = Student.objects.count()
-        context["total_departments"] = Department.objects.count()
-        context["total_degree_programs"] = DegreeProgram.objects.count()
-        context["total_courses"] = Course.objects.count()
-        context.update({
-            "department_admin_count": User.objects.filter(
-                role="DEPARTMENT_ADMIN",
-                is_active = True
-            ).count(),
-
-            "active_students": Student.objects.filter(is_active=True).count(),
-
-            "inactive_students": Student.objects.filter(is_active=False).count(),
-        })
+        context.update(get_dashboard_stats("SUPER_ADMIN"))
 
     elif user.role == "DEPARTMENT_ADMIN":
         # Department Admin sees only their department
         dept = user.departmentadmin.department
 
         context["department_name"] = dept.name
-        context["total_students"] = Student.objects.filter(department=dept).count()
-        context["total_degree_programs"] = DegreeProgram.objects.filter(department=dept).count()
-        context["total_courses"] = Course.objects.filter(department=dept).count()
-        context.update({
-            "active_students": Student.objects.filter(
-                department=dept,
-                is_active=True
-            ).count(),
-
-            "inactive_students": Student.objects.filter(
-                department=dept,
-                is_active=False
-            ).count(),
-        })
+        context.update(get_dashboard_stats("DEPARTMENT_ADMIN", dept.id))
 
     elif user.role == "STUDENT":
         student = user.student
@@ -118,8 +112,12 @@ def dashboard(request):
             "enrolled_courses_count": enrolled_courses_count,
             "current_credits": current_credits,
             "completed_credits": completed_credits,
+            "degree_audit": student_degree_audit(student),
         })
 
+        if active_semester and active_semester.enrollment_close_date >= timezone.now().date():
+            context["enrollment_opens_at"] = enrollment_opens_at(student, active_semester)
+
     return render(request, 'accounts/dashboard.html', context)
 
 @guest_only
@@ -224,26 +222,82 @@ def logout_view(request):
     return redirect('login')
 
 @admin_required
+@read_from_replica
 def student_list(request):
     user = request.user
+    query = request.GET.get("q", "").strip()
+
+    if query:
+        # Indexed prefix search, one keyset page at a time
+        students, next_cursor = search_students(
+            query,
+            **directory_search_scope(user),
+            after=request.GET.get("after", ""),
+            limit=STUDENT_SEARCH_PAGE_SIZE,
+        )
+        programs = DegreeProgram.objects.filter(is_active=True)
+        if user.role == "DEPARTMENT_ADMIN":
+            programs = programs.filter(department_id=user.departmentadmin.department_id)
+        return render(request, "accounts/student_list.html", {
+            "students": students,
+            "programs": programs.select_related("department").order_by("department__name", "name"),
+            "query": query,
+            "after": request.GET.get("after", ""),
+            "next_cursor": next_cursor,
+        })
 
     if user.role == "SUPER_ADMIN":
-        students = Student.objects.select_related(
-            "user", "department", "degree_program"
-        ).order_by("-created_at")
+        students = cross_shard_list(
+            Student.objects.select_related(
+                "user", "department", "degree_program"
+            ).order_by("-created_at")
+        )
+        programs = DegreeProgram.objects.filter(is_active=True)
 
     elif user.role == "DEPARTMENT_ADMIN":
         department = user.departmentadmin.department
         students = Student.objects.select_related(
             "user", "department", "degree_program"
         ).filter(department=department).order_by("-created_at")
+        programs = DegreeProgram.objects.filter(department=department, is_active=True)
 
     else:
         messages.error(request, "Access denied.")
         return redirect("dashboard")
 
     return render(request, "accounts/student_list.html", {
-        "students": students
+        "students": students,
+        "programs": programs.select_related("department").order_by("department__name", "name"),
+    })
+
+@admin_required
+@read_from_replica
+def student_search(request):
+    """
+    JSON directory search: ?q=<prefix>&after=<student id>. Matches the
+    student ID, first or last name, full name, email or username.
+    """
+    students, next_cursor = search_students(
+        request.GET.get("q", ""),
+        **directory_search_scope(request.user),
+        after=request.GET.get("after", ""),
+        limit=STUDENT_SEARCH_PAGE_SIZE,
+    )
+    return JsonResponse({
+        "next": next_cursor,
+        "results": [
+            {
+                "id": s.id,
+                "student_id": s.student_id,
+                "name": f"{s.user.first_name} {s.user.last_name}".strip(),
+                "email": s.user.email,
+                "username": s.user.username,
+                "department": s.department.code,
+                "degree_program": s.degree_program.name,
+                "is_active": s.is_active,
+            }
+            for s in students
+        ],
     })
 
 @admin_required
@@ -284,7 +338,6 @@ def student_add(request):
                 program_id = request.POST.get("degree_program")
                 department = Department.objects.get(id=department_id)
 
-                student_id = generate_student_id(department, enrollment_year)
                 otp = generate_otp()
 
                 if User.objects.filter(username=username).exists():
@@ -295,52 +348,50 @@ def student_add(request):
                     messages.error(request, "Email already exists")
                     return redirect("student_add")
 
-                password = get_random_string(10)
-
-                user_obj = User.objects.create_user(
-                    username=username,
-                    email=email,
-                    password=password,
-                    first_name=first_name,
-                    last_name=last_name,
-                    role="STUDENT",
-                    otp=otp,
-                    otp_expiry=timezone.now() + timedelta(minutes=30),
-                )
-
-                Student.objects.create(
-                    user=user_obj,
-                    student_id=student_id,
-                    department_id=department_id,
-                    degree_program_id=program_id,
-                    enrollment_year=enrollment_year,
-                )
-
-                verify_link = request.build_absolute_uri(
-                    reverse("verify_otp", args=[user_obj.id])
-                )
-
-                send_mail(
-                    subject="Student Account Credentials and Verification OTP",
-                    message=(
-                        f"Hello {first_name},\n\n"
-                        f"Your student account has been created successfully.\n\n"
-                        f"Student ID: {student_id}\n"
-                        f"Username: {username}\n"
-                        f"Email: {email}\n"
-                        f"Temporary Password: {password}\n"
-                        f"Your OTP: {otp}\n\n"
-                        f"Verify your account using the link below:\n\n"
-                        f"{verify_link}\n\n"
-                        f"OTP will expire in 30 minutes.\n\n"
-                        f"Regards,\nVIT - Course Enrollment Portal"
-                    ),
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[email],
-                )
-
-                messages.success(request, "Student added and email sent successfully")
-                return redirect("student_list")
+                # The student rows (and the user's mirror) are written to the
+                # department's shard: commit or roll back together with the user
+                alias = shard_for_department_id(department_id)
+                with transaction.atomic(using=alias):
+                    student_id = generate_student_id(department, enrollment_year)
+
+                    password = get_random_string(10)
+
+                    user_obj = User.objects.create_user(
+                        username=username,
+                        email=email,
+                        password=password,
+                        first_name=first_name,
+                        last_name=last_name,
+                        role="STUDENT",
+                        otp=otp,
+                        otp_expiry=timezone.now() + timedelta(minutes=30),
+                    )
+
+                    with use_shard(alias):
+                        Student.objects.create(
+                            user=user_obj,
+                            student_id=student_id,
+                            department_id=department_id,
+                            degree_program_id=program_id,
+                            enrollment_year=enrollment_year,
+                        )
+
+                    verify_link = request.build_absolute_uri(
+                        reverse("verify_otp", args=[user_obj.id])
+                    )
+
+                    subject, message = student_credentials_email(
+                        first_name, student_id, username, email, password, otp, verify_link
+                    )
+                    send_mail(
+                        subject=subject,
+                        message=message,
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        recipient_list=[email],
+                    )
+
+                    messages.success(request, "Student added and email sent successfully")
+                    return redirect("student_list")
 
         except Exception:
             messages.error(request, "Failed to add student")
@@ -358,6 +409,7 @@ def student_add(request):
     )
 
 @admin_required
+@shard_by_pk
 def student_edit(request, pk):
     user = request.user
     student = get_object_or_404(Student, pk=pk)
@@ -415,6 +467,7 @@ def student_edit(request, pk):
     )
 
 @admin_required
+@shard_by_pk
 def student_delete(request, pk):
     user = request.user
     student = get_object_or_404(Student, pk=pk)
@@ -424,28 +477,146 @@ def student_delete(request, pk):
             messages.error(request, "You are not allowed to delete this student.")
             return redirect("student_list")
 
-    student.user.delete()
+    student.soft_delete()
     messages.success(request, "Student deleted successfully")
     return redirect("student_list")
 
+@admin_required
+def student_bulk_action(request):
+    """
+    Apply one change to many students with a single UPDATE per database:
+    the selected rows, or a whole enrollment-year cohort.
+    """
+    if request.method != "POST":
+        return redirect("student_list")
+
+    user = request.user
+    action = request.POST.get("action")
+    student_ids = [int(pk) for pk in request.POST.getlist("student_ids") if pk.isdigit()]
+    cohort_year = request.POST.get("cohort_year", "").strip()
 
-def generate_student_id(department, enrollment_year):
-    prefix = f"{enrollment_year}-{department.code}-"
+    if not student_ids and not cohort_year.isdigit():
+        messages.error(request, "Select students or enter a cohort enrollment year.")
+        return redirect("student_list")
 
-    last_student = (
-        Student.objects
-        .filter(student_id__startswith=prefix)
-        .order_by("-student_id")
-        .first()
-    )
+    students = Student.objects.all()
+    if user.role == "DEPARTMENT_ADMIN":
+        students = students.filter(department_id=user.departmentadmin.department_id)
+
+    if action == "activate":
+        values, label = {"is_active": True}, "Activated"
+    elif action == "deactivate":
+        values, label = {"is_active": False}, "Deactivated"
+    elif action == "move_program":
+        program = DegreeProgram.objects.filter(
+            pk=request.POST.get("degree_program"), is_active=True
+        ).first()
+        if program is None or (
+            user.role == "DEPARTMENT_ADMIN"
+            and program.department_id != user.departmentadmin.department_id
+        ):
+            messages.error(request, "Select a degree program of your department.")
+            return redirect("student_list")
+        # Programs belong to a department, so only its students can move
+        students = students.filter(department_id=program.department_id)
+        values, label = {"degree_program_id": program.id}, f"Moved to {program.name}"
+    else:
+        messages.error(request, "Unknown bulk action.")
+        return redirect("student_list")
 
-    if last_student:
-        last_number = int(last_student.student_id[-4:])
-        next_number = last_number + 1
+    if student_ids:
+        querysets = cross_shard_querysets(students, pks=student_ids)
     else:
-        next_number = 1
+        querysets = cross_shard_querysets(students.filter(enrollment_year=int(cohort_year)))
+
+    # The UPDATE sends no post_save, so cached audits and slots are dropped here
+    affected = [pk for qs in querysets for pk in qs.values_list("pk", flat=True)]
+    updated = cross_shard_update(querysets, **values)
+    invalidate_dashboard_stats()
+    invalidate_students_courses(affected)
+    invalidate_enrollment_slots()
+
+    summary = f"{label}: {updated} student(s) updated."
+    skipped = len(set(student_ids)) - updated
+    if student_ids and skipped:
+        summary += f" {skipped} skipped (not found or outside the allowed department)."
+    messages.success(request, summary)
+    return redirect("student_list")
+
+@admin_required
+def student_import(request):
+    user = request.user
+
+    imports = StudentImport.objects.select_related("uploaded_by", "department")
+    if user.role == "DEPARTMENT_ADMIN":
+        imports = imports.filter(department=user.departmentadmin.department)
+
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+
+        if not upload:
+            messages.error(request, "Please choose a CSV or XLSX file.")
+            return redirect("student_import")
+
+        if os.path.splitext(upload.name)[1].lower() not in (".csv", ".xlsx"):
+            messages.error(request, "Only .csv and .xlsx files are supported.")
+            return redirect("student_import")
+
+        student_import = StudentImport.objects.create(
+            uploaded_by=user,
+            department=user.departmentadmin.department if user.role == "DEPARTMENT_ADMIN" else None,
+            source_file=upload,
+        )
+
+        # Runs outside the request; progress is polled from the detail page
+        threading.Thread(
+            target=run_student_import,
+            args=(student_import.id, request.build_absolute_uri("/")),
+            daemon=True,
+        ).start()
+
+        messages.success(request, "Import started. Credential emails will be queued as rows are created.")
+        return redirect("student_import_detail", pk=student_import.pk)
+
+    return render(request, "accounts/student_import.html", {
+        "imports": imports.order_by("-created_at")[:20],
+    })
 
-    return f"{prefix}{str(next_number).zfill(4)}"
+@admin_required
+def student_import_detail(request, pk):
+    student_import = get_object_or_404(StudentImport, pk=pk)
+
+    if request.user.role == "DEPARTMENT_ADMIN":
+        if student_import.department_id != request.user.departmentadmin.department_id:
+            messages.error(request, "You are not allowed to view this import.")
+            return redirect("student_import")
+
+    return render(request, "accounts/student_import_detail.html", {
+        "student_import": student_import,
+    })
+
+@admin_required
+def student_import_progress(request, pk):
+    student_import = get_object_or_404(StudentImport, pk=pk)
+
+    if request.user.role == "DEPARTMENT_ADMIN":
+        if student_import.department_id != request.user.departmentadmin.department_id:
+            return JsonResponse({"error": "Not allowed"}, status=403)
+
+    return JsonResponse({
+        "status": student_import.status,
+        "total_rows": student_import.total_rows,
+        "processed_rows": student_import.processed_rows,
+        "created_count": student_import.created_count,
+        "error_count": student_import.error_count,
+        "error_file": student_import.error_file.url if student_import.error_file else None,
+        "message": student_import.message,
+    })
+
+
+def generate_student_id(department, enrollment_year):
+    number = StudentIdSequence.reserve(enrollment_year, department.code)
+    return StudentIdSequence.format_student_id(enrollment_year, department.code, number)
 
 def get_degree_programs(request):
     department_id = request.GET.get("department_id")
@@ -616,6 +787,7 @@ def reset_password(request, user_id):
     return render(request, "accounts/reset_password.html", {"user": user})
 
 @super_admin_required
+@read_from_replica
 def department_admin_list(request):
     admins = (
         DepartmentAdmin.objects
@@ -626,7 +798,10 @@ def department_admin_list(request):
     return render(
         request,
         "accounts/department_admin_list.html",
-        {"admins": admins},
+        {
+            "admins": admins,
+            "departments": Department.objects.filter(is_active=True).order_by("name"),
+        },
     )
 
 @super_admin_required
@@ -738,3 +913,40 @@ def department_admin_delete(request, pk):
     admin.user.delete()
     messages.success(request, "Department admin deleted successfully")
     return redirect("department_admin_list")
+
+@super_admin_required
+def department_admin_bulk_action(request):
+    if request.method != "POST":
+        return redirect("department_admin_list")
+
+    admin_ids = [int(pk) for pk in request.POST.getlist("admin_ids") if pk.isdigit()]
+    department = Department.objects.filter(
+        pk=request.POST.get("department"), is_active=True
+    ).first()
+
+    if not admin_ids:
+        messages.error(request, "Select at least one department admin.")
+        return redirect("department_admin_list")
+    if department is None:
+        messages.error(request, "Select the department to reassign them to.")
+        return redirect("department_admin_list")
+
+    with transaction.atomic():
+        updated = DepartmentAdmin.objects.filter(pk__in=admin_ids).update(
+            department=department
+        )
+    invalidate_dashboard_stats()
+
+    messages.success(request, f"{updated} department admin(s) reassigned to {department.name}.")
+    return redirect("department_admin_list")
+
+
+def directory_search_scope(user):
+    """search_students() arguments limiting department admins to their department."""
+    if user.role != "DEPARTMENT_ADMIN":
+        return {}
+    department_id = user.departmentadmin.department_id
+    return {
+        "department_id": department_id,
+        "aliases": [shard_for_department_id(department_id)],
+    }
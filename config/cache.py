@@ -0,0 +1,36 @@
+"""
+Versioned cache keys.
+
+Cached values embed the current value of a version key in their own key.
+Bumping the version invalidates all of them at once, without having to
+know or delete them. Version keys never expire.
+
+A missing version (never set, or evicted) is seeded from the clock rather
+than a fixed number, so it never comes back to a value that old cached
+entries were stored under.
+
+Invalidation only reaches other processes when they share the cache
+backend (Redis, Memcached, database). With the per-process
+LocMemCache, a bump is seen by its own process only; every other
+process keeps serving its entries until their timeout, so the timeouts
+are then the only bound on staleness.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def cache_version(key):
+    version = cache.get(key)
+    if version is None:
+        seed = time.time_ns()
+        cache.add(key, seed, None)
+        version = cache.get(key, seed)
+    return version
+
+
+def bump_cache_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
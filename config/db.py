@@ -0,0 +1,132 @@
+"""
+Database connection helpers shared by settings and the write paths.
+
+`sqlite_database()` builds a DATABASES entry with the SQLite concurrency
+settings (WAL, synchronous=NORMAL, busy_timeout, mmap) and persistent
+connections; every value can be overridden from the environment.
+`retry_on_lock` re-runs a write transaction with jittered backoff when
+SQLite reports the database as locked. `read_snapshot` holds a read-only
+transaction for long exports.
+"""
+import functools
+import os
+import random
+import time
+from contextlib import contextmanager
+
+from django.db import OperationalError, connections, transaction
+
+from config.sharding import active_shard
+
+LOCK_ERROR_MESSAGES = ("database is locked", "database table is locked", "database is busy")
+
+
+def _env(name, default, cast=str):
+    value = os.environ.get(name)
+    return default if value in (None, "") else cast(value)
+
+
+def sqlite_pragmas(journal_mode=None, synchronous=None, busy_timeout_ms=None, mmap_size=None):
+    journal_mode = journal_mode or _env("SQLITE_JOURNAL_MODE", "WAL")
+    synchronous = synchronous or _env("SQLITE_SYNCHRONOUS", "NORMAL")
+    busy_timeout_ms = busy_timeout_ms if busy_timeout_ms is not None else _env("SQLITE_BUSY_TIMEOUT_MS", 5000, int)
+    mmap_size = mmap_size if mmap_size is not None else _env("SQLITE_MMAP_SIZE", 256 * 1024 * 1024, int)
+
+    return [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={busy_timeout_ms}",
+        f"PRAGMA mmap_size={mmap_size}",
+    ]
+
+
+def sqlite_database(name, conn_max_age=None, **pragma_overrides):
+    busy_timeout_ms = pragma_overrides.get("busy_timeout_ms")
+    if busy_timeout_ms is None:
+        busy_timeout_ms = _env("SQLITE_BUSY_TIMEOUT_MS", 5000, int)
+
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+        "CONN_MAX_AGE": conn_max_age if conn_max_age is not None else _env("DB_CONN_MAX_AGE", 600, int),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "timeout": busy_timeout_ms / 1000,
+            # Take the write lock at BEGIN so busy_timeout applies instead of
+            # failing immediately when a read transaction tries to upgrade.
+            "transaction_mode": "IMMEDIATE",
+            "init_command": "; ".join(sqlite_pragmas(**pragma_overrides)),
+        },
+    }
+
+
+def is_lock_error(exc):
+    message = str(exc).lower()
+    return any(text in message for text in LOCK_ERROR_MESSAGES)
+
+
+def lock_backoff_delay(attempt, base_delay, max_delay):
+    # "Full jitter": spread retries over [0, base * 2^attempt]
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def retry_on_lock(func=None, *, using=None, attempts=None, base_delay=None, max_delay=None):
+    """
+    Run `func` in transaction.atomic() and retry it when the database is
+    locked. Nested calls inside an outer atomic block are not retried, since
+    only the outermost transaction can be rolled back and re-run.
+    """
+    from django.conf import settings
+
+    attempts = attempts or settings.DB_LOCK_RETRY_ATTEMPTS
+    base_delay = base_delay or settings.DB_LOCK_RETRY_BASE_DELAY
+    max_delay = max_delay or settings.DB_LOCK_RETRY_MAX_DELAY
+
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(*args, **kwargs):
+            # Writes of a department-scoped request go to its shard
+            alias = using or active_shard() or "default"
+            connection = connections[alias]
+            for attempt in range(attempts):
+                try:
+                    with transaction.atomic(using=alias):
+                        return view_func(*args, **kwargs)
+                except OperationalError as exc:
+                    if (
+                        not is_lock_error(exc)
+                        or connection.in_atomic_block
+                        or attempt == attempts - 1
+                    ):
+                        raise
+                    time.sleep(lock_backoff_delay(attempt, base_delay, max_delay))
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+@contextmanager
+def read_snapshot(using="default"):
+    """
+    Run the queries inside on `using` against one consistent snapshot.
+
+    transaction.atomic() would BEGIN IMMEDIATE and hold the write lock for
+    the whole export. A deferred transaction only reads, and under WAL
+    writers keep committing while it stays open. Must not be nested in an
+    atomic block.
+    """
+    connection = connections[using]
+    if connection.in_atomic_block:
+        raise RuntimeError("read_snapshot() cannot run inside an atomic block.")
+
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute("BEGIN DEFERRED")
+    try:
+        yield connection
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("COMMIT")
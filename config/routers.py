@@ -0,0 +1,179 @@
+"""
+Database routers.
+
+DepartmentShardRouter (see config/sharding.py) places department data in
+per-department databases when DEPARTMENT_SHARDS is configured.
+
+PrimaryReplicaRouter sends reads to the "replica" alias only while a view
+decorated with @read_from_replica is running, and only when that alias is
+configured. Writes, migrations and every undecorated view (including the
+enrollment critical path) stay on "default". After a user writes, the
+ReplicaStickinessMiddleware cookie pins their reads to the primary for
+REPLICA_STICKY_SECONDS so they always see their own changes.
+"""
+import functools
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from config.sharding import (
+    active_shard,
+    is_sharded,
+    shard_for_department_id,
+    shard_for_pk,
+    sharding_enabled,
+)
+
+REPLICA_ALIAS = "replica"
+STICKY_COOKIE = "db_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Apps whose reads may be served by the replica; sessions, auth and
+# contenttypes always read from the primary.
+REPLICA_APP_LABELS = {"academics", "accounts", "enrollment"}
+
+_reading_from_replica = ContextVar("reading_from_replica", default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def is_sticky(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_from_replica(view_func):
+    """
+    View hint: serve this read-only view from the replica unless the user
+    wrote recently or the request itself is a write.
+    """
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if (
+            not replica_configured()
+            or request.method not in SAFE_METHODS
+            or is_sticky(request)
+        ):
+            return view_func(request, *args, **kwargs)
+
+        token = _reading_from_replica.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _reading_from_replica.reset(token)
+
+    return wrapper
+
+
+class ReplicaStickinessMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if request.method not in SAFE_METHODS and replica_configured():
+            until = time.time() + settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE,
+                f"{until:.0f}",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            _reading_from_replica.get()
+            and model._meta.app_label in REPLICA_APP_LABELS
+            and replica_configured()
+            # The replica only copies "default"; shards are read directly
+            and not (sharding_enabled() and is_sharded(model))
+        ):
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the primary, so objects from either
+        # alias may be related.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is populated by copying the primary, never migrated.
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+class DepartmentShardRouter:
+    def _shard_for_instance(self, model, instance):
+        label = model._meta.label_lower
+        if label in ("academics.course", "accounts.student", "academics.programrequirement"):
+            if instance.department_id:
+                return shard_for_department_id(instance.department_id)
+        elif label in ("academics.courseoffering", "enrollment.archivedcourseoffering"):
+            if instance.course_id:
+                return shard_for_pk(instance.course_id)
+        elif label in (
+            "academics.courserequisite",
+            "academics.courseprerequisiteclosure",
+            "academics.requirementcourse",
+        ):
+            if instance.course_id:
+                return shard_for_pk(instance.course_id)
+        elif label in ("academics.coursesection", "academics.meetingtime"):
+            if instance.course_offering_id:
+                return shard_for_pk(instance.course_offering_id)
+        elif label in (
+            "enrollment.enrollment",
+            "enrollment.archivedenrollment",
+            "enrollment.coursepreference",
+            "enrollment.enrollmenthold",
+            "accounts.studentsearchterm",
+        ):
+            if instance.student_id:
+                return shard_for_pk(instance.student_id)
+        return None
+
+    def db_for_read(self, model, **hints):
+        if not sharding_enabled():
+            return None
+
+        if not is_sharded(model):
+            # Shard copies of reference data only back foreign keys; reads
+            # (and therefore saves/deletes of what was read) use the original.
+            return "default"
+
+        instance = hints.get("instance")
+        if instance is not None and is_sharded(type(instance)) and instance._state.db:
+            # Related lookups stay on the shard the instance came from
+            return instance._state.db
+        return active_shard()
+
+    def db_for_write(self, model, **hints):
+        if not sharding_enabled() or not is_sharded(model):
+            return None
+
+        instance = hints.get("instance")
+        if isinstance(instance, model):
+            alias = self._shard_for_instance(model, instance)
+            if alias:
+                return alias
+        return active_shard()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Reference rows are mirrored into every shard
+        if sharding_enabled():
+            return True
+        return None
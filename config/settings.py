@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from django.contrib.messages import constants as messages
+from config.db import sqlite_database
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -52,6 +54,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'config.routers.ReplicaStickinessMiddleware',
+    'config.sharding.DepartmentShardMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -78,13 +82,41 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# SQLite runs in WAL mode with a busy timeout and persistent connections;
+# see config/db.py for the SQLITE_* / DB_CONN_MAX_AGE environment overrides.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': sqlite_database(BASE_DIR / 'db.sqlite3'),
 }
 
+# Optional read replica for list, dashboard and report views. Locally it is a
+# second SQLite file refreshed by `manage.py sync_replica`.
+if os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = sqlite_database(os.environ['DB_REPLICA_NAME'])
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+# Optional department sharding: DB_DEPARTMENT_SHARDS="CS:/data/cs.sqlite3,EE:/data/ee.sqlite3"
+# gives each listed department code its own database. Keep the order stable;
+# it determines each shard's id range (see config/sharding.py).
+DEPARTMENT_SHARDS = {}
+for entry in filter(None, os.environ.get('DB_DEPARTMENT_SHARDS', '').split(',')):
+    code, path = entry.split(':', 1)
+    alias = f'shard_{code.strip().lower()}'
+    DATABASES[alias] = sqlite_database(path.strip())
+    DEPARTMENT_SHARDS[code.strip().upper()] = alias
+
+DATABASE_ROUTERS = [
+    'config.routers.PrimaryReplicaRouter',
+    'config.routers.DepartmentShardRouter',
+]
+
+# Reads stay on the primary this long after a user's last write
+REPLICA_STICKY_SECONDS = 10
+
+# Jittered retry for write transactions that hit "database is locked"
+DB_LOCK_RETRY_ATTEMPTS = 5
+DB_LOCK_RETRY_BASE_DELAY = 0.05
+DB_LOCK_RETRY_MAX_DELAY = 1.0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -148,4 +180,51 @@ MESSAGE_TAGS = {
 }
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Bulk student import
+STUDENT_IMPORT_CHUNK_SIZE = 500
+STUDENT_IMPORT_HASH_WORKERS = None  # None = one worker per CPU
+# PBKDF2 iterations for imported temporary passwords (None = hasher default).
+# Lowering it is what makes 10k-row imports fit in a minute on few cores.
+STUDENT_IMPORT_PASSWORD_ITERATIONS = None
+
+# Outgoing mail queue (see `manage.py send_queued_emails`)
+QUEUED_EMAIL_MAX_ATTEMPTS = 3
+
+# Use a shared backend (Redis, Memcached) with more than one process:
+# versioned keys are only invalidated across processes that share the
+# cache, see config/cache.py
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Admin dashboard counters
+DASHBOARD_STATS_TIMEOUT = 300
+# Use planner row estimates for totals on tables larger than this (None = exact)
+DASHBOARD_STATS_ESTIMATE_ABOVE = None
+
+# Cached per-student enrollment slot and current enrollment semester
+ENROLLMENT_SLOT_CACHE_TIMEOUT = 600
+# Cached completed-course set per student (prerequisite checks)
+COMPLETED_COURSES_CACHE_TIMEOUT = 3600
+# Cached degree audit per student
+DEGREE_AUDIT_CACHE_TIMEOUT = 3600
+
+# Background reports (see enrollment/reports.py)
+REPORT_WORKERS = None  # None = one worker per CPU
+# Days a generated report stays downloadable (see `manage.py expire_reports`)
+REPORT_RETENTION_DAYS = 7
+
+# Parquet analytics snapshot (see `manage.py export_snapshot`)
+ANALYTICS_SNAPSHOT_DIR = BASE_DIR / 'analytics'
+ANALYTICS_SNAPSHOT_CHUNK_SIZE = 50000
+
+# Change feed API (see enrollment/changefeed.py)
+CHANGE_FEED_PAGE_SIZE = 1000
+CHANGE_FEED_MAX_PAGE_SIZE = 10000
+
+# Bulk enrollment sync API: operations per transaction (see enrollment/sync.py)
+ENROLLMENT_SYNC_CHUNK_SIZE = 500
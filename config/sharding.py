@@ -0,0 +1,284 @@
+"""
+Optional department sharding.
+
+With DEPARTMENT_SHARDS configured, Course, CourseOffering, Student and
+Enrollment rows of a department live in that department's database alias;
+departments without a dedicated shard, and all shared reference data
+(departments, programs, semesters, users, ...), stay on "default".
+Reference rows are mirrored into every shard so foreign keys hold there.
+
+Each shard allocates primary keys from its own range (SHARD_ID_RANGE wide,
+set up by `manage.py init_shards`), so the shard of any sharded row can be
+derived from its id alone.
+"""
+import functools
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import cmp_to_key
+
+from django.conf import settings
+from django.db import transaction
+
+SHARD_ID_RANGE = 10 ** 12
+
+SHARDED_MODELS = {
+    "academics.course",
+    "academics.courseoffering",
+    "academics.coursesection",
+    "academics.meetingtime",
+    "academics.courserequisite",
+    "academics.courseprerequisiteclosure",
+    "academics.programrequirement",
+    "academics.requirementcourse",
+    "accounts.student",
+    "accounts.studentsearchterm",
+    "enrollment.enrollment",
+    "enrollment.archivedcourseoffering",
+    "enrollment.archivedenrollment",
+    "enrollment.coursepreference",
+    "enrollment.enrollmenthold",
+    "enrollment.changetombstone",
+}
+
+# Shared data copied into every shard (order matters for foreign keys)
+REFERENCE_MODELS = (
+    "academics.department",
+    "academics.degreeprogram",
+    "academics.semester",
+    "accounts.user",
+)
+
+_active_shard = ContextVar("active_shard", default=None)
+_department_codes = {}
+
+
+def sharding_enabled():
+    return bool(settings.DEPARTMENT_SHARDS)
+
+
+def shard_aliases():
+    """All aliases holding sharded data, "default" first."""
+    return ["default"] + list(settings.DEPARTMENT_SHARDS.values())
+
+
+def shard_for_department_code(code):
+    return settings.DEPARTMENT_SHARDS.get((code or "").upper(), "default")
+
+
+def shard_for_department_id(department_id):
+    if not sharding_enabled():
+        return "default"
+
+    department_id = int(department_id)
+    if department_id not in _department_codes:
+        from academics.models import Department
+
+        _department_codes.clear()
+        _department_codes.update(
+            Department.objects.using("default").values_list("id", "code")
+        )
+    return shard_for_department_code(_department_codes.get(department_id))
+
+
+def forget_department_codes(**kwargs):
+    _department_codes.clear()
+
+
+def shard_for_pk(pk):
+    index = int(pk) // SHARD_ID_RANGE
+    aliases = shard_aliases()
+    return aliases[index] if index < len(aliases) else "default"
+
+
+def shard_id_start(alias):
+    return shard_aliases().index(alias) * SHARD_ID_RANGE
+
+
+def is_sharded(model):
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+def active_shard():
+    return _active_shard.get()
+
+
+@contextmanager
+def use_shard(alias):
+    token = _active_shard.set(alias)
+    try:
+        yield alias
+    finally:
+        _active_shard.reset(token)
+
+
+def shard_by_pk(view_func):
+    """
+    For views addressing one sharded row by id (edit/delete/detail): route
+    the whole view to the shard owning that id.
+    """
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        pk = kwargs.get("pk") or kwargs.get("student_id")
+        if not sharding_enabled() or pk is None:
+            return view_func(request, *args, **kwargs)
+        with use_shard(shard_for_pk(pk)):
+            return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+def resolve_user_shard(request):
+    """
+    Shard holding the data of a department admin's or student's department.
+    Students are located once per session by probing the shards.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return None
+
+    if user.role == "DEPARTMENT_ADMIN":
+        from accounts.models import DepartmentAdmin
+
+        department_id = (
+            DepartmentAdmin.objects.using("default")
+            .filter(user_id=user.id)
+            .values_list("department_id", flat=True)
+            .first()
+        )
+        return shard_for_department_id(department_id) if department_id else None
+
+    if user.role == "STUDENT":
+        alias = request.session.get("department_shard")
+        if alias in shard_aliases():
+            return alias
+
+        from accounts.models import Student
+
+        for alias in shard_aliases():
+            if Student.objects.using(alias).filter(user_id=user.id).exists():
+                request.session["department_shard"] = alias
+                return alias
+    return None
+
+
+class DepartmentShardMiddleware:
+    """Route department-scoped requests to the user's department shard."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not sharding_enabled():
+            return self.get_response(request)
+
+        alias = resolve_user_shard(request)
+        if alias is None:
+            return self.get_response(request)
+
+        with use_shard(alias):
+            return self.get_response(request)
+
+
+def _ordering_key(ordering):
+    def value(obj, field):
+        for part in field.split("__"):
+            obj = getattr(obj, part)
+        return obj
+
+    def compare(a, b):
+        for field in ordering:
+            descending = field.startswith("-")
+            name = field.lstrip("-")
+            left, right = value(a, name), value(b, name)
+            if left == right:
+                continue
+            result = -1 if left < right else 1
+            return -result if descending else result
+        return 0
+
+    return cmp_to_key(compare)
+
+
+def cross_shard_list(queryset):
+    """
+    Evaluate a queryset on every shard and merge the rows, keeping the
+    queryset's ordering. Used by super-admin views spanning departments.
+    """
+    if not sharding_enabled():
+        return list(queryset)
+
+    rows = []
+    for alias in shard_aliases():
+        rows.extend(queryset.using(alias))
+
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    if ordering:
+        rows.sort(key=_ordering_key(ordering))
+    return rows
+
+
+def cross_shard_count(queryset):
+    if not sharding_enabled():
+        return queryset.count()
+    return sum(queryset.using(alias).count() for alias in shard_aliases())
+
+
+def cross_shard_querysets(queryset, pks=None):
+    """
+    Split a queryset of a sharded model into one queryset per shard,
+    limited to `pks` (and to the shards owning them) when given.
+    """
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    if not sharding_enabled():
+        return [queryset.using("default")]
+    if pks is None:
+        return [queryset.using(alias) for alias in shard_aliases()]
+
+    by_shard = {}
+    for pk in pks:
+        by_shard.setdefault(shard_for_pk(pk), []).append(pk)
+    return [queryset.using(alias).filter(pk__in=ids) for alias, ids in by_shard.items()]
+
+
+def cross_shard_update(querysets, **values):
+    """
+    Apply one UPDATE per queryset, all inside a transaction on each of the
+    databases involved. Returns the number of rows updated.
+    """
+    with ExitStack() as stack:
+        for alias in dict.fromkeys(qs.db for qs in querysets):
+            stack.enter_context(transaction.atomic(using=alias))
+        return sum(qs.update(**values) for qs in querysets)
+
+
+def mirror_reference_rows(model, objs):
+    """Copy reference rows (keeping their ids) into every shard."""
+    if not sharding_enabled():
+        return
+
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    for alias in shard_aliases()[1:]:
+        manager = model._base_manager.using(alias)
+        existing = set(
+            manager.filter(pk__in=[obj.pk for obj in objs]).values_list("pk", flat=True)
+        )
+        missing = []
+        for obj in objs:
+            values = {f.attname: getattr(obj, f.attname) for f in fields}
+            if obj.pk in existing:
+                manager.filter(pk=obj.pk).update(**values)
+            else:
+                missing.append(model(pk=obj.pk, **values))
+        manager.bulk_create(missing, batch_size=500)
+
+
+def mirror_reference_save(sender, instance, using, raw=False, **kwargs):
+    if using == "default" and not raw:
+        mirror_reference_rows(sender, [instance])
+
+
+def mirror_reference_delete(sender, instance, using, **kwargs):
+    if using == "default" and sharding_enabled():
+        for alias in shard_aliases()[1:]:
+            sender._base_manager.using(alias).filter(pk=instance.pk).delete()
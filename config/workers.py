@@ -0,0 +1,27 @@
+"""
+Process pools for CPU-bound work started from a web process.
+
+Workers are spawned, not forked: reports and imports run on a thread of
+the web process, and a fork copies locks held by its other threads (and
+their open database connections) into the workers. A spawned worker
+starts from scratch and sets Django up before its first task. This
+module imports no models, so the worker can load it before that.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def worker_pool(max_workers=None):
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
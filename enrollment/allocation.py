@@ -0,0 +1,454 @@
+"""
+Preference lottery: assign seats from ranked course preferences.
+
+Every student gets a random priority drawn from a seeded generator. Seats
+are then handed out round by round: in round r each student's r-th choice
+is considered, and within each offering the applicants with the best
+priority win the remaining seats, provided the course still fits in their
+credit limit and does not clash with a course they already got. Each round is a handful of NumPy array operations, so the
+run time depends on the number of preferences, not on students x courses.
+
+A course may be ranked together with its corequisite. When the lottery
+grants the course but not the corequisite, that preference is dropped and
+the lottery runs again with the same priorities, until every granted
+course has its corequisites.
+
+Requires NumPy.
+"""
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from academics.models import CourseOffering, CourseRequisite, CourseSection, MeetingTime
+from accounts.models import Student
+from .completion import course_bit, invalidate_students_courses
+from .models import (
+    AllocationRun, ArchivedEnrollment, CoursePreference, Enrollment, EnrollmentHold,
+)
+from .timetable import Timetable
+
+
+def allocate(pref_student, pref_offering, pref_rank, capacity, credits, credit_room, seed,
+             clashes=None):
+    """
+    Vectorized allocation over index arrays.
+
+    pref_student / pref_offering / pref_rank: one entry per preference, the
+    student and offering as 0-based indexes.
+    capacity: free seats per offering. credits: credit points per offering.
+    credit_room: credits each student may still take.
+    clashes: optional (n, 2) array of offering index pairs, in both orders,
+    whose meetings overlap; a student is granted at most one of each pair.
+
+    Returns (boolean mask of granted preferences, student priorities).
+    """
+    rng = np.random.default_rng(seed)
+    n_students = len(credit_room)
+    # Lower value = earlier pick
+    priority = rng.permutation(n_students)
+
+    capacity = np.asarray(capacity, dtype=np.int64).copy()
+    credits = np.asarray(credits, dtype=np.int64)
+    room = np.asarray(credit_room, dtype=np.int64).copy()
+    granted = np.zeros(len(pref_student), dtype=bool)
+
+    # Preferences ruled out by a clash with an offering already granted
+    blocked = np.zeros(len(pref_student), dtype=bool)
+    clash_start = None
+    if clashes is not None and len(clashes):
+        clashes = np.asarray(clashes, dtype=np.int64)
+        clashes = clashes[np.argsort(clashes[:, 0], kind="stable")]
+        clash_start = np.searchsorted(clashes[:, 0], np.arange(len(capacity) + 1))
+        # Preferences by (student, offering) key, to find the blocked ones
+        pref_key = pref_student * len(capacity) + pref_offering
+        key_order = np.argsort(pref_key)
+        sorted_keys = pref_key[key_order]
+
+    for rank in np.unique(pref_rank):
+        candidates = np.flatnonzero(
+            (pref_rank == rank) & (credits[pref_offering] <= room[pref_student]) & ~blocked
+        )
+        if not len(candidates):
+            continue
+
+        offering = pref_offering[candidates]
+        order = np.lexsort((priority[pref_student[candidates]], offering))
+        candidates, offering = candidates[order], offering[order]
+
+        # Position of every applicant within its offering's queue
+        starts = np.flatnonzero(np.r_[True, offering[1:] != offering[:-1]])
+        group_sizes = np.diff(np.r_[starts, len(offering)])
+        position = np.arange(len(offering)) - np.repeat(starts, group_sizes)
+
+        winners = candidates[position < capacity[offering]]
+        granted[winners] = True
+
+        capacity -= np.bincount(pref_offering[winners], minlength=len(capacity))
+        room -= np.bincount(
+            pref_student[winners],
+            weights=credits[pref_offering[winners]],
+            minlength=n_students,
+        ).astype(np.int64)
+
+        if clash_start is not None:
+            # Block every offering that clashes with one just granted
+            won = pref_offering[winners]
+            counts = clash_start[won + 1] - clash_start[won]
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            others = clashes[np.repeat(clash_start[won], counts) + offsets, 1]
+            keys = np.repeat(pref_student[winners], counts) * len(capacity) + others
+            found = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+            blocked[key_order[found[sorted_keys[found] == keys]]] = True
+
+    return granted, priority
+
+
+def fairness_metrics(pref_student, pref_rank, granted, priority, n_students):
+    """Summary numbers stored with every run for audits."""
+    applicants = np.unique(pref_student)
+    seats = np.bincount(pref_student[granted], minlength=n_students)[applicants]
+    first_choice = np.zeros(n_students, dtype=bool)
+    first_choice[pref_student[granted & (pref_rank == 1)]] = True
+
+    # Gini coefficient of seats per applicant (0 = perfectly even)
+    sorted_seats = np.sort(seats)
+    total = sorted_seats.sum()
+    if total:
+        cumulative = np.cumsum(sorted_seats)
+        gini = float((len(seats) + 1 - 2 * cumulative.sum() / total) / len(seats))
+    else:
+        gini = 0.0
+
+    # Seats per applicant by lottery priority decile: flat means luck of
+    # the draw did not decide who got courses
+    deciles = np.minimum(priority[applicants] * 10 // max(n_students, 1), 9)
+    by_decile = [
+        round(float(seats[deciles == d].mean()), 3) if np.any(deciles == d) else None
+        for d in range(10)
+    ]
+
+    return {
+        "applicants": int(len(applicants)),
+        "preferences": int(len(pref_student)),
+        "seats_assigned": int(granted.sum()),
+        "applicants_with_seat": round(float(np.mean(seats > 0)), 4) if len(seats) else 0,
+        "first_choice_rate": round(float(first_choice[applicants].mean()), 4) if len(seats) else 0,
+        "mean_granted_rank": round(float(pref_rank[granted].mean()), 3) if granted.any() else None,
+        "seats_gini": round(gini, 4),
+        "seats_by_priority_decile": by_decile,
+    }
+
+
+class PreferenceAllocator:
+    """Load one database's preferences for a semester, allocate, write."""
+
+    def __init__(self, semester, using="default", seed=None):
+        self.semester = semester
+        self.using = using
+        self.seed = seed if seed is not None else int(time.time_ns() % 2 ** 62)
+
+    def load(self):
+        prefs = np.array(
+            list(
+                CoursePreference.objects.using(self.using)
+                .filter(
+                    course_offering__semester=self.semester,
+                    course_offering__is_active=True,
+                    student__is_active=True,
+                )
+                .exclude(
+                    # Existing rows for the same course are never overwritten
+                    student__enrollment__course_offering=F("course_offering"),
+                )
+                .exclude(
+                    student__in=EnrollmentHold.objects.using(self.using)
+                    .filter(released_at__isnull=True)
+                    .values("student_id")
+                )
+                .order_by("student_id", "rank")
+                .values_list("student_id", "course_offering_id", "rank")
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        meetings = self._meetings()
+        prefs = prefs[self._requisites_met(prefs) & self._fits_timetable(prefs, meetings)]
+
+        self.student_ids, pref_student = np.unique(prefs[:, 0], return_inverse=True)
+        self.offering_ids, pref_offering = np.unique(prefs[:, 1], return_inverse=True)
+        self.pref_student = pref_student
+        self.pref_offering = pref_offering
+        self.pref_rank = prefs[:, 2]
+        self.clashes = self._clash_pairs(meetings)
+
+        offerings = {
+            row["id"]: row
+            for row in CourseOffering.with_seats(CourseOffering.objects.using(self.using))
+            .filter(id__in=self.offering_ids.tolist())
+            .values("id", "seats_taken", "seat_capacity", "course__credit_points")
+        }
+        self.capacity = np.array(
+            [max(offerings[o]["seat_capacity"] - offerings[o]["seats_taken"], 0)
+             for o in self.offering_ids],
+            dtype=np.int64,
+        )
+        self.credits = np.array(
+            [offerings[o]["course__credit_points"] for o in self.offering_ids], dtype=np.int64
+        )
+
+        limits = dict(
+            Student.objects.using(self.using)
+            .filter(id__in=self.student_ids.tolist())
+            .values_list("id", "degree_program__max_credits_per_semester")
+        )
+        taken = dict(
+            Enrollment.objects.using(self.using)
+            .filter(
+                student_id__in=self.student_ids.tolist(),
+                course_offering__semester=self.semester,
+                status="ENROLLED",
+            )
+            .values("student_id")
+            .annotate(total=Sum("course_offering__course__credit_points"))
+            .values_list("student_id", "total")
+        )
+        self.credit_room = np.array(
+            [limits[s] - (taken.get(s) or 0) for s in self.student_ids], dtype=np.int64
+        )
+
+    def _applicants(self):
+        return CoursePreference.objects.using(self.using).filter(
+            course_offering__semester=self.semester
+        ).values("student_id")
+
+    def _meetings(self):
+        """Offering id -> [(day, start, end)] for the semester."""
+        meetings = defaultdict(list)
+        for offering_id, day, start, end in MeetingTime.objects.using(self.using).filter(
+            course_offering__semester=self.semester
+        ).values_list("course_offering_id", "day", "start_time", "end_time"):
+            meetings[offering_id].append((day, start, end))
+        return meetings
+
+    def _fits_timetable(self, prefs, meetings):
+        """Mask of the preferences that do not clash with the student's current timetable."""
+        enrolled = defaultdict(list)
+        for student_id, day, start, end in MeetingTime.objects.using(self.using).filter(
+            course_offering__semester=self.semester,
+            course_offering__enrollment__student_id__in=self._applicants(),
+            course_offering__enrollment__status="ENROLLED",
+            course_offering__enrollment__deleted_at__isnull=True,
+        ).values_list(
+            "course_offering__enrollment__student_id", "day", "start_time", "end_time"
+        ):
+            enrolled[student_id].append((day, start, end, None))
+        timetables = {student_id: Timetable(rows) for student_id, rows in enrolled.items()}
+
+        return np.array([
+            student_id not in timetables or not any(
+                timetables[student_id].clashes(*meeting) for meeting in meetings[offering_id]
+            )
+            for student_id, offering_id, _ in prefs.tolist()
+        ], dtype=bool)
+
+    def _clash_pairs(self, meetings):
+        """Index pairs, in both orders, of the ranked offerings that meet at the same time."""
+        offering_ids = self.offering_ids.tolist()
+        index = Timetable(
+            (day, start, end, i)
+            for i, offering_id in enumerate(offering_ids)
+            for day, start, end in meetings[offering_id]
+        )
+        pairs = {
+            (i, other)
+            for i, offering_id in enumerate(offering_ids)
+            for day, start, end in meetings[offering_id]
+            for other in index.clashes(day, start, end)
+            if other != i
+        }
+        return np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+
+    def _requisites_met(self, prefs):
+        """
+        Mask of the preferences whose prerequisites the student completed
+        and whose corequisites are completed, enrolled or ranked too: the
+        rules applied when the preferences were saved, checked again in
+        case requisites changed since.
+        """
+        self.course_of = course_of = dict(
+            CourseOffering.all_objects.using(self.using)
+            .filter(semester=self.semester)
+            .values_list("id", "course_id")
+        )
+        self.corequisites = {}
+        self.requisites_taken = defaultdict(int)
+        masks = {}
+        for course_id, requires_id, kind in CourseRequisite.objects.using(self.using).filter(
+            course_id__in=set(course_of.values()),
+            requires__deleted_at__isnull=True,
+        ).values_list("course_id", "requires_id", "kind"):
+            pre, co = masks.get(course_id, (0, 0))
+            if kind == "PRE":
+                pre |= course_bit(requires_id)
+            else:
+                co |= course_bit(requires_id)
+            masks[course_id] = (pre, co)
+        self.corequisites = {course_id: co for course_id, (_, co) in masks.items() if co}
+        if not masks:
+            return np.ones(len(prefs), dtype=bool)
+
+        applicants = self._applicants()
+        completed = defaultdict(int)
+        for model in (Enrollment, ArchivedEnrollment):
+            for student_id, course_id in model.objects.using(self.using).filter(
+                student_id__in=applicants,
+                status="ENROLLED",
+                course_offering__semester__end_date__lt=timezone.localdate(),
+            ).values_list("student_id", "course_offering__course_id"):
+                completed[student_id] |= course_bit(course_id)
+
+        current = defaultdict(int)
+        for student_id, course_id in Enrollment.objects.using(self.using).filter(
+            student_id__in=applicants,
+            status="ENROLLED",
+            course_offering__semester=self.semester,
+        ).values_list("student_id", "course_offering__course_id"):
+            current[student_id] |= course_bit(course_id)
+        for student_id in set(completed) | set(current):
+            self.requisites_taken[student_id] = completed[student_id] | current[student_id]
+        for student_id, offering_id, _ in prefs.tolist():
+            current[student_id] |= course_bit(course_of[offering_id])
+
+        keep = []
+        for student_id, offering_id, _ in prefs.tolist():
+            pre, co = masks.get(course_of[offering_id], (0, 0))
+            keep.append(
+                not pre & ~completed[student_id]
+                and not co & ~(completed[student_id] | current[student_id])
+            )
+        return np.array(keep, dtype=bool)
+
+    def _corequisites_unmet(self, granted):
+        """
+        Mask of the granted preferences with a corequisite that the student
+        neither completed, nor is enrolled in, nor was granted.
+        """
+        unmet = np.zeros(len(granted), dtype=bool)
+        if not self.corequisites:
+            return unmet
+        winners = np.flatnonzero(granted).tolist()
+        students = self.student_ids[self.pref_student].tolist()
+        courses = [self.course_of[o] for o in self.offering_ids[self.pref_offering].tolist()]
+
+        have = defaultdict(int, self.requisites_taken)
+        for i in winners:
+            have[students[i]] |= course_bit(courses[i])
+        for i in winners:
+            if self.corequisites.get(courses[i], 0) & ~have[students[i]]:
+                unmet[i] = True
+        return unmet
+
+    def run(self, dry_run=False):
+        self.load()
+        started = time.perf_counter()
+        # Drop granted preferences whose corequisite was not granted and
+        # allocate again; the active set only shrinks, so this terminates
+        active = np.ones(len(self.pref_student), dtype=bool)
+        while True:
+            granted = np.zeros(len(active), dtype=bool)
+            granted[active], priority = allocate(
+                self.pref_student[active], self.pref_offering[active], self.pref_rank[active],
+                self.capacity, self.credits, self.credit_room, self.seed,
+                clashes=self.clashes,
+            )
+            unmet = self._corequisites_unmet(granted)
+            if not unmet.any():
+                break
+            active &= ~unmet
+        elapsed = time.perf_counter() - started
+
+        metrics = fairness_metrics(
+            self.pref_student, self.pref_rank, granted, priority, len(self.student_ids)
+        )
+        metrics["allocation_seconds"] = round(elapsed, 3)
+
+        if not dry_run and len(self.pref_student):
+            self.write(granted, metrics)
+        return metrics
+
+    def write(self, granted, metrics):
+        granted_offerings = self.pref_offering[granted]
+        per_offering = np.bincount(granted_offerings, minlength=len(self.offering_ids))
+        # Granted students grouped by offering, in offering index order
+        order = np.argsort(granted_offerings, kind="stable")
+        students_by_offering = np.split(
+            self.student_ids[self.pref_student[granted]][order], np.cumsum(per_offering)[:-1]
+        )
+
+        with transaction.atomic(using=self.using):
+            sectioned = set(
+                CourseSection.objects.using(self.using)
+                .filter(course_offering_id__in=self.offering_ids.tolist())
+                .values_list("course_offering_id", flat=True)
+            )
+            rows = []
+            for index, offering_id in enumerate(self.offering_ids.tolist()):
+                count = int(per_offering[index])
+                if not count:
+                    continue
+                if offering_id in sectioned:
+                    sections = CourseSection.assign_seats(offering_id, count, using=self.using)
+                else:
+                    sections = [None] * count
+                    CourseOffering.objects.using(self.using).filter(pk=offering_id).update(
+                        current_enrollment=F("current_enrollment") + count
+                    )
+                rows.extend(
+                    Enrollment(
+                        student_id=student_id,
+                        course_offering_id=offering_id,
+                        section_id=section_id,
+                        status="ENROLLED",
+                    )
+                    for student_id, section_id in zip(
+                        students_by_offering[index].tolist(), sections
+                    )
+                )
+
+            Enrollment.objects.using(self.using).bulk_create(rows, batch_size=1000)
+            invalidate_students_courses(row.student_id for row in rows)
+            AllocationRun.objects.create(
+                semester=self.semester,
+                database=self.using,
+                seed=self.seed,
+                assigned_count=len(rows),
+                metrics=metrics,
+            )
+
+
+def synthetic_preferences(n_students, n_offerings, ranks=5, seed=0):
+    """
+    Random preference arrays shaped like a real term, for benchmarking
+    `allocate()` without a database: popularity is skewed so that some
+    offerings are heavily oversubscribed.
+    """
+    rng = np.random.default_rng(seed)
+    popularity = rng.zipf(1.5, n_offerings).astype(float)
+    popularity /= popularity.sum()
+
+    ranks = min(ranks, n_offerings)
+    choices = np.array([
+        rng.choice(n_offerings, size=ranks, replace=False, p=popularity)
+        for _ in range(n_students)
+    ])
+    pref_student = np.repeat(np.arange(n_students), ranks)
+    pref_offering = choices.ravel()
+    pref_rank = np.tile(np.arange(1, ranks + 1), n_students)
+
+    capacity = rng.integers(20, 120, n_offerings)
+    credits = rng.choice([3, 6, 9], n_offerings)
+    credit_room = np.full(n_students, 18)
+    return pref_student, pref_offering, pref_rank, capacity, credits, credit_room
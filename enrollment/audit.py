@@ -0,0 +1,257 @@
+"""
+Degree audit: progress of students against their program's requirements.
+
+A program asks for `credits_required` credits in total, every course of
+its REQUIRED groups and `credits_required` credits from each ELECTIVE
+pool, within `duration_years` of the student's enrollment year. Courses
+of ended semesters count as completed, courses of running or upcoming
+semesters as in progress, and a course taken twice counts once.
+
+`audit_students` evaluates a whole cohort together. Enrollment rows are
+loaded per table (live and archived) and reduced with NumPy: repeated
+courses are removed with one sort, the course -> requirement join is a
+searchsorted over the sorted requirement courses, and per-student and
+per-requirement totals are bincounts. Audits are cached per student under
+the completed-courses version (bumped on every enrollment change) and a
+global version bumped when requirements change.
+
+Requires NumPy.
+"""
+from collections import namedtuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from academics.models import DegreeProgram, ProgramRequirement, RequirementCourse
+from config.cache import cache_version
+from config.sharding import SHARD_ID_RANGE
+from .completion import REQUIREMENTS_VERSION_KEY, _version_key as _courses_version_key
+from .models import ArchivedEnrollment, Enrollment
+
+# Students per enrollment query
+CHUNK_SIZE = 2000
+
+RequirementProgress = namedtuple(
+    "RequirementProgress", "name kind needed earned in_progress missing met"
+)
+Audit = namedtuple(
+    "Audit",
+    "credits_required credits_earned credits_in_progress expected_credits "
+    "graduation_year requirements complete on_track",
+)
+
+
+def _expand(starts, counts):
+    """
+    For groups given as (start, count) ranges, return the group of every
+    element and its position: ([0, 0, 1], [s0, s0 + 1, s1]) for counts [2, 1].
+    """
+    owner = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, np.repeat(starts, counts) + offsets
+
+
+def _lookup(keys, values, wanted):
+    """values[i] where keys[i] == wanted, else 0; `keys` is sorted."""
+    if not len(keys):
+        return np.zeros(len(wanted), dtype=np.int64)
+    position = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+    return np.where(keys[position] == wanted, values[position], 0).astype(np.int64)
+
+
+def _load_taken(student_ids, using, today):
+    """
+    One entry per (student, course) the students are or were enrolled in:
+    (student index, course id, credits, completed).
+    """
+    rows = []
+    for start in range(0, len(student_ids), CHUNK_SIZE):
+        chunk = student_ids[start:start + CHUNK_SIZE].tolist()
+        for model in (Enrollment, ArchivedEnrollment):
+            rows.extend(
+                model.objects.using(using).filter(
+                    student_id__in=chunk, status="ENROLLED"
+                ).values_list(
+                    "student_id",
+                    "course_offering__course_id",
+                    "course_offering__course__credit_points",
+                    "course_offering__semester__end_date",
+                )
+            )
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, np.zeros(0, dtype=bool)
+
+    student, course, credits, end_date = zip(*rows)
+    student = np.searchsorted(student_ids, np.array(student, dtype=np.int64))
+    course = np.array(course, dtype=np.int64)
+    credits = np.array(credits, dtype=np.int64)
+    completed = np.array(end_date, dtype="datetime64[D]") < np.datetime64(today)
+
+    # Keep one row per (student, course), a completed one when there is one
+    order = np.lexsort((~completed, course, student))
+    student, course, credits, completed = (
+        student[order], course[order], credits[order], completed[order]
+    )
+    first = np.r_[True, (student[1:] != student[:-1]) | (course[1:] != course[:-1])]
+    return student[first], course[first], credits[first], completed[first]
+
+
+def _evaluate(students, today):
+    using = students[0]._state.db
+    students = sorted(students, key=lambda s: s.pk)
+    student_ids = np.array([s.pk for s in students], dtype=np.int64)
+    n_students = len(students)
+
+    programs = DegreeProgram.all_objects.in_bulk({s.degree_program_id for s in students})
+    requirements = list(
+        ProgramRequirement.objects.using(using)
+        .filter(degree_program_id__in=programs)
+        .order_by("degree_program_id", "pk")
+    )
+    n_requirements = len(requirements)
+    req_index = {r.pk: i for i, r in enumerate(requirements)}
+    req_program = np.array([r.degree_program_id for r in requirements], dtype=np.int64)
+    req_required = np.array([r.kind == "REQUIRED" for r in requirements], dtype=bool)
+
+    members = sorted(
+        (course_id, req_index[requirement_id], code)
+        for requirement_id, course_id, code in RequirementCourse.objects.using(using)
+        .filter(requirement__in=requirements)
+        .values_list("requirement_id", "course_id", "course__course_code")
+    )
+    member_course = np.array([m[0] for m in members], dtype=np.int64)
+    member_req = np.array([m[1] for m in members], dtype=np.int64)
+    member_code = [m[2] for m in members]
+    req_needed = np.where(
+        req_required,
+        np.bincount(member_req, minlength=n_requirements),
+        [r.credits_required for r in requirements],
+    ).astype(np.int64)
+
+    # Per-student totals
+    student, course, credits, completed = _load_taken(student_ids, using, today)
+    earned = np.bincount(student, weights=credits * completed, minlength=n_students)
+    in_progress = np.bincount(student, weights=credits * ~completed, minlength=n_students)
+
+    student_program = np.array([s.degree_program_id for s in students], dtype=np.int64)
+    program_credits = np.array(
+        [programs[s.degree_program_id].credits_required for s in students], dtype=np.int64
+    )
+    duration = np.array(
+        [max(programs[s.degree_program_id].duration_years, 1) for s in students], dtype=np.int64
+    )
+    enrollment_year = np.array([s.enrollment_year for s in students], dtype=np.int64)
+    years_elapsed = np.clip(today.year - enrollment_year, 0, duration)
+    expected = program_credits * years_elapsed // duration
+
+    # Join taken courses to the requirements listing them, within the
+    # student's own program
+    lo = np.searchsorted(member_course, course, "left")
+    hi = np.searchsorted(member_course, course, "right")
+    taken, member = _expand(lo, hi - lo)
+    req = member_req[member]
+    own = req_program[req] == student_program[student[taken]]
+    taken, req = taken[own], req[own]
+    weight = np.where(req_required[req], 1, credits[taken])
+    pair_key = student[taken] * n_requirements + req
+    pair_keys, inverse = np.unique(pair_key, return_inverse=True)
+    pair_done = np.bincount(inverse, weights=weight * completed[taken], minlength=len(pair_keys))
+    pair_open = np.bincount(inverse, weights=weight * ~completed[taken], minlength=len(pair_keys))
+
+    # Every (student, requirement of their program), and its progress
+    program_start = np.searchsorted(req_program, student_program, "left")
+    program_count = np.searchsorted(req_program, student_program, "right") - program_start
+    row_student, row_req = _expand(program_start, program_count)
+    row_key = row_student * n_requirements + row_req
+    row_done = _lookup(pair_keys, pair_done, row_key)
+    row_open = _lookup(pair_keys, pair_open, row_key)
+    row_met = row_done >= req_needed[row_req]
+    unmet = np.bincount(row_student, weights=~row_met, minlength=n_students)
+
+    # Courses still missing from unmet required groups
+    done_keys = student[completed] * SHARD_ID_RANGE + course[completed] % SHARD_ID_RANGE
+    open_rows = np.flatnonzero(~row_met & req_required[row_req])
+    missing = {}
+    if len(open_rows):
+        by_req = np.argsort(member_req, kind="stable")
+        req_start = np.searchsorted(member_req[by_req], row_req[open_rows], "left")
+        req_count = np.searchsorted(member_req[by_req], row_req[open_rows], "right") - req_start
+        owner, position = _expand(req_start, req_count)
+        candidate = by_req[position]
+        candidate_student = row_student[open_rows][owner]
+        not_done = ~np.isin(
+            candidate_student * SHARD_ID_RANGE + member_course[candidate] % SHARD_ID_RANGE,
+            done_keys,
+        )
+        for row, index in zip(open_rows[owner][not_done].tolist(), candidate[not_done].tolist()):
+            missing.setdefault(row, []).append(member_code[index])
+
+    audits = {}
+    row = 0
+    for i, s in enumerate(students):
+        progress = []
+        for _ in range(program_count[i]):
+            r = requirements[row_req[row]]
+            progress.append(RequirementProgress(
+                name=r.name,
+                kind=r.kind,
+                needed=int(req_needed[row_req[row]]),
+                earned=int(row_done[row]),
+                in_progress=int(row_open[row]),
+                missing=sorted(missing.get(row, [])),
+                met=bool(row_met[row]),
+            ))
+            row += 1
+        audits[s.pk] = Audit(
+            credits_required=int(program_credits[i]),
+            credits_earned=int(earned[i]),
+            credits_in_progress=int(in_progress[i]),
+            expected_credits=int(expected[i]),
+            graduation_year=int(enrollment_year[i] + duration[i]),
+            requirements=progress,
+            complete=bool(earned[i] >= program_credits[i] and not unmet[i]),
+            on_track=bool(earned[i] + in_progress[i] >= expected[i]),
+        )
+    return audits
+
+
+def audit_students(students, today=None):
+    """
+    Audit every student of `students` (all from one database). Returns a
+    dict student id -> Audit; cached audits are reused.
+    """
+    students = list(students)
+    if not students:
+        return {}
+    today = today or timezone.localdate()
+
+    version_keys = {s.pk: _courses_version_key(s.pk) for s in students}
+    versions = cache.get_many(list(version_keys.values()))
+    requirements_version = cache_version(REQUIREMENTS_VERSION_KEY)
+    keys = {
+        s.pk: (
+            f"degree_audit:{s.pk}:"
+            f"{versions.get(version_keys[s.pk]) or cache_version(version_keys[s.pk])}:"
+            f"{requirements_version}:{today.isoformat()}"
+        )
+        for s in students
+    }
+
+    cached = cache.get_many(list(keys.values()))
+    audits = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    stale = [s for s in students if s.pk not in audits]
+    if stale:
+        computed = _evaluate(stale, today)
+        cache.set_many(
+            {keys[pk]: audit for pk, audit in computed.items()},
+            settings.DEGREE_AUDIT_CACHE_TIMEOUT,
+        )
+        audits.update(computed)
+    return audits
+
+
+def degree_audit(student, today=None):
+    return audit_students([student], today)[student.pk]
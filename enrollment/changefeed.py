@@ -0,0 +1,126 @@
+"""
+Change feed for external systems that keep a copy of students, offerings
+and enrollments.
+
+Each insert or update of those rows stamps `change_seq` with the next
+value of the database's ChangeSequence counter. Each delete leaves a
+ChangeTombstone. Database triggers do the stamping (enrollment migration
+0009), so bulk_create() and queryset.update() are covered as well as
+save(). SQLite runs one write transaction at a time and the counter
+moves inside it, so sequence numbers commit in order. A reader that has
+seen every change up to N will never later find a new one at or below N.
+
+Each database keeps its own counter. A cursor is therefore one position
+per alias, in shard_aliases() order, joined with dots ("120.45"). A page
+reads each database inside one `read_snapshot` and returns its changes in
+sequence order. A sync costs in proportion to the changes, not to the
+size of the tables.
+"""
+import heapq
+from itertools import islice
+
+from accounts.models import Student
+from academics.models import CourseOffering
+from config.db import read_snapshot
+from config.sharding import shard_aliases
+from .models import ChangeTombstone, Enrollment
+
+# kind -> (manager, output field -> lookup)
+FEEDS = {
+    "student": (Student.all_objects, {
+        "id": "id",
+        "student_id": "student_id",
+        "first_name": "user__first_name",
+        "last_name": "user__last_name",
+        "email": "user__email",
+        "department_id": "department_id",
+        "degree_program_id": "degree_program_id",
+        "enrollment_year": "enrollment_year",
+        "is_active": "is_active",
+        "deleted_at": "deleted_at",
+    }),
+    "offering": (CourseOffering.all_objects, {
+        "id": "id",
+        "course_id": "course_id",
+        "course_code": "course__course_code",
+        "semester_id": "semester_id",
+        "current_enrollment": "current_enrollment",
+        "is_active": "is_active",
+        "deleted_at": "deleted_at",
+    }),
+    "enrollment": (Enrollment.all_objects, {
+        "id": "id",
+        "student_id": "student_id",
+        "course_offering_id": "course_offering_id",
+        "section_id": "section_id",
+        "status": "status",
+        "enrolled_at": "enrolled_at",
+        "updated_at": "updated_at",
+        "deleted_at": "deleted_at",
+    }),
+}
+
+
+def parse_cursor(cursor):
+    """alias -> last seen change_seq; raises ValueError for a malformed cursor."""
+    aliases = shard_aliases()
+    positions = dict.fromkeys(aliases, 0)
+    if cursor:
+        parts = cursor.split(".")
+        if len(parts) > len(aliases) or not all(part.isdigit() for part in parts):
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        positions.update(zip(aliases, map(int, parts)))
+    return positions
+
+
+def format_cursor(positions):
+    return ".".join(str(positions[alias]) for alias in shard_aliases())
+
+
+def _changes(alias, position, kinds, limit):
+    """Up to `limit` changes of one database after `position`, in sequence order."""
+    streams = []
+    for kind in kinds:
+        manager, fields = FEEDS[kind]
+        rows = manager.using(alias).filter(change_seq__gt=position).order_by(
+            "change_seq"
+        ).values_list("change_seq", *fields.values())[:limit]
+        streams.append([(row[0], kind, "upsert", dict(zip(fields, row[1:]))) for row in rows])
+
+    tombstones = ChangeTombstone.objects.using(alias).filter(
+        change_seq__gt=position, kind__in=kinds
+    ).order_by("change_seq").values_list("change_seq", "kind", "object_id")[:limit]
+    streams.append([(seq, kind, "delete", {"id": object_id}) for seq, kind, object_id in tombstones])
+
+    # Sequence numbers are unique per database, so the payloads are never compared
+    return list(islice(heapq.merge(*streams), limit))
+
+
+def iter_changes(positions, kinds, limit):
+    """
+    Yield up to `limit` changes after `positions` (see parse_cursor), then
+    a final {"cursor", "has_more"} record with the cursor of the next page.
+    """
+    positions = dict(positions)
+    remaining = limit
+    has_more = False
+
+    for alias in shard_aliases():
+        if remaining <= 0:
+            has_more = True
+            break
+
+        # One more than the budget tells whether this database has more
+        with read_snapshot(alias):
+            changes = _changes(alias, positions[alias], kinds, remaining + 1)
+        if len(changes) > remaining:
+            has_more = True
+            changes = changes[:remaining]
+
+        for seq, kind, op, data in changes:
+            yield {"seq": seq, "database": alias, "kind": kind, "op": op, "data": data}
+        if changes:
+            positions[alias] = changes[-1][0]
+        remaining -= len(changes)
+
+    yield {"cursor": format_cursor(positions), "has_more": has_more}
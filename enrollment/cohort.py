@@ -0,0 +1,182 @@
+from collections import Counter, defaultdict
+
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from academics.models import CourseOffering, CourseSection
+from accounts.models import Student
+from config.db import retry_on_lock
+from .completion import invalidate_students_courses
+from .models import Enrollment, EnrollmentHold
+
+
+class CohortEnrollment:
+    """
+    Enroll a cohort (degree program + enrollment year) into a list of
+    offerings. Credit totals, existing enrollments and remaining seats are
+    read with one query each for the whole cohort; `plan()` decides per
+    student without writing, `apply()` writes the plan in bulk.
+    """
+
+    def __init__(self, program, enrollment_year, semester, offering_ids):
+        self.program = program
+        self.enrollment_year = enrollment_year
+        self.semester = semester
+        self.offering_ids = offering_ids
+
+    def plan(self, for_update=False):
+        students = list(
+            Student.objects.filter(
+                degree_program=self.program,
+                enrollment_year=self.enrollment_year,
+                is_active=True,
+            ).order_by("student_id").values("id", "student_id")
+        )
+
+        offerings = CourseOffering.with_seats(CourseOffering.objects.select_related("course")).filter(
+            id__in=self.offering_ids,
+            semester=self.semester,
+            is_active=True,
+            course__department_id=self.program.department_id,
+        ).order_by("course__course_code")
+        if for_update:
+            offerings = offerings.select_for_update()
+        offerings = list(offerings)
+
+        student_ids = [s["id"] for s in students]
+        credits = dict(
+            Enrollment.objects.filter(
+                student_id__in=student_ids,
+                course_offering__semester=self.semester,
+                status="ENROLLED",
+            )
+            .values("student_id")
+            .annotate(total=Sum("course_offering__course__credit_points"))
+            .values_list("student_id", "total")
+        )
+        existing = {
+            (student_id, offering_id): (pk, status)
+            for pk, student_id, offering_id, status in Enrollment.objects.filter(
+                student_id__in=student_ids,
+                course_offering__in=offerings,
+            ).values_list("id", "student_id", "course_offering_id", "status")
+        }
+
+        held = set(
+            EnrollmentHold.objects.filter(
+                student_id__in=student_ids, released_at__isnull=True
+            ).values_list("student_id", flat=True)
+        )
+
+        seats = {o.id: o.seat_capacity - o.seats_taken for o in offerings}
+        max_credits = self.program.max_credits_per_semester
+
+        accepted = defaultdict(list)   # offering id -> student ids
+        reenrolled = defaultdict(list) # offering id -> DROPPED enrollments to revive
+        outcomes = {o.id: Counter() for o in offerings}
+        rejections = []
+
+        for student in students:
+            total = credits.get(student["id"]) or 0
+            for offering in offerings:
+                previous = existing.get((student["id"], offering.id))
+                if previous and previous[1] == "ENROLLED":
+                    reason = "already enrolled"
+                elif student["id"] in held:
+                    reason = "enrollment hold"
+                elif total + offering.course.credit_points > max_credits:
+                    reason = "credit limit"
+                elif seats[offering.id] <= 0:
+                    reason = "capacity"
+                else:
+                    reason = None
+
+                if reason:
+                    outcomes[offering.id][reason] += 1
+                    rejections.append((student["student_id"], offering, reason))
+                    continue
+
+                total += offering.course.credit_points
+                seats[offering.id] -= 1
+                outcomes[offering.id]["enrolled"] += 1
+                if previous:
+                    reenrolled[offering.id].append(previous[0])
+                else:
+                    accepted[offering.id].append(student["id"])
+
+        return {
+            "students": len(students),
+            "offerings": [
+                {
+                    "offering": offering,
+                    "enrolled": outcomes[offering.id]["enrolled"],
+                    "already_enrolled": outcomes[offering.id]["already enrolled"],
+                    "credit_limit": outcomes[offering.id]["credit limit"],
+                    "capacity": outcomes[offering.id]["capacity"],
+                    "seats_left": seats[offering.id],
+                }
+                for offering in offerings
+            ],
+            "enrolled": sum(o["enrolled"] for o in outcomes.values()),
+            "rejections": rejections,
+            "new": accepted,
+            "reenrolled": reenrolled,
+        }
+
+    def apply(self):
+        return _apply_cohort_plan(self)
+
+
+@retry_on_lock
+def _apply_cohort_plan(cohort):
+    # Planned again inside the write transaction so the checks see the
+    # same rows the writes are based on
+    report = cohort.plan(for_update=True)
+
+    sectioned = set(
+        CourseSection.objects.filter(
+            course_offering__in=[row["offering"] for row in report["offerings"]]
+        ).values_list("course_offering_id", flat=True)
+    )
+
+    new_rows = []
+    for row in report["offerings"]:
+        offering_id = row["offering"].pk
+        if not row["enrolled"]:
+            continue
+
+        revived = report["reenrolled"][offering_id]
+        if offering_id in sectioned:
+            # One UPDATE per section instead of one per seat
+            sections = CourseSection.assign_seats(offering_id, row["enrolled"])
+        else:
+            sections = [None] * row["enrolled"]
+            CourseOffering.objects.filter(pk=offering_id).update(
+                current_enrollment=F("current_enrollment") + row["enrolled"]
+            )
+
+        by_section = defaultdict(list)
+        for enrollment_id, section_id in zip(revived, sections):
+            by_section[section_id].append(enrollment_id)
+        for section_id, enrollment_ids in by_section.items():
+            Enrollment.objects.filter(pk__in=enrollment_ids).update(
+                status="ENROLLED", section_id=section_id, updated_at=timezone.now()
+            )
+        new_rows.extend(
+            Enrollment(
+                student_id=student_id,
+                course_offering_id=offering_id,
+                section_id=section_id,
+                status="ENROLLED",
+            )
+            for student_id, section_id in zip(report["new"][offering_id], sections[len(revived):])
+        )
+
+    Enrollment.objects.bulk_create(new_rows, batch_size=500)
+
+    revived_ids = [pk for ids in report["reenrolled"].values() for pk in ids]
+    invalidate_students_courses(
+        [row.student_id for row in new_rows]
+        + list(Enrollment.objects.filter(pk__in=revived_ids).values_list("student_id", flat=True))
+    )
+    return report
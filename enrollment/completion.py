@@ -0,0 +1,91 @@
+"""
+Completed courses of a student as a bitset.
+
+A course counts as completed when the student was enrolled in it, and
+not dropped, in a semester that has ended. Live and archived
+enrollments both count. The set is a Python int in which bit
+`course_bit(course_id)` is set for every completed course. Requirement
+checks are then a mask operation, with no query per course. The set is
+cached per student and day. Saving one of the student's enrollments
+bumps its version; bulk writes call invalidate_students_courses().
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from config.cache import bump_cache_version, cache_version
+from config.sharding import SHARD_ID_RANGE
+from .models import ArchivedEnrollment, Enrollment
+
+
+def course_bit(course_id):
+    # Ids are compact within a database (shards start at a multiple of
+    # SHARD_ID_RANGE), so the offset keeps the integers small
+    return 1 << (course_id % SHARD_ID_RANGE)
+
+
+def courses_mask(course_ids):
+    mask = 0
+    for course_id in course_ids:
+        mask |= course_bit(course_id)
+    return mask
+
+
+# Degree requirements, part of every cached degree audit (see audit.py)
+REQUIREMENTS_VERSION_KEY = "degree_audit:requirements_version"
+
+
+def _version_key(student_id):
+    return f"completed_courses:version:{student_id}"
+
+
+def invalidate_completed_courses(sender, instance, **kwargs):
+    bump_cache_version(_version_key(instance.student_id))
+
+
+def invalidate_student_audit(sender, instance, **kwargs):
+    # A student's program and enrollment year are part of their degree audit
+    bump_cache_version(_version_key(instance.pk))
+
+
+def invalidate_students_courses(student_ids):
+    """For bulk writes, which send no post_save."""
+    for student_id in set(student_ids):
+        bump_cache_version(_version_key(student_id))
+
+
+def invalidate_degree_audits(**kwargs):
+    bump_cache_version(REQUIREMENTS_VERSION_KEY)
+
+
+def completed_courses(student, today=None):
+    today = today or timezone.localdate()
+    key = (
+        f"completed_courses:{student.pk}:"
+        f"{cache_version(_version_key(student.pk))}:{today.isoformat()}"
+    )
+    mask = cache.get(key)
+    if mask is not None:
+        return mask
+
+    mask = 0
+    for model in (Enrollment, ArchivedEnrollment):
+        mask |= courses_mask(
+            model.objects.filter(
+                student=student,
+                status="ENROLLED",
+                course_offering__semester__end_date__lt=today,
+            ).values_list("course_offering__course_id", flat=True)
+        )
+
+    cache.set(key, mask, settings.COMPLETED_COURSES_CACHE_TIMEOUT)
+    return mask
+
+
+def student_degree_audit(student):
+    """Degree audit of `student` (see audit.py), or None without NumPy."""
+    try:
+        from .audit import degree_audit
+    except ImportError:
+        return None
+    return degree_audit(student)
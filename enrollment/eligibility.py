@@ -0,0 +1,337 @@
+"""
+Enrollment eligibility rules.
+
+Each rule names the data it needs. `Eligibility` loads each needed data
+set once per student and semester, with one query per loader, then
+evaluates every rule over one offering or a whole page of offerings in
+memory. The number of queries stays fixed however many offerings are
+checked.
+
+To add a check, subclass Rule. If it needs more data, register a loader
+with @loader, then add the rule to RULES.
+"""
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+from django.utils import timezone
+
+from academics.models import CourseOffering, CourseRequisite, MeetingTime
+from .completion import completed_courses, course_bit, courses_mask
+from .models import Enrollment, EnrollmentHold
+from .timetable import Timetable
+
+Failure = namedtuple("Failure", "code level message")
+
+LOADERS = {}
+
+
+def loader(name):
+    """Register `func(context)` as the loader of data set `name`."""
+    def decorator(func):
+        LOADERS[name] = func
+        return func
+    return decorator
+
+
+@loader("enrollments")
+def load_enrollments(context):
+    """Status of the student's enrollments this semester and their credits."""
+    rows = Enrollment.objects.filter(
+        student=context.student,
+        course_offering__semester=context.semester,
+    ).values_list(
+        "course_offering_id", "status",
+        "course_offering__course_id", "course_offering__course__credit_points",
+    )
+
+    status = {}
+    credits = 0
+    courses = 0
+    for offering_id, row_status, course_id, credit_points in rows:
+        status[offering_id] = row_status
+        if row_status == "ENROLLED":
+            credits += credit_points
+            courses |= course_bit(course_id)
+    return {"status": status, "credits": credits, "courses": courses}
+
+
+@loader("holds")
+def load_holds(context):
+    return list(
+        EnrollmentHold.objects.filter(student=context.student, released_at__isnull=True)
+    )
+
+
+@loader("completed")
+def load_completed(context):
+    return completed_courses(context.student, context.today)
+
+
+@loader("requisites")
+def load_requisites(context):
+    """Prerequisite and corequisite masks per course, plus course codes."""
+    masks = {}
+    codes = {}
+    for course_id, requires_id, kind, code in CourseRequisite.objects.filter(
+        course_id__in={o.course_id for o in context.offerings},
+        requires__deleted_at__isnull=True,
+    ).values_list("course_id", "requires_id", "kind", "requires__course_code"):
+        pre, co = masks.get(course_id, (0, 0))
+        if kind == "PRE":
+            pre |= course_bit(requires_id)
+        else:
+            co |= course_bit(requires_id)
+        masks[course_id] = (pre, co)
+        codes[course_bit(requires_id)] = code
+    return {"masks": masks, "codes": codes}
+
+
+def _codes(requisites, mask):
+    return ", ".join(sorted(
+        code for bit, code in requisites["codes"].items() if bit & mask
+    ))
+
+
+@loader("timetable")
+def load_timetable(context):
+    """
+    The student's current timetable as an interval index, and the meeting
+    times of the offerings being checked.
+    """
+    enrolled = Timetable(
+        (m.day, m.start_time, m.end_time, f"{m.course_offering.course.course_code} ({m})")
+        for m in MeetingTime.objects.select_related("course_offering__course").filter(
+            course_offering__semester=context.semester,
+            course_offering__enrollment__student=context.student,
+            course_offering__enrollment__status="ENROLLED",
+            course_offering__enrollment__deleted_at__isnull=True,
+        )
+    )
+
+    # Reuse prefetch_related("meetings") when the caller already did it
+    if all("meetings" in getattr(o, "_prefetched_objects_cache", {}) for o in context.offerings):
+        meetings = {o.id: list(o.meetings.all()) for o in context.offerings}
+    else:
+        meetings = {}
+        for m in MeetingTime.objects.filter(
+            course_offering__in=[o.id for o in context.offerings]
+        ):
+            meetings.setdefault(m.course_offering_id, []).append(m)
+    return {"enrolled": enrolled, "meetings": meetings}
+
+
+@loader("seats")
+def load_seats(context):
+    """(taken, capacity) per offering; reuses with_seats() annotations if present."""
+    if all(hasattr(o, "seats_taken") for o in context.offerings):
+        return {o.id: (o.seats_taken, o.seat_capacity) for o in context.offerings}
+    return {
+        pk: (taken, capacity)
+        for pk, taken, capacity in CourseOffering.with_seats(CourseOffering.objects.all())
+        .filter(pk__in=[o.id for o in context.offerings])
+        .values_list("pk", "seats_taken", "seat_capacity")
+    }
+
+
+class Rule(ABC):
+    code = ""
+    level = "error"
+    needs = ()
+
+    @abstractmethod
+    def check(self, context, offering):
+        """Return a message when the student may not enroll, else None."""
+
+
+class ActiveStudent(Rule):
+    code = "inactive"
+
+    def check(self, context, offering):
+        if not context.student.is_active:
+            return "Your academic status is inactive."
+
+
+class EnrollmentWindow(Rule):
+    code = "window"
+
+    def check(self, context, offering):
+        semester = context.semester
+        if not (semester.enrollment_open_date <= context.today <= semester.enrollment_close_date):
+            return "Enrollment window is closed."
+
+
+class OfferingOpen(Rule):
+    code = "closed"
+
+    def check(self, context, offering):
+        if not offering.is_active or offering.semester_id != context.semester.id:
+            return "This course is not open for enrollment."
+
+
+class SameDepartment(Rule):
+    code = "department"
+
+    def check(self, context, offering):
+        if offering.course.department_id != context.student.department_id:
+            return "This course belongs to another department."
+
+
+class NoActiveHold(Rule):
+    code = "hold"
+    needs = ("holds",)
+
+    def check(self, context, offering):
+        holds = context.data["holds"]
+        if holds:
+            return f"Enrollment hold: {holds[0].get_reason_display()}."
+
+
+class PrerequisitesMet(Rule):
+    code = "prerequisite"
+    needs = ("requisites", "completed")
+
+    def check(self, context, offering):
+        requisites = context.data["requisites"]
+        pre, _ = requisites["masks"].get(offering.course_id, (0, 0))
+        missing = pre & ~context.data["completed"]
+        if missing:
+            return f"Missing prerequisite: {_codes(requisites, missing)}."
+
+
+class CorequisitesMet(Rule):
+    code = "corequisite"
+    needs = ("requisites", "completed", "enrollments")
+
+    def check(self, context, offering):
+        requisites = context.data["requisites"]
+        _, co = requisites["masks"].get(offering.course_id, (0, 0))
+        missing = co & ~(context.data["completed"] | context.data["enrollments"]["courses"])
+        if missing:
+            return f"Enroll in {_codes(requisites, missing)} first (corequisite)."
+
+
+class RankedCorequisitesMet(CorequisitesMet):
+    """
+    Preference mode: nothing can be enrolled before the lottery, so a
+    corequisite ranked alongside the course counts as well. The lottery
+    then only grants the course together with its corequisite (see
+    enrollment/allocation.py).
+    """
+
+    def check(self, context, offering):
+        requisites = context.data["requisites"]
+        _, co = requisites["masks"].get(offering.course_id, (0, 0))
+        ranked = courses_mask(o.course_id for o in context.offerings)
+        missing = co & ~(
+            context.data["completed"] | context.data["enrollments"]["courses"] | ranked
+        )
+        if missing:
+            return f"Also rank {_codes(requisites, missing)} (corequisite)."
+
+
+class NotAlreadyEnrolled(Rule):
+    code = "enrolled"
+    level = "warning"
+    needs = ("enrollments",)
+
+    def check(self, context, offering):
+        if context.data["enrollments"]["status"].get(offering.id) == "ENROLLED":
+            return "You are already enrolled in this course."
+
+
+class NoTimetableClash(Rule):
+    code = "clash"
+    needs = ("timetable",)
+
+    def check(self, context, offering):
+        timetable = context.data["timetable"]
+        for m in timetable["meetings"].get(offering.id, ()):
+            clashes = timetable["enrolled"].clashes(m.day, m.start_time, m.end_time)
+            if clashes:
+                return f"Clashes with {', '.join(clashes)}."
+
+
+class CreditLimit(Rule):
+    code = "credits"
+    needs = ("enrollments",)
+
+    def check(self, context, offering):
+        credits = context.data["enrollments"]["credits"]
+        max_credits = context.student.degree_program.max_credits_per_semester
+        if credits + offering.course.credit_points > max_credits:
+            return (
+                f"Credit limit exceeded. Allowed: {max_credits}, Current: {credits}"
+            )
+
+
+class SeatsAvailable(Rule):
+    code = "full"
+    needs = ("seats",)
+
+    def check(self, context, offering):
+        taken, capacity = context.data["seats"].get(offering.id, (0, 0))
+        if taken >= capacity:
+            return "Course capacity is full."
+
+
+# Evaluated in this order; the first failing rule is reported
+RULES = (
+    ActiveStudent(),
+    EnrollmentWindow(),
+    OfferingOpen(),
+    SameDepartment(),
+    NotAlreadyEnrolled(),
+    NoActiveHold(),
+    PrerequisitesMet(),
+    CorequisitesMet(),
+    NoTimetableClash(),
+    CreditLimit(),
+    SeatsAvailable(),
+)
+
+# Checked when ranked preferences are saved; the lottery checks the rest
+PREFERENCE_RULES = (
+    PrerequisitesMet(),
+    RankedCorequisitesMet(),
+    NoTimetableClash(),
+)
+
+
+class Eligibility:
+    """
+    Evaluate `rules` for one student and semester. Offerings passed in
+    should have `course` loaded (select_related) to avoid extra queries.
+    """
+
+    def __init__(self, student, semester, rules=RULES):
+        self.student = student
+        self.semester = semester
+        self.rules = rules
+        self.today = timezone.localdate()
+        # Compiled once: each data set is loaded a single time even when
+        # several rules need it
+        self.loaders = sorted({name for rule in rules for name in rule.needs})
+        self.offerings = []
+        self.data = {}
+
+    def evaluate(self, offerings):
+        """Map offering id -> first Failure, or None when eligible."""
+        self.offerings = list(offerings)
+        self.data = {name: LOADERS[name](self) for name in self.loaders}
+
+        results = {}
+        for offering in self.offerings:
+            results[offering.id] = None
+            for rule in self.rules:
+                message = rule.check(self, offering)
+                if message:
+                    results[offering.id] = Failure(rule.code, rule.level, message)
+                    break
+        return results
+
+    def check(self, offering):
+        return self.evaluate([offering])[offering.id]
+
+    @property
+    def enrolled_credits(self):
+        return self.data["enrollments"]["credits"]
@@ -0,0 +1,145 @@
+"""
+Next-semester course demand forecasts from enrollment history.
+
+The demand for an offering is the number of students who enrolled in it
+(including those who dropped later) plus the students who ranked it as a
+preference but did not get a seat. Archived semesters count too. The
+history forms a courses x semesters matrix, with semesters in start-date
+order and NaN where a course was not offered.
+
+Each course gets a linear trend, fitted by weighted least squares. The
+weights decay with age, so recent semesters count more. All courses are
+fitted at once in closed form over the matrix. The spread is the weighted
+residual error, and never less than the Poisson noise of the forecast.
+The recommended capacity is the upper end of the 80% range.
+
+Requires NumPy.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+from django.db.models import Count, Exists, OuterRef
+
+from academics.models import CourseOffering, Semester
+from .models import ArchivedCourseOffering, ArchivedEnrollment, CoursePreference, Enrollment
+
+# Weight of a semester relative to the one after it
+DECAY = 0.7
+# Two-sided 80% range of a normal distribution
+Z_80 = 1.2816
+
+Forecast = namedtuple("Forecast", "expected low high recommended_capacity history")
+
+
+def _observations(course_ids, using, before):
+    """(course id, semester id, demand) of every offering starting before `before`."""
+    demand = {}
+    offerings = {}
+    for model, enrollments in (
+        (CourseOffering, Enrollment),
+        (ArchivedCourseOffering, ArchivedEnrollment),
+    ):
+        for pk, course_id, semester_id in model.objects.using(using).filter(
+            course_id__in=course_ids, semester__start_date__lt=before
+        ).values_list("pk", "course_id", "semester_id"):
+            offerings[pk] = (course_id, semester_id)
+            demand[pk] = 0
+
+        demand.update(
+            enrollments.objects.using(using).filter(course_offering_id__in=offerings)
+            .values("course_offering_id")
+            .annotate(n=Count("student_id", distinct=True))
+            .values_list("course_offering_id", "n")
+        )
+
+    # Students who asked for a seat in a preference semester and got none
+    turned_away = CoursePreference.objects.using(using).filter(
+        course_offering_id__in=offerings
+    ).exclude(
+        Exists(Enrollment.all_objects.using(using).filter(
+            student_id=OuterRef("student_id"),
+            course_offering_id=OuterRef("course_offering_id"),
+        ))
+    ).values("course_offering_id").annotate(n=Count("pk")).values_list("course_offering_id", "n")
+    for pk, n in turned_away:
+        demand[pk] += n
+
+    return [(course_id, semester_id, demand[pk]) for pk, (course_id, semester_id) in offerings.items()]
+
+
+def fit(history):
+    """
+    Forecast the next column of `history` (courses x semesters, NaN where
+    not offered). Every row needs at least one offering. Returns arrays
+    (expected, low, high).
+    """
+    n_semesters = history.shape[1]
+    t = np.arange(n_semesters, dtype=float)
+    offered = ~np.isnan(history)
+    y = np.where(offered, history, 0.0)
+    w = np.where(offered, DECAY ** (n_semesters - 1 - t), 0.0)
+
+    s0 = w.sum(axis=1)
+    s1 = (w * t).sum(axis=1)
+    s2 = (w * t * t).sum(axis=1)
+    sy = (w * y).sum(axis=1)
+    sty = (w * t * y).sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominator = s0 * s2 - s1 ** 2
+        # A single offering has no trend: keep its level
+        slope = np.where(
+            offered.sum(axis=1) > 1, (s0 * sty - s1 * sy) / denominator, 0.0
+        )
+        slope = np.nan_to_num(slope)
+        intercept = (sy - slope * s1) / s0
+
+        fitted = intercept[:, None] + slope[:, None] * t
+        variance = (w * (y - fitted) ** 2).sum(axis=1) / s0
+
+    expected = np.maximum(intercept + slope * n_semesters, 0.0)
+    spread = Z_80 * np.sqrt(np.maximum(variance, expected))
+    return expected, np.maximum(expected - spread, 0.0), expected + spread
+
+
+def forecast_demand(courses, semester):
+    """
+    Forecast the demand for `courses` in `semester` from the semesters that
+    started before it. Returns a dict course id -> Forecast, without the
+    courses that were never offered.
+    """
+    by_alias = {}
+    for course in courses:
+        by_alias.setdefault(course._state.db, []).append(course.pk)
+
+    before = semester.start_date
+    semester_ids = list(
+        Semester.all_objects.filter(start_date__lt=before)
+        .order_by("start_date", "pk").values_list("pk", flat=True)
+    )
+    semester_index = {pk: i for i, pk in enumerate(semester_ids)}
+
+    forecasts = {}
+    for using, course_ids in by_alias.items():
+        rows = _observations(course_ids, using, before)
+        if not rows:
+            continue
+        row_course = np.array([r[0] for r in rows], dtype=np.int64)
+        course_keys, course_index = np.unique(row_course, return_inverse=True)
+        history = np.full((len(course_keys), len(semester_ids)), np.nan)
+        history[course_index, [semester_index[r[1]] for r in rows]] = [r[2] for r in rows]
+
+        # Only semesters in which any of these courses ran carry information
+        history = history[:, ~np.isnan(history).all(axis=0)]
+        expected, low, high = fit(history)
+        for i, course_id in enumerate(course_keys.tolist()):
+            past = history[i][~np.isnan(history[i])]
+            forecasts[course_id] = Forecast(
+                expected=round(float(expected[i])),
+                low=math.floor(low[i]),
+                high=math.ceil(high[i]),
+                recommended_capacity=max(math.ceil(high[i]), 1),
+                history=[int(v) for v in past[-4:]],
+            )
+    return forecasts
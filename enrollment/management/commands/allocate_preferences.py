@@ -0,0 +1,78 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from academics.models import Semester
+from config.sharding import shard_aliases
+from enrollment.slots import invalidate_enrollment_semester
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the preference lottery of a ranked-preference semester. The seed "
+        "is stored with every run so the result can be reproduced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("semester_id", type=int, nargs="?")
+        parser.add_argument("--seed", type=int, help="Lottery seed (random if omitted)")
+        parser.add_argument("--dry-run", action="store_true", help="Report metrics without writing")
+        parser.add_argument(
+            "--synthetic",
+            nargs=2,
+            type=int,
+            metavar=("STUDENTS", "OFFERINGS"),
+            help="Benchmark the allocator on random data instead of a semester",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from enrollment import allocation
+        except ImportError:
+            raise CommandError("NumPy is required: pip install numpy")
+
+        if options["synthetic"]:
+            return self._benchmark(allocation, *options["synthetic"], seed=options["seed"] or 0)
+
+        semester = Semester.objects.filter(pk=options["semester_id"]).first()
+        if semester is None:
+            raise CommandError("Semester not found.")
+        if semester.enrollment_mode != "PREFERENCE":
+            raise CommandError("This semester does not use ranked preferences.")
+        if semester.preferences_allocated_at and not options["dry_run"]:
+            raise CommandError("Preferences for this semester have already been allocated.")
+
+        seed = options["seed"]
+        if seed is None:
+            seed = time.time_ns() % 2 ** 62
+
+        # Students, offerings and preferences of a department share a shard
+        for alias in shard_aliases():
+            allocator = allocation.PreferenceAllocator(semester, using=alias, seed=seed)
+            metrics = allocator.run(dry_run=options["dry_run"])
+            self.stdout.write(f"[{alias}] {json.dumps(metrics)}")
+
+        if options["dry_run"]:
+            self.stdout.write(f"Dry run with seed {seed}; nothing written.")
+            return
+
+        Semester.objects.filter(pk=semester.pk).update(preferences_allocated_at=timezone.now())
+        # The cached enrollment semester still says "not allocated"
+        invalidate_enrollment_semester()
+        self.stdout.write(self.style.SUCCESS(
+            f"Allocated preferences for {semester.name} (seed {seed})."
+        ))
+
+    def _benchmark(self, allocation, students, offerings, seed):
+        arrays = allocation.synthetic_preferences(students, offerings, seed=seed)
+        started = time.perf_counter()
+        granted, priority = allocation.allocate(*arrays, seed=seed)
+        elapsed = time.perf_counter() - started
+
+        metrics = allocation.fairness_metrics(arrays[0], arrays[2], granted, priority, students)
+        self.stdout.write(json.dumps(metrics))
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(arrays[0])} preferences allocated in {elapsed:.3f}s."
+        ))
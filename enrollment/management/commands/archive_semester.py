@@ -0,0 +1,106 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from academics.models import CourseOffering, Semester
+from config.sharding import shard_aliases
+from enrollment.models import ArchivedCourseOffering, ArchivedEnrollment, Enrollment
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the offerings and enrollments of a closed semester into the "
+        "archive tables, in batches. Safe to re-run after an interruption."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("semester_id", type=int)
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        semester = Semester.objects.filter(pk=options["semester_id"]).first()
+        if semester is None:
+            raise CommandError("Semester not found.")
+        if semester.is_active:
+            raise CommandError("Active semesters cannot be archived.")
+        if semester.end_date >= timezone.now().date():
+            raise CommandError("Only semesters that have ended can be archived.")
+
+        batch_size = options["batch_size"]
+        offerings = enrollments = 0
+
+        # Each department shard holds its own offerings and enrollments
+        for alias in shard_aliases():
+            moved_offerings, moved_enrollments = self._archive(alias, semester, batch_size)
+            offerings += moved_offerings
+            enrollments += moved_enrollments
+
+        Semester.objects.filter(pk=semester.pk).update(
+            is_archived=True, archived_at=timezone.now()
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {semester.name}: {offerings} offerings, {enrollments} enrollments."
+        ))
+
+    def _archive(self, alias, semester, batch_size):
+        offerings = enrollments = 0
+
+        while True:
+            batch = list(
+                CourseOffering.with_seats(CourseOffering.objects.using(alias))
+                .filter(semester=semester)
+                .order_by("pk")
+                .values("id", "course_id", "semester_id", "seats_taken")[:batch_size]
+            )
+            if not batch:
+                return offerings, enrollments
+
+            offering_ids = [row["id"] for row in batch]
+            with transaction.atomic(using=alias):
+                ArchivedCourseOffering.objects.using(alias).bulk_create(
+                    [
+                        ArchivedCourseOffering(
+                            id=row["id"],
+                            course_id=row["course_id"],
+                            semester_id=row["semester_id"],
+                            final_enrollment=row["seats_taken"],
+                        )
+                        for row in batch
+                    ],
+                    ignore_conflicts=True,
+                )
+
+            enrollments += self._archive_enrollments(alias, offering_ids, batch_size)
+
+            # Enrollments are gone, so this is a plain DELETE without cascades
+            with transaction.atomic(using=alias):
+                CourseOffering.objects.using(alias).filter(pk__in=offering_ids).delete()
+            offerings += len(batch)
+
+            self.stdout.write(f"  {alias}: {offerings} offerings, {enrollments} enrollments")
+
+    def _archive_enrollments(self, alias, offering_ids, batch_size):
+        moved = 0
+        while True:
+            rows = list(
+                Enrollment.objects.using(alias)
+                .filter(course_offering_id__in=offering_ids)
+                .order_by("pk")
+                .values("id", "student_id", "course_offering_id", "status", "enrolled_at")[:batch_size]
+            )
+            if not rows:
+                return moved
+
+            # One short transaction per batch keeps the write lock brief
+            with transaction.atomic(using=alias):
+                ArchivedEnrollment.objects.using(alias).bulk_create(
+                    [ArchivedEnrollment(**row) for row in rows],
+                    ignore_conflicts=True,
+                )
+                Enrollment.objects.using(alias).filter(
+                    pk__in=[row["id"] for row in rows]
+                ).delete()
+            moved += len(rows)
@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from config.db import is_lock_error, lock_backoff_delay, sqlite_pragmas
+
+
+def _prepare(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE offering (id INTEGER PRIMARY KEY, current_enrollment INTEGER NOT NULL);
+        CREATE TABLE enrollment (id INTEGER PRIMARY KEY, student INTEGER, offering INTEGER);
+        """
+    )
+    conn.executemany(
+        "INSERT INTO offering (id, current_enrollment) VALUES (?, 0)",
+        [(i,) for i in range(1, 51)],
+    )
+    conn.commit()
+    conn.close()
+
+
+class Profile:
+    def __init__(self, name, persistent, pragmas, timeout, begin, retries):
+        self.name = name
+        self.persistent = persistent
+        self.pragmas = pragmas
+        self.timeout = timeout
+        self.begin = begin
+        self.retries = retries
+
+    def connect(self, path):
+        conn = sqlite3.connect(path, timeout=self.timeout, isolation_level=None)
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+
+def _enroll(conn, profile, student, offering):
+    for attempt in range(profile.retries + 1):
+        try:
+            conn.execute(profile.begin)
+            conn.execute(
+                "SELECT current_enrollment FROM offering WHERE id = ?", (offering,)
+            ).fetchone()
+            conn.execute(
+                "INSERT INTO enrollment (student, offering) VALUES (?, ?)", (student, offering)
+            )
+            conn.execute(
+                "UPDATE offering SET current_enrollment = current_enrollment + 1 WHERE id = ?",
+                (offering,),
+            )
+            conn.execute("COMMIT")
+            return True
+        except sqlite3.OperationalError as exc:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if not is_lock_error(exc) or attempt == profile.retries:
+                return False
+            time.sleep(lock_backoff_delay(
+                attempt, settings.DB_LOCK_RETRY_BASE_DELAY, settings.DB_LOCK_RETRY_MAX_DELAY
+            ))
+
+
+def _run(profile, path, threads, per_thread):
+    ok = []
+    failed = []
+
+    def worker(index):
+        conn = profile.connect(path) if profile.persistent else None
+        done = errors = 0
+        for i in range(per_thread):
+            # Without persistent connections every "request" reconnects
+            active = conn or profile.connect(path)
+            if _enroll(active, profile, index * per_thread + i, i % 50 + 1):
+                done += 1
+            else:
+                errors += 1
+            if conn is None:
+                active.close()
+        if conn is not None:
+            conn.close()
+        ok.append(done)
+        failed.append(errors)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(ok), sum(failed), time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare write throughput of the previous SQLite setup (rollback "
+        "journal, reconnect per request, deferred transactions) against the "
+        "configured one (WAL, synchronous=NORMAL, busy_timeout, persistent "
+        "connections, BEGIN IMMEDIATE and jittered retry) on scratch databases."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--per-thread", type=int, default=250)
+        parser.add_argument(
+            "--legacy-timeout", type=float, default=0.1,
+            help="Lock wait of the legacy profile (sqlite3's default is 5s)",
+        )
+
+    def handle(self, *args, **options):
+        legacy = Profile(
+            "before", persistent=False, pragmas=[], timeout=options["legacy_timeout"],
+            begin="BEGIN", retries=0,
+        )
+        tuned = Profile(
+            "after", persistent=True,
+            pragmas=sqlite_pragmas(),
+            timeout=settings.DATABASES["default"]["OPTIONS"]["timeout"],
+            begin="BEGIN IMMEDIATE",
+            retries=settings.DB_LOCK_RETRY_ATTEMPTS - 1,
+        )
+
+        with tempfile.TemporaryDirectory() as workdir:
+            for profile in (legacy, tuned):
+                path = os.path.join(workdir, f"{profile.name}.sqlite3")
+                _prepare(path)
+                done, errors, elapsed = _run(
+                    profile, path, options["threads"], options["per_thread"]
+                )
+                self.stdout.write(
+                    f"{profile.name:>6}: {done / elapsed:8.0f} enrollments/s, "
+                    f"{done} committed, {errors} lock errors, {elapsed:.2f}s"
+                )
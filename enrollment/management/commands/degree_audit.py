@@ -0,0 +1,68 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Student
+from config.sharding import shard_aliases
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = "Audit the degree progress of a cohort and summarise it per program."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--program", type=int, help="Degree program id")
+        parser.add_argument("--year", type=int, help="Enrollment year")
+        parser.add_argument(
+            "--list-behind", action="store_true", help="List students behind schedule"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from enrollment.audit import audit_students
+        except ImportError:
+            raise CommandError("NumPy is required: pip install numpy")
+
+        filters = {"is_active": True}
+        if options["program"]:
+            filters["degree_program_id"] = options["program"]
+        if options["year"]:
+            filters["enrollment_year"] = options["year"]
+
+        started = time.perf_counter()
+        audited = 0
+        by_program = {}
+        for alias in shard_aliases():
+            students = Student.objects.using(alias).filter(**filters).order_by("pk")
+            last_pk = 0
+            while True:
+                batch = list(students.filter(pk__gt=last_pk)[:BATCH_SIZE])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                audits = audit_students(batch)
+                for student in batch:
+                    audit = audits[student.pk]
+                    counts = by_program.setdefault(student.degree_program_id, Counter())
+                    counts["students"] += 1
+                    counts["complete"] += audit.complete
+                    counts["on_track"] += audit.on_track and not audit.complete
+                    counts["behind"] += not audit.on_track
+                    if options["list_behind"] and not audit.on_track:
+                        self.stdout.write(
+                            f"  {student.student_id}: {audit.credits_earned} credits, "
+                            f"{audit.expected_credits} expected"
+                        )
+                audited += len(batch)
+
+        for program_id, counts in sorted(by_program.items()):
+            self.stdout.write(
+                f"Program {program_id}: {counts['students']} students, "
+                f"{counts['complete']} complete, {counts['on_track']} on track, "
+                f"{counts['behind']} behind"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Audited {audited} students in {time.perf_counter() - started:.2f}s."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from enrollment.reports import expire_reports
+
+
+class Command(BaseCommand):
+    help = "Delete the files of generated reports past their expiry date."
+
+    def handle(self, *args, **options):
+        expired = expire_reports()
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} report(s)."))
@@ -0,0 +1,52 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.routers import REPLICA_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Replication stand-in for local development: copy the primary SQLite "
+        "database into the replica file with SQLite's online backup API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float,
+            help="Keep syncing every N seconds instead of copying once",
+        )
+
+    def handle(self, *args, **options):
+        databases = settings.DATABASES
+        if REPLICA_ALIAS not in databases:
+            raise CommandError("No replica configured. Set DB_REPLICA_NAME to enable it.")
+
+        for alias in ("default", REPLICA_ALIAS):
+            if databases[alias]["ENGINE"] != "django.db.backends.sqlite3":
+                raise CommandError("sync_replica only copies between SQLite databases.")
+
+        primary = str(databases["default"]["NAME"])
+        replica = str(databases[REPLICA_ALIAS]["NAME"])
+
+        while True:
+            started = time.perf_counter()
+            source = sqlite3.connect(primary)
+            target = sqlite3.connect(replica)
+            try:
+                # Readers of the replica keep their connections; the backup
+                # replaces its pages under a write lock.
+                source.backup(target, pages=1024)
+            finally:
+                target.close()
+                source.close()
+
+            self.stdout.write(
+                f"Replica synced in {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0003_semester_archive'),
+        ('accounts', '0006_studentidsequence'),
+        ('enrollment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedCourseOffering',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('final_enrollment', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.course')),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.semester')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedEnrollment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('ENROLLED', 'Enrolled'), ('DROPPED', 'Dropped')], max_length=10)),
+                ('enrolled_at', models.DateTimeField()),
+                ('course_offering', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='enrollment.archivedcourseoffering')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.student')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollment', '0002_archived_enrollment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
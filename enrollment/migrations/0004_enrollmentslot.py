@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_semester_activate_on'),
+        ('enrollment', '0003_enrollment_deleted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('opens_at', models.DateTimeField()),
+                ('enrollment_year', models.PositiveIntegerField(blank=True, null=True)),
+                ('lottery_bucket', models.PositiveIntegerField(blank=True, help_text='Matches students drawn into this bucket of the semester lottery', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('degree_program', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='academics.degreeprogram')),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.semester')),
+            ],
+            options={
+                'ordering': ('semester', 'opens_at'),
+            },
+        ),
+    ]
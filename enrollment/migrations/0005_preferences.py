@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0006_semester_enrollment_mode'),
+        ('accounts', '0007_student_deleted_at'),
+        ('enrollment', '0004_enrollmentslot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllocationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('database', models.CharField(default='default', max_length=50)),
+                ('seed', models.BigIntegerField()),
+                ('assigned_count', models.PositiveIntegerField(default=0)),
+                ('metrics', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.semester')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CoursePreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course_offering', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.courseoffering')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.student')),
+            ],
+            options={
+                'ordering': ('student', 'rank'),
+                'unique_together': {('student', 'course_offering')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0007_course_section'),
+        ('enrollment', '0005_preferences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='section',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='academics.coursesection'),
+        ),
+    ]
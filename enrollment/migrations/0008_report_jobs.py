@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0011_degree_requirements'),
+        ('enrollment', '0007_enrollmenthold'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ENROLLMENT', 'Enrollment per course'), ('FILL_RATE', 'Fill rate over time'), ('CREDIT_LOAD', 'Credit-load distribution')], max_length=20)),
+                ('file_format', models.CharField(choices=[('CSV', 'CSV'), ('HTML', 'HTML')], default='CSV', max_length=10)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed'), ('EXPIRED', 'Expired')], default='PENDING', max_length=10)),
+                ('departments_total', models.PositiveIntegerField(default=0)),
+                ('departments_done', models.PositiveIntegerField(default=0)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('artifact', models.FileField(blank=True, null=True, upload_to='reports/')),
+                ('message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('department', models.ForeignKey(blank=True, help_text='Department the report covers (all departments when empty)', null=True, on_delete=django.db.models.deletion.CASCADE, to='academics.department')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('semester', models.ForeignKey(blank=True, help_text='Semester of per-semester reports', null=True, on_delete=django.db.models.deletion.CASCADE, to='academics.semester')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='enrollment__status_418e0e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:54
+
+from django.db import migrations, models
+
+# (table, change-feed kind) of the rows stamped with a change_seq
+FEED_TABLES = (
+    ("accounts_student", "student"),
+    ("academics_courseoffering", "offering"),
+    ("enrollment_enrollment", "enrollment"),
+)
+
+NEXT_SEQ = "UPDATE enrollment_changesequence SET last_seq = last_seq + 1;"
+CURRENT_SEQ = "(SELECT last_seq FROM enrollment_changesequence)"
+
+
+def trigger_sql(table, kind):
+    return [
+        f"""
+        CREATE TRIGGER {table}_change_insert AFTER INSERT ON {table}
+        BEGIN
+            {NEXT_SEQ}
+            UPDATE {table} SET change_seq = {CURRENT_SEQ} WHERE id = NEW.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER {table}_change_update AFTER UPDATE ON {table}
+        BEGIN
+            {NEXT_SEQ}
+            UPDATE {table} SET change_seq = {CURRENT_SEQ} WHERE id = NEW.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER {table}_change_delete AFTER DELETE ON {table}
+        BEGIN
+            {NEXT_SEQ}
+            INSERT INTO enrollment_changetombstone (kind, object_id, change_seq)
+            VALUES ('{kind}', OLD.id, {CURRENT_SEQ});
+        END
+        """,
+        # Number the existing rows
+        f"UPDATE {table} SET change_seq = 0",
+    ]
+
+
+def drop_sql(table):
+    return [f"DROP TRIGGER IF EXISTS {table}_change_{event}" for event in ("insert", "update", "delete")]
+
+
+# Student rows carry the name and email of their user
+USER_TRIGGER_SQL = """
+    CREATE TRIGGER accounts_user_change_update AFTER UPDATE ON accounts_user
+    WHEN NEW.first_name IS NOT OLD.first_name
+      OR NEW.last_name IS NOT OLD.last_name
+      OR NEW.email IS NOT OLD.email
+      OR NEW.is_active IS NOT OLD.is_active
+    BEGIN
+        UPDATE accounts_student SET change_seq = change_seq WHERE user_id = NEW.id;
+    END
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollment', '0008_report_jobs'),
+        ('accounts', '0009_change_feed'),
+        ('academics', '0012_courseoffering_change_seq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_seq', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChangeTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('change_seq', models.BigIntegerField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            "INSERT INTO enrollment_changesequence (last_seq) VALUES (0)",
+            migrations.RunSQL.noop,
+        ),
+    ] + [
+        migrations.RunSQL(trigger_sql(table, kind), drop_sql(table))
+        for table, kind in FEED_TABLES
+    ] + [
+        migrations.RunSQL(USER_TRIGGER_SQL, "DROP TRIGGER IF EXISTS accounts_user_change_update"),
+    ]
@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.db import models
 from accounts.models import Student
-from academics.models import CourseOffering
+from academics.models import Course, CourseOffering, CourseSection, DegreeProgram, Department, Semester
+from academics.softdelete import SoftDeleteModel
 from django.db.models import Sum
 
-class Enrollment(models.Model):
+class Enrollment(SoftDeleteModel):
     STATUS_CHOICES = (
         ('ENROLLED', 'Enrolled'),
         ('DROPPED', 'Dropped'),
@@ -11,9 +13,14 @@ class Enrollment(models.Model):
 
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     course_offering = models.ForeignKey(CourseOffering, on_delete=models.CASCADE)
+    section = models.ForeignKey(
+        CourseSection, on_delete=models.SET_NULL, null=True, blank=True
+    )
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
     enrolled_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set by database triggers on every write (see enrollment/changefeed.py)
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
 
     class Meta:
         unique_together = ('student', 'course_offering')
@@ -29,5 +36,220 @@ class Enrollment(models.Model):
         )
         return result["total"] or 0
 
+    @staticmethod
+    def get_history(student, exclude_semester=None):
+        """
+        All enrollments of a student outside `exclude_semester`, live and
+        archived, newest semester first. Archived rows expose the same
+        attributes (course_offering.course/semester, status) as live ones.
+        """
+        related = ("course_offering__course", "course_offering__semester")
+        records = []
+        for model in (Enrollment, ArchivedEnrollment):
+            queryset = model.objects.select_related(*related).filter(student=student)
+            if exclude_semester:
+                queryset = queryset.exclude(course_offering__semester=exclude_semester)
+            records.extend(queryset)
+
+        records.sort(key=lambda e: e.course_offering.semester.start_date, reverse=True)
+        return records
+
+    def __str__(self):
+        return f"{self.student.student_id} - {self.course_offering}"
+
+
+class ArchivedCourseOffering(models.Model):
+    """
+    Offering of an archived semester, moved out of CourseOffering by
+    `manage.py archive_semester`. Keeps the id of the original row.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
+    final_enrollment = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.course.course_code} - {self.semester.name}"
+
+
+class ArchivedEnrollment(models.Model):
+    """Enrollment of an archived semester; keeps the original id."""
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    course_offering = models.ForeignKey(ArchivedCourseOffering, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=Enrollment.STATUS_CHOICES)
+    enrolled_at = models.DateTimeField()
+
     def __str__(self):
         return f"{self.student.student_id} - {self.course_offering}"
+
+
+class EnrollmentSlot(models.Model):
+    """
+    Priority slot within a semester's enrollment window. A student may
+    enroll from the earliest `opens_at` of the slots matching them; every
+    criterion left empty matches everyone. Students matching no slot open
+    with the semester's enrollment_open_date.
+    """
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
+    name = models.CharField(max_length=100)
+    opens_at = models.DateTimeField()
+    enrollment_year = models.PositiveIntegerField(null=True, blank=True)
+    degree_program = models.ForeignKey(
+        DegreeProgram, on_delete=models.CASCADE, null=True, blank=True
+    )
+    lottery_bucket = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Matches students drawn into this bucket of the semester lottery"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("semester", "opens_at")
+
+    def matches(self, student, bucket):
+        return (
+            (self.enrollment_year is None or self.enrollment_year == student.enrollment_year)
+            and (self.degree_program_id is None or self.degree_program_id == student.degree_program_id)
+            and (self.lottery_bucket is None or self.lottery_bucket == bucket)
+        )
+
+    def __str__(self):
+        return f"{self.semester.name} - {self.name}"
+
+
+class CoursePreference(models.Model):
+    """Ranked course choice submitted for a preference-mode semester."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    course_offering = models.ForeignKey(CourseOffering, on_delete=models.CASCADE)
+    rank = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('student', 'course_offering')
+        ordering = ('student', 'rank')
+
+    def __str__(self):
+        return f"{self.student.student_id} #{self.rank} {self.course_offering}"
+
+
+class AllocationRun(models.Model):
+    """Audit record of one preference lottery: rerunning with `seed` on the
+    same preferences reproduces the result."""
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
+    database = models.CharField(max_length=50, default="default")
+    seed = models.BigIntegerField()
+    assigned_count = models.PositiveIntegerField(default=0)
+    metrics = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.semester.name} allocation (seed {self.seed})"
+
+
+class EnrollmentHold(models.Model):
+    """Blocks a student from enrolling until an admin releases it."""
+    REASON_CHOICES = (
+        ('FINANCIAL', 'Financial'),
+        ('ADVISING', 'Advising required'),
+        ('ACADEMIC', 'Academic standing'),
+        ('ADMINISTRATIVE', 'Administrative'),
+    )
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    note = models.CharField(max_length=255, blank=True)
+    placed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('-created_at',)
+
+    def __str__(self):
+        return f"{self.student.student_id} - {self.get_reason_display()}"
+
+
+class ReportJob(models.Model):
+    """
+    A report generated in the background by `enrollment.reports`. The
+    artifact is kept until `expires_at`, after which
+    `manage.py expire_reports` deletes it.
+    """
+    KIND_CHOICES = (
+        ('ENROLLMENT', 'Enrollment per course'),
+        ('FILL_RATE', 'Fill rate over time'),
+        ('CREDIT_LOAD', 'Credit-load distribution'),
+    )
+    FORMAT_CHOICES = (
+        ('CSV', 'CSV'),
+        ('HTML', 'HTML'),
+    )
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+        ('EXPIRED', 'Expired'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='CSV')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="Department the report covers (all departments when empty)"
+    )
+    semester = models.ForeignKey(
+        Semester,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="Semester of per-semester reports"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    departments_total = models.PositiveIntegerField(default=0)
+    departments_done = models.PositiveIntegerField(default=0)
+    row_count = models.PositiveIntegerField(default=0)
+    artifact = models.FileField(upload_to='reports/', null=True, blank=True)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"Report #{self.pk} {self.get_kind_display()} ({self.get_status_display()})"
+
+
+class ChangeSequence(models.Model):
+    """
+    The one-row counter behind the `change_seq` columns. Every database
+    has its own, incremented by the change-feed triggers.
+    """
+    last_seq = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Change sequence at {self.last_seq}"
+
+
+class ChangeTombstone(models.Model):
+    """A change-feed row that was deleted, recorded by a trigger."""
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    change_seq = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted at {self.change_seq}"
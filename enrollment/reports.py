@@ -0,0 +1,288 @@
+"""
+Background report jobs.
+
+A report is built one department at a time. The departments are spread
+over a process pool, and each worker reads its department from that
+department's shard. The parent merges the parts in department order into
+a CSV or HTML file under MEDIA_ROOT/reports/. The requester is emailed
+through the mail queue when the file is ready. Files are kept for
+REPORT_RETENTION_DAYS; `manage.py expire_reports` deletes older ones.
+"""
+import csv
+import os
+import tempfile
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection
+from django.db.models import Count, Sum
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import QueuedEmail, Student
+from academics.models import CourseOffering, Department
+from config.sharding import shard_for_department_id
+from config.workers import worker_pool
+from .models import ArchivedCourseOffering, ArchivedEnrollment, Enrollment, ReportJob
+
+REPORT_COLUMNS = {
+    "ENROLLMENT": (
+        "Department", "Course code", "Course name", "Semester",
+        "Enrolled", "Dropped", "Capacity", "Fill rate (%)",
+    ),
+    "FILL_RATE": (
+        "Department", "Course code", "Course name", "Semester", "Start date",
+        "Enrolled", "Capacity", "Fill rate (%)",
+    ),
+    "CREDIT_LOAD": ("Department", "Credits", "Students", "Share (%)"),
+}
+
+# Reports that cover a single semester
+SEMESTER_REPORTS = ("ENROLLMENT", "CREDIT_LOAD")
+
+# Lower bounds of the credit-load bands
+CREDIT_LOAD_BANDS = (0, 1, 7, 13, 19, 25)
+
+
+def _percent(part, whole):
+    return round(100 * part / whole, 1) if whole else ""
+
+
+def _band_label(index):
+    low = CREDIT_LOAD_BANDS[index]
+    if index + 1 == len(CREDIT_LOAD_BANDS):
+        return f"{low}+"
+    high = CREDIT_LOAD_BANDS[index + 1] - 1
+    return str(low) if low == high else f"{low}-{high}"
+
+
+def _offerings(department_id, using, **filters):
+    """
+    (course, semester, enrolled, dropped, capacity) of the department's live
+    and archived offerings matching `filters`.
+    """
+    live = CourseOffering.with_seats(
+        CourseOffering.objects.using(using).filter(course__department_id=department_id, **filters)
+    )
+    archived = ArchivedCourseOffering.objects.using(using).filter(
+        course__department_id=department_id, **filters
+    )
+
+    result = []
+    for offerings, enrollments, capacity in (
+        (live, Enrollment, lambda o: o.seat_capacity),
+        # Archived offerings keep no section totals; the course capacity stands in
+        (archived, ArchivedEnrollment, lambda o: o.course.max_capacity),
+    ):
+        offerings = list(offerings.select_related("course", "semester"))
+        counts = Counter()
+        for offering_id, status, n in (
+            enrollments.objects.using(using)
+            .filter(course_offering_id__in=[o.pk for o in offerings])
+            .values("course_offering_id", "status")
+            .annotate(n=Count("pk"))
+            .values_list("course_offering_id", "status", "n")
+        ):
+            counts[offering_id, status] = n
+
+        for o in offerings:
+            result.append((
+                o.course, o.semester, counts[o.pk, "ENROLLED"], counts[o.pk, "DROPPED"], capacity(o)
+            ))
+    return result
+
+
+def _enrollment_rows(department, using, semester_id):
+    rows = []
+    for course, semester, enrolled, dropped, capacity in sorted(
+        _offerings(department.pk, using, semester_id=semester_id),
+        key=lambda o: o[0].course_code,
+    ):
+        rows.append((
+            department.code, course.course_code, course.course_name, semester.name,
+            enrolled, dropped, capacity, _percent(enrolled, capacity),
+        ))
+    return rows
+
+
+def _fill_rate_rows(department, using, semester_id):
+    rows = []
+    for course, semester, enrolled, dropped, capacity in sorted(
+        _offerings(department.pk, using),
+        key=lambda o: (o[0].course_code, o[1].start_date),
+    ):
+        rows.append((
+            department.code, course.course_code, course.course_name, semester.name,
+            semester.start_date.isoformat(), enrolled, capacity, _percent(enrolled, capacity),
+        ))
+    return rows
+
+
+def _credit_load_rows(department, using, semester_id):
+    loads = Counter()
+    for model in (Enrollment, ArchivedEnrollment):
+        for student_id, credits in (
+            model.objects.using(using)
+            .filter(
+                student__department_id=department.pk,
+                student__is_active=True,
+                course_offering__semester_id=semester_id,
+                status="ENROLLED",
+            )
+            .values("student_id")
+            .annotate(credits=Sum("course_offering__course__credit_points"))
+            .values_list("student_id", "credits")
+        ):
+            loads[student_id] += credits or 0
+
+    students = Student.objects.using(using).filter(
+        department_id=department.pk, is_active=True
+    ).count()
+    bands = Counter(bisect_right(CREDIT_LOAD_BANDS, credits) - 1 for credits in loads.values())
+    # Active students without an enrollment carry no credits
+    bands[0] += max(students - len(loads), 0)
+
+    return [
+        (department.code, _band_label(i), bands[i], _percent(bands[i], students))
+        for i in range(len(CREDIT_LOAD_BANDS))
+    ]
+
+
+REPORT_BUILDERS = {
+    "ENROLLMENT": _enrollment_rows,
+    "FILL_RATE": _fill_rate_rows,
+    "CREDIT_LOAD": _credit_load_rows,
+}
+
+
+def build_department_rows(kind, department_id, semester_id):
+    """One department's rows of a report; runs in a pool worker."""
+    department = Department.all_objects.using("default").get(pk=department_id)
+    return REPORT_BUILDERS[kind](
+        department, shard_for_department_id(department_id), semester_id
+    )
+
+
+def write_artifact(job, rows):
+    """Write `rows` to the job's artifact file in its format."""
+    columns = REPORT_COLUMNS[job.kind]
+    extension = job.file_format.lower()
+
+    with tempfile.NamedTemporaryFile(
+        "w", newline="", suffix=f".{extension}", delete=False, encoding="utf-8"
+    ) as handle:
+        if job.file_format == "CSV":
+            writer = csv.writer(handle)
+            writer.writerow(columns)
+            writer.writerows(rows)
+        else:
+            handle.write(render_to_string("enrollment/report_artifact.html", {
+                "job": job,
+                "columns": columns,
+                "rows": rows,
+                "generated_at": timezone.now(),
+            }))
+
+    with open(handle.name, "rb") as saved:
+        job.artifact.save(f"report_{job.pk}_{job.kind.lower()}.{extension}", File(saved), save=False)
+    os.unlink(handle.name)
+
+
+def generate_report(job, workers=None):
+    departments = Department.objects.order_by("code")
+    if job.department_id:
+        departments = departments.filter(pk=job.department_id)
+    department_ids = list(departments.values_list("pk", flat=True))
+
+    ReportJob.objects.filter(pk=job.pk).update(
+        status="RUNNING", departments_total=len(department_ids)
+    )
+
+    parts = {}
+    max_workers = min(workers or settings.REPORT_WORKERS or os.cpu_count() or 1, len(department_ids))
+    if department_ids:
+        with worker_pool(max_workers) as pool:
+            futures = {
+                pool.submit(build_department_rows, job.kind, department_id, job.semester_id): department_id
+                for department_id in department_ids
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                parts[futures[future]] = future.result()
+                ReportJob.objects.filter(pk=job.pk).update(departments_done=done)
+
+    rows = [row for department_id in department_ids for row in parts[department_id]]
+    write_artifact(job, rows)
+
+    finished = timezone.now()
+    job.status = "COMPLETED"
+    job.departments_total = job.departments_done = len(department_ids)
+    job.row_count = len(rows)
+    job.finished_at = finished
+    job.expires_at = finished + timedelta(days=settings.REPORT_RETENTION_DAYS)
+    job.save()
+    return job
+
+
+def notify_requester(job, base_url):
+    """Queue an email telling the requester the report finished."""
+    user = job.requested_by
+    if not user or not user.email:
+        return
+
+    link = base_url.rstrip("/") + reverse("report_detail", args=[job.pk])
+    if job.status == "COMPLETED":
+        subject = f"Report ready: {job.get_kind_display()}"
+        body = (
+            f"Your report \"{job.get_kind_display()}\" is ready "
+            f"({job.row_count} rows).\n\n"
+            f"Download it here until {job.expires_at:%d %b %Y %H:%M}:\n\n{link}\n\n"
+        )
+    else:
+        subject = f"Report failed: {job.get_kind_display()}"
+        body = f"Your report \"{job.get_kind_display()}\" could not be generated:\n\n{job.message}\n\n{link}\n\n"
+
+    QueuedEmail.objects.create(
+        subject=subject,
+        message=f"Hello {user.first_name or user.username},\n\n{body}Regards,\nVIT - Course Enrollment Portal",
+        recipient=user.email,
+    )
+
+
+def run_report_job(job_id, base_url):
+    """
+    Entry point for background threads: builds the report, records any
+    unexpected failure on the ReportJob row and notifies the requester.
+    """
+    close_old_connections()
+    job = ReportJob.objects.select_related("requested_by").get(pk=job_id)
+    try:
+        generate_report(job)
+    except Exception as exc:
+        job.status = "FAILED"
+        job.message = str(exc)
+        job.finished_at = timezone.now()
+        ReportJob.objects.filter(pk=job_id).update(
+            status=job.status, message=job.message, finished_at=job.finished_at
+        )
+    try:
+        notify_requester(job, base_url)
+    finally:
+        connection.close()
+
+
+def expire_reports(now=None):
+    """Delete the artifacts of reports past their expiry; returns how many."""
+    now = now or timezone.now()
+    expired = 0
+    for job in ReportJob.objects.filter(status="COMPLETED", expires_at__lte=now):
+        if job.artifact:
+            job.artifact.delete(save=False)
+        job.status = "EXPIRED"
+        job.save(update_fields=["artifact", "status"])
+        expired += 1
+    return expired
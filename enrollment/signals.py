@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save
+
+from academics.models import Course, DegreeProgram, ProgramRequirement, RequirementCourse, Semester
+from accounts.models import Student
+from .completion import (
+    invalidate_completed_courses,
+    invalidate_degree_audits,
+    invalidate_student_audit,
+)
+from .models import Enrollment, EnrollmentSlot
+from .slots import invalidate_enrollment_semester, invalidate_enrollment_slots
+
+for model, receiver in (
+    (EnrollmentSlot, invalidate_enrollment_slots),
+    # A student's program or year decides which slots match
+    (Student, invalidate_enrollment_slots),
+    (Semester, invalidate_enrollment_semester),
+    # Program requirements and course credits feed every degree audit
+    (DegreeProgram, invalidate_degree_audits),
+    (Course, invalidate_degree_audits),
+    (ProgramRequirement, invalidate_degree_audits),
+    (RequirementCourse, invalidate_degree_audits),
+):
+    post_save.connect(
+        receiver, sender=model,
+        dispatch_uid=f"enrollment_cache_save_{model._meta.label_lower}",
+    )
+    post_delete.connect(
+        receiver, sender=model,
+        dispatch_uid=f"enrollment_cache_delete_{model._meta.label_lower}",
+    )
+
+post_save.connect(
+    invalidate_completed_courses, sender=Enrollment,
+    dispatch_uid="enrollment_cache_save_completed_courses",
+)
+post_save.connect(
+    invalidate_student_audit, sender=Student,
+    dispatch_uid="enrollment_cache_save_student_audit",
+)
@@ -0,0 +1,78 @@
+"""
+Staggered enrollment slots and the cached lookups on the enrollment path.
+
+The open time of a student's slot and the current enrollment semester are
+read on every enrollment request, so both are cached; the cache versions
+are bumped by signals when slots or semesters change.
+"""
+import hashlib
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from config.cache import bump_cache_version, cache_version
+from .models import EnrollmentSlot
+
+SLOTS_VERSION_KEY = "enrollment_slots:version"
+SEMESTER_VERSION_KEY = "enrollment_semester:version"
+
+
+def invalidate_enrollment_slots(**kwargs):
+    bump_cache_version(SLOTS_VERSION_KEY)
+
+
+def invalidate_enrollment_semester(**kwargs):
+    bump_cache_version(SEMESTER_VERSION_KEY)
+    # Slot lookups embed the semester's own window
+    bump_cache_version(SLOTS_VERSION_KEY)
+
+
+def lottery_bucket(student_id, semester_id, buckets):
+    """Stable pseudo-random bucket of a student for one semester's lottery."""
+    digest = hashlib.sha256(f"{semester_id}:{student_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") % buckets
+
+
+def default_opens_at(semester):
+    return timezone.make_aware(datetime.combine(semester.enrollment_open_date, time.min))
+
+
+def enrollment_opens_at(student, semester):
+    """Moment from which `student` may enroll in `semester` (cached)."""
+    key = f"enrollment_slots:{cache_version(SLOTS_VERSION_KEY)}:{semester.pk}:{student.pk}"
+    opens_at = cache.get(key)
+    if opens_at is not None:
+        return opens_at
+
+    slots_key = f"enrollment_slots:{cache_version(SLOTS_VERSION_KEY)}:{semester.pk}"
+    slots = cache.get(slots_key)
+    if slots is None:
+        slots = list(EnrollmentSlot.objects.filter(semester=semester))
+        cache.set(slots_key, slots, settings.ENROLLMENT_SLOT_CACHE_TIMEOUT)
+
+    buckets = [slot.lottery_bucket for slot in slots if slot.lottery_bucket is not None]
+    bucket = lottery_bucket(student.pk, semester.pk, max(buckets) + 1) if buckets else None
+
+    matching = [slot.opens_at for slot in slots if slot.matches(student, bucket)]
+    opens_at = min(matching) if matching else default_opens_at(semester)
+
+    cache.set(key, opens_at, settings.ENROLLMENT_SLOT_CACHE_TIMEOUT)
+    return opens_at
+
+
+def cached_enrollment_semester(today, lookup):
+    """
+    Cache the result of `lookup()` (the semester open for enrollment on
+    `today`, or None) until a semester changes or the day rolls over.
+    """
+    key = f"enrollment_semester:{cache_version(SEMESTER_VERSION_KEY)}:{today.isoformat()}"
+    cached = cache.get(key)
+    if cached is not None:
+        return cached or None
+
+    semester = lookup()
+    # False marks "no semester" so it is cached too
+    cache.set(key, semester or False, settings.ENROLLMENT_SLOT_CACHE_TIMEOUT)
+    return semester
@@ -0,0 +1,308 @@
+"""
+Bulk enrollment sync for integrations such as the registrar.
+
+Operations arrive as NDJSON, one per line:
+
+    {"op": "enroll", "student_id": "2025-CS-0001", "offering_id": 12}
+    {"op": "drop", "student_id": "2025-CS-0001", "course_code": "CS101", "semester_id": 3}
+
+An optional "ref" is echoed back in the line's result. Lines are applied
+in chunks of ENROLLMENT_SYNC_CHUNK_SIZE, with one write transaction per
+chunk and database. When a transaction fails, its lines are reported as
+"error" and the stream goes on with the next chunk. Each chunk is
+validated set-wise, the way a cohort enrollment is. Students, offerings,
+credit totals, existing enrollments and holds are each loaded with one
+query. The operations are then checked in line order against that state
+(active student, hold, credit limit, seats), so each line sees the
+effect of the lines before it. Only the net changes are written, in bulk.
+"""
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from academics.models import CourseOffering, CourseSection
+from accounts.models import Student
+from config.db import retry_on_lock
+from config.sharding import shard_aliases, use_shard
+from .completion import invalidate_students_courses
+from .models import Enrollment, EnrollmentHold
+
+OPERATIONS = ("enroll", "drop")
+
+
+def _is_int(value):
+    # JSON true/false load as bool, which is an int subclass
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_operation(line):
+    """Return (operation, None) for a valid line, else (None, reason)."""
+    try:
+        op = json.loads(line)
+    except ValueError:
+        return None, "invalid JSON"
+
+    if not isinstance(op, dict) or op.get("op") not in OPERATIONS:
+        return None, "op must be one of: " + ", ".join(OPERATIONS)
+    if not isinstance(op.get("student_id"), str):
+        return None, "student_id is required"
+
+    if "offering_id" in op:
+        if not _is_int(op["offering_id"]):
+            return None, "offering_id must be an integer"
+    elif not (isinstance(op.get("course_code"), str) and _is_int(op.get("semester_id"))):
+        return None, "offering_id, or course_code and semester_id, is required"
+    return op, None
+
+
+def _result(line, op, status, reason=None):
+    result = {"line": line, "status": status}
+    if op and "ref" in op:
+        result["ref"] = op["ref"]
+    if reason:
+        result["reason"] = reason
+    return result
+
+
+class EnrollmentSync:
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or settings.ENROLLMENT_SYNC_CHUNK_SIZE
+        self.counts = Counter()
+
+    def run(self, lines):
+        """
+        Apply the NDJSON `lines` chunk by chunk. Yields one result per
+        non-blank line once its chunk is committed, then {"summary": ...}.
+        """
+        chunk = []
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            chunk.append((number, line))
+            if len(chunk) >= self.chunk_size:
+                yield from self._process_chunk(chunk)
+                chunk = []
+
+        if chunk:
+            yield from self._process_chunk(chunk)
+        yield {"summary": dict(self.counts)}
+
+    def _process_chunk(self, chunk):
+        results = {}
+        operations = []
+        for number, line in chunk:
+            op, error = parse_operation(line)
+            if error:
+                results[number] = _result(number, None, "invalid", error)
+            else:
+                op["line"] = number
+                operations.append(op)
+
+        # Enrollments live on the database of their student
+        numbers = {op["student_id"] for op in operations}
+        located = {}
+        for alias in shard_aliases():
+            for number in Student.objects.using(alias).filter(
+                student_id__in=numbers
+            ).values_list("student_id", flat=True):
+                located[number] = alias
+
+        by_alias = defaultdict(list)
+        for op in operations:
+            alias = located.get(op["student_id"])
+            if alias:
+                by_alias[alias].append(op)
+            else:
+                results[op["line"]] = _result(op["line"], op, "rejected", "unknown student")
+
+        for alias, alias_operations in by_alias.items():
+            try:
+                with use_shard(alias):
+                    results.update(_apply_operations(alias_operations))
+            except DatabaseError as exc:
+                # Rolled back: none of these lines were applied
+                for op in alias_operations:
+                    results[op["line"]] = _result(op["line"], op, "error", f"not applied: {exc}")
+
+        for number, _ in chunk:
+            self.counts[results[number]["status"]] += 1
+            yield results[number]
+
+
+@retry_on_lock
+def _apply_operations(operations):
+    # Planned inside the write transaction so a retry sees fresh rows
+    students = {
+        number: (pk, is_active, max_credits)
+        for pk, number, is_active, max_credits in Student.objects.filter(
+            student_id__in={op["student_id"] for op in operations}
+        ).values_list("pk", "student_id", "is_active", "degree_program__max_credits_per_semester")
+    }
+
+    offerings = list(
+        CourseOffering.with_seats(CourseOffering.objects.select_related("course"))
+        .filter(
+            Q(pk__in={op["offering_id"] for op in operations if "offering_id" in op})
+            | Q(
+                course__course_code__in={op["course_code"] for op in operations if "course_code" in op},
+                semester_id__in={op["semester_id"] for op in operations if "semester_id" in op},
+            )
+        )
+        .select_for_update()
+    )
+    by_id = {o.pk: o for o in offerings}
+    by_code = {(o.course.course_code, o.semester_id): o for o in offerings}
+
+    student_ids = [pk for pk, _, _ in students.values()]
+    credits = Counter({
+        (student_id, semester_id): total
+        for student_id, semester_id, total in Enrollment.objects.filter(
+            student_id__in=student_ids,
+            course_offering__semester_id__in={o.semester_id for o in offerings},
+            status="ENROLLED",
+        )
+        .values("student_id", "course_offering__semester_id")
+        .annotate(total=Sum("course_offering__course__credit_points"))
+        .values_list("student_id", "course_offering__semester_id", "total")
+    })
+    existing = {
+        (student_id, offering_id): (pk, status, section_id)
+        for pk, student_id, offering_id, status, section_id in Enrollment.objects.filter(
+            student_id__in=student_ids, course_offering__in=offerings
+        ).values_list("pk", "student_id", "course_offering_id", "status", "section_id")
+    }
+    held = set(
+        EnrollmentHold.objects.filter(
+            student_id__in=student_ids, released_at__isnull=True
+        ).values_list("student_id", flat=True)
+    )
+
+    seats = {o.pk: o.seat_capacity - o.seats_taken for o in offerings}
+    state = {key: row[1] for key, row in existing.items()}
+    results = {}
+
+    for op in operations:
+        if op["student_id"] not in students:
+            # Deleted since the chunk was routed
+            results[op["line"]] = _result(op["line"], op, "rejected", "unknown student")
+            continue
+        student_id, is_active, max_credits = students[op["student_id"]]
+        if "offering_id" in op:
+            offering = by_id.get(op["offering_id"])
+        else:
+            offering = by_code.get((op["course_code"], op["semester_id"]))
+
+        if offering is None or not offering.is_active:
+            results[op["line"]] = _result(op["line"], op, "rejected", "unknown offering")
+            continue
+
+        key = (student_id, offering.pk)
+        term = (student_id, offering.semester_id)
+        credit_points = offering.course.credit_points
+
+        if op["op"] == "enroll":
+            if state.get(key) == "ENROLLED":
+                reason = "already enrolled"
+            elif not is_active:
+                reason = "inactive student"
+            elif student_id in held:
+                reason = "enrollment hold"
+            elif credits[term] + credit_points > max_credits:
+                reason = "credit limit"
+            elif seats[offering.pk] <= 0:
+                reason = "capacity"
+            else:
+                reason = None
+                state[key] = "ENROLLED"
+                credits[term] += credit_points
+                seats[offering.pk] -= 1
+        else:
+            if state.get(key) != "ENROLLED":
+                reason = "not enrolled"
+            else:
+                reason = None
+                state[key] = "DROPPED"
+                credits[term] -= credit_points
+                seats[offering.pk] += 1
+
+        if reason:
+            results[op["line"]] = _result(op["line"], op, "rejected", reason)
+        else:
+            results[op["line"]] = _result(op["line"], op, "enrolled" if op["op"] == "enroll" else "dropped")
+
+    _write_changes(existing, state)
+    return results
+
+
+def _write_changes(existing, state):
+    """Write the net difference between `existing` and the planned `state`."""
+    now = timezone.now()
+    new = defaultdict(list)      # offering id -> student ids without a row
+    revived = defaultdict(list)  # offering id -> DROPPED enrollments to revive
+    dropped = []
+    for (student_id, offering_id), status in state.items():
+        before = existing.get((student_id, offering_id))
+        if status == (before[1] if before else "DROPPED"):
+            continue
+        if status == "DROPPED":
+            dropped.append((before[0], offering_id, before[2]))
+        elif before:
+            revived[offering_id].append(before[0])
+        else:
+            new[offering_id].append(student_id)
+
+    # Drops first, so their seats can be handed out again
+    Enrollment.objects.filter(pk__in=[pk for pk, _, _ in dropped]).update(
+        status="DROPPED", updated_at=now
+    )
+    for section_id, count in Counter(s for _, _, s in dropped if s).items():
+        CourseSection.objects.filter(pk=section_id).update(
+            current_enrollment=Greatest(F("current_enrollment") - count, 0)
+        )
+    for offering_id, count in Counter(o for _, o, s in dropped if not s).items():
+        CourseOffering.objects.filter(pk=offering_id).update(
+            current_enrollment=Greatest(F("current_enrollment") - count, 0)
+        )
+
+    enrolled_offerings = set(new) | set(revived)
+    sectioned = set(
+        CourseSection.objects.filter(course_offering__in=enrolled_offerings)
+        .values_list("course_offering_id", flat=True)
+    )
+    new_rows = []
+    for offering_id in enrolled_offerings:
+        count = len(revived[offering_id]) + len(new[offering_id])
+        if offering_id in sectioned:
+            sections = CourseSection.assign_seats(offering_id, count)
+        else:
+            sections = [None] * count
+            CourseOffering.objects.filter(pk=offering_id).update(
+                current_enrollment=F("current_enrollment") + count
+            )
+
+        by_section = defaultdict(list)
+        for enrollment_id, section_id in zip(revived[offering_id], sections):
+            by_section[section_id].append(enrollment_id)
+        for section_id, enrollment_ids in by_section.items():
+            Enrollment.objects.filter(pk__in=enrollment_ids).update(
+                status="ENROLLED", section_id=section_id, updated_at=now
+            )
+        new_rows.extend(
+            Enrollment(
+                student_id=student_id,
+                course_offering_id=offering_id,
+                section_id=section_id,
+                status="ENROLLED",
+            )
+            for student_id, section_id in zip(new[offering_id], sections[len(revived[offering_id]):])
+        )
+    Enrollment.objects.bulk_create(new_rows, batch_size=500)
+
+    invalidate_students_courses(
+        {student_id for student_id, _ in state}
+    )
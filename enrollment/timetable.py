@@ -0,0 +1,43 @@
+"""
+Interval index over a student's weekly timetable.
+
+Meetings are grouped per weekday and sorted by start time, together with
+a running maximum of end times. A candidate meeting [start, end) can only
+overlap entries that start before `end` (found by bisection). Among those,
+the scan walks backwards and stops as soon as the running maximum end is
+at or before `start`.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import accumulate
+
+
+class Timetable:
+    def __init__(self, meetings):
+        """`meetings`: iterable of (day, start, end, label)."""
+        by_day = defaultdict(list)
+        for day, start, end, label in meetings:
+            by_day[day].append((start, end, label))
+
+        self._days = {}
+        for day, entries in by_day.items():
+            entries.sort()
+            self._days[day] = (
+                [start for start, _, _ in entries],
+                entries,
+                list(accumulate((end for _, end, _ in entries), max)),
+            )
+
+    def clashes(self, day, start, end):
+        """Labels of the entries overlapping [start, end) on `day`."""
+        if day not in self._days:
+            return []
+        starts, entries, max_end = self._days[day]
+
+        found = []
+        i = bisect_left(starts, end) - 1
+        while i >= 0 and max_end[i] > start:
+            if entries[i][1] > start:
+                found.append(entries[i][2])
+            i -= 1
+        return found
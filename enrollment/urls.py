@@ -5,9 +5,25 @@ urlpatterns = [
     # Admin enrollment URLs
     path("enrollments/", views.enrollment_list, name="enrollment_list"),
     path("enrollments/student/<int:student_id>/", views.student_enrollment_detail, name="student_enrollment_detail"),
+    path("enrollments/student/<int:student_id>/holds/add/", views.enrollment_hold_add, name="enrollment_hold_add"),
+    path("enrollments/holds/<int:pk>/release/", views.enrollment_hold_release, name="enrollment_hold_release"),
+    path("enrollments/cohort/", views.cohort_enrollment, name="cohort_enrollment"),
+    path("enrollments/slots/<int:semester_id>/", views.enrollment_slot_list, name="enrollment_slot_list"),
+    path("enrollments/slots/delete/<int:pk>/", views.enrollment_slot_delete, name="enrollment_slot_delete"),
+
+    # Background reports
+    path("reports/", views.report_list, name="report_list"),
+    path("reports/<int:pk>/", views.report_detail, name="report_detail"),
+    path("reports/<int:pk>/progress/", views.report_progress, name="report_progress"),
+    path("reports/<int:pk>/download/", views.report_download, name="report_download"),
+
+    # Change feed for external systems (API token)
+    path("api/changes/", views.change_feed, name="change_feed"),
+    path("api/enrollments/sync/", views.enrollment_sync, name="enrollment_sync"),
 
     # Student enrollment URLs
     path("student/enroll/", views.student_course_enrollment, name="student_course_enrollment"),
+    path("student/preferences/", views.student_course_preferences, name="student_course_preferences"),
     path("student/enrollments/", views.student_my_courses, name="student_my_courses"),
     path("student/drop-course/<int:enrollment_id>/", views.student_drop_course, name="student_drop_course"),
 ]
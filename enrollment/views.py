@@ -1,17 +1,38 @@
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models import Count, Q, Value, Sum, F, Value, IntegerField
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib import messages
-from enrollment.models import Enrollment
+from enrollment.models import CoursePreference, Enrollment, EnrollmentHold, EnrollmentSlot, ReportJob
 from accounts.models import Student, DepartmentAdmin
-from academics.models import Semester, CourseOffering
-from accounts.decorators import admin_required, student_required
+from academics.models import DegreeProgram, Department, Semester, CourseOffering, CourseSection
+from accounts.decorators import admin_required, api_token_required, student_required, super_admin_required
 from django.utils.timezone import now
 from django.db import transaction
-from datetime import date
+from datetime import date, timedelta
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
 from django.db.models.functions import Coalesce
+from config.db import retry_on_lock
+from config.routers import read_from_replica
+from config.sharding import cross_shard_list, shard_by_pk, shard_for_department_id, use_shard
+from enrollment.changefeed import FEEDS, iter_changes, parse_cursor
+from enrollment.cohort import CohortEnrollment
+from enrollment.completion import student_degree_audit
+from enrollment.eligibility import PREFERENCE_RULES, Eligibility
+from enrollment.reports import SEMESTER_REPORTS, run_report_job
+from enrollment.slots import cached_enrollment_semester, enrollment_opens_at, invalidate_enrollment_slots
+from enrollment.sync import EnrollmentSync
 
 @admin_required
+@read_from_replica
 def enrollment_list(request):
     user = request.user
     semester_id = request.GET.get("semester")
@@ -67,7 +88,7 @@ def enrollment_list(request):
         request,
         "enrollment/enrollment_list.html",
         {
-            "students": students,
+            "students": cross_shard_list(students) if user.role == "SUPER_ADMIN" else students,
             "semesters": semesters,
             "selected_semester": semester_id,
             "semester": semester,
@@ -75,6 +96,8 @@ def enrollment_list(request):
     )
 
 @admin_required
+@shard_by_pk
+@read_from_replica
 def student_enrollment_detail(request, student_id):
     student = get_object_or_404(
         Student.objects.select_related("user", "department", "degree_program"),
@@ -87,6 +110,7 @@ def student_enrollment_detail(request, student_id):
     current_enrollments = Enrollment.objects.select_related(
         "course_offering__course",
         "course_offering__semester",
+        "section",
     ).filter(
         student=student,
         course_offering__semester=active_semester
@@ -106,14 +130,8 @@ def student_enrollment_detail(request, student_id):
     past_enrollments = {}
     past_semester_credits = {}
 
-    past_records = Enrollment.objects.select_related(
-        "course_offering__course",
-        "course_offering__semester",
-    ).filter(
-        student=student
-    ).exclude(
-        course_offering__semester=active_semester
-    ).order_by("-course_offering__semester__start_date")
+    # Includes semesters moved to the archive tables
+    past_records = Enrollment.get_history(student, exclude_semester=active_semester)
 
     for e in past_records:
         semester = e.course_offering.semester
@@ -138,10 +156,55 @@ def student_enrollment_detail(request, student_id):
             "current_semester_credits": current_semester_credits,
             "past_enrollments": past_enrollments,
             "past_semester_credits": past_semester_credits,
+            "degree_audit": student_degree_audit(student),
+            "holds": EnrollmentHold.objects.filter(student=student, released_at__isnull=True),
+            "hold_reasons": EnrollmentHold.REASON_CHOICES,
         },
     )
 
+@admin_required
+@shard_by_pk
+def enrollment_hold_add(request, student_id):
+    student = get_object_or_404(Student, id=student_id)
+    if request.method != "POST":
+        return redirect("student_enrollment_detail", student_id=student.id)
+
+    if request.user.role == "DEPARTMENT_ADMIN" and student.department != request.user.departmentadmin.department:
+        messages.error(request, "You are not allowed to manage this student.")
+        return redirect("enrollment_list")
+
+    reason = request.POST.get("reason")
+    if reason not in dict(EnrollmentHold.REASON_CHOICES):
+        messages.error(request, "Choose a hold reason.")
+        return redirect("student_enrollment_detail", student_id=student.id)
+
+    EnrollmentHold.objects.create(
+        student=student,
+        reason=reason,
+        note=request.POST.get("note", "").strip(),
+        placed_by=request.user,
+    )
+    messages.success(request, "Enrollment hold placed.")
+    return redirect("student_enrollment_detail", student_id=student.id)
+
+@admin_required
+@shard_by_pk
+def enrollment_hold_release(request, pk):
+    hold = get_object_or_404(EnrollmentHold.objects.select_related("student"), pk=pk)
+    if request.method != "POST":
+        return redirect("student_enrollment_detail", student_id=hold.student_id)
+
+    if request.user.role == "DEPARTMENT_ADMIN" and hold.student.department != request.user.departmentadmin.department:
+        messages.error(request, "You are not allowed to manage this student.")
+        return redirect("enrollment_list")
+
+    hold.released_at = timezone.now()
+    hold.save(update_fields=["released_at"])
+    messages.success(request, "Enrollment hold released.")
+    return redirect("student_enrollment_detail", student_id=hold.student_id)
+
 @student_required
+@read_from_replica
 def student_my_courses(request):
     student = request.user.student
 
@@ -157,6 +220,7 @@ def student_my_courses(request):
         current_enrollments = Enrollment.objects.select_related(
             "course_offering__course",
             "course_offering__semester",
+            "section",
         ).filter(
             student=student,
             course_offering__semester=active_semester,
@@ -171,17 +235,8 @@ def student_my_courses(request):
     else:
         current_semester_credits = 0
 
-    # Past enrollments (excluding current semester)
-    past_records = Enrollment.objects.select_related(
-        "course_offering__course",
-        "course_offering__semester",
-    ).filter(
-        student=student
-    ).exclude(
-        course_offering__semester=active_semester
-    ).order_by(
-        "-course_offering__semester__start_date"
-    )
+    # Past enrollments (excluding current semester), including archived ones
+    past_records = Enrollment.get_history(student, exclude_semester=active_semester)
 
     # Group past enrollments by semester and calculate semester-wise credits
     for e in past_records:
@@ -216,6 +271,297 @@ def student_my_courses(request):
         },
     )
 
+@admin_required
+def cohort_enrollment(request):
+    """
+    Enroll a whole cohort (degree program + enrollment year) into selected
+    offerings, with a dry-run report before anything is written.
+    """
+    user = request.user
+    data = request.POST if request.method == "POST" else request.GET
+
+    programs = DegreeProgram.objects.filter(is_active=True).select_related("department")
+    if user.role == "DEPARTMENT_ADMIN":
+        programs = programs.filter(department_id=user.departmentadmin.department_id)
+
+    semesters = Semester.objects.filter(is_archived=False).order_by("-start_date")
+    default_semester = get_enrollment_semester() or Semester.objects.filter(is_active=True).first()
+
+    program = programs.filter(pk=data.get("program")).first()
+    semester = semesters.filter(pk=data.get("semester")).first() or default_semester
+    enrollment_year = data.get("enrollment_year", "")
+
+    offerings = []
+    report = None
+
+    if program and semester:
+        with use_shard(shard_for_department_id(program.department_id)):
+            offerings = list(
+                CourseOffering.with_seats(CourseOffering.objects.select_related("course")).filter(
+                    semester=semester,
+                    is_active=True,
+                    course__department_id=program.department_id,
+                ).order_by("course__course_code")
+            )
+
+            if request.method == "POST":
+                offering_ids = [int(pk) for pk in request.POST.getlist("offering_ids") if pk.isdigit()]
+                if not enrollment_year.isdigit() or not offering_ids:
+                    messages.error(request, "Enter the cohort year and select at least one offering.")
+                else:
+                    cohort = CohortEnrollment(program, int(enrollment_year), semester, offering_ids)
+
+                    if request.POST.get("action") == "enroll":
+                        report = cohort.apply()
+                        messages.success(
+                            request,
+                            f"{report['enrolled']} enrollment(s) created for "
+                            f"{report['students']} student(s) of {program.name} {enrollment_year}; "
+                            f"{len(report['rejections'])} skipped."
+                        )
+                        return redirect(f"{reverse('enrollment_list')}?semester={semester.pk}")
+
+                    report = cohort.plan()
+
+    return render(
+        request,
+        "enrollment/cohort_enrollment.html",
+        {
+            "programs": programs,
+            "semesters": semesters,
+            "program": program,
+            "semester": semester,
+            "enrollment_year": enrollment_year,
+            "offerings": offerings,
+            "selected_ids": {int(pk) for pk in data.getlist("offering_ids") if pk.isdigit()},
+            "report": report,
+            "rejections": report["rejections"][:200] if report else [],
+        },
+    )
+
+@super_admin_required
+def enrollment_slot_list(request, semester_id):
+    semester = get_object_or_404(Semester, pk=semester_id)
+
+    if request.method == "POST":
+        opens_at = parse_datetime(request.POST.get("opens_at") or "")
+        if opens_at is None:
+            messages.error(request, "Enter when the slot opens.")
+            return redirect("enrollment_slot_list", semester_id=semester.pk)
+        if timezone.is_naive(opens_at):
+            opens_at = timezone.make_aware(opens_at)
+
+        numbers = {
+            field: (request.POST.get(field) or "").strip()
+            for field in ("enrollment_year", "degree_program", "lottery_buckets", "interval_minutes")
+        }
+        if not all(value.isdigit() for value in numbers.values() if value):
+            messages.error(
+                request,
+                "Enrollment year, lottery groups and minutes apart must be whole numbers.",
+            )
+            return redirect("enrollment_slot_list", semester_id=semester.pk)
+        if numbers["degree_program"] and not DegreeProgram.objects.filter(pk=numbers["degree_program"]).exists():
+            messages.error(request, "Select an existing degree program.")
+            return redirect("enrollment_slot_list", semester_id=semester.pk)
+
+        criteria = {
+            "enrollment_year": numbers["enrollment_year"] or None,
+            "degree_program_id": numbers["degree_program"] or None,
+        }
+        buckets = int(numbers["lottery_buckets"] or 0)
+        interval_minutes = int(numbers["interval_minutes"] or 60)
+
+        if buckets > 1:
+            if interval_minutes < 1:
+                messages.error(request, "Lottery groups must be at least one minute apart.")
+                return redirect("enrollment_slot_list", semester_id=semester.pk)
+            # One slot per lottery bucket, spaced `interval` minutes apart
+            interval = timedelta(minutes=interval_minutes)
+            EnrollmentSlot.objects.bulk_create([
+                EnrollmentSlot(
+                    semester=semester,
+                    name=f"{request.POST.get('name')} - group {bucket + 1}",
+                    opens_at=opens_at + bucket * interval,
+                    lottery_bucket=bucket,
+                    **criteria,
+                )
+                for bucket in range(buckets)
+            ])
+            invalidate_enrollment_slots()
+        else:
+            EnrollmentSlot.objects.create(
+                semester=semester,
+                name=request.POST.get("name"),
+                opens_at=opens_at,
+                **criteria,
+            )
+
+        messages.success(request, "Enrollment slot(s) added.")
+        return redirect("enrollment_slot_list", semester_id=semester.pk)
+
+    return render(
+        request,
+        "enrollment/enrollment_slots.html",
+        {
+            "semester": semester,
+            "slots": EnrollmentSlot.objects.filter(semester=semester).select_related("degree_program"),
+            "programs": DegreeProgram.objects.filter(is_active=True).select_related("department"),
+        },
+    )
+
+@super_admin_required
+def enrollment_slot_delete(request, pk):
+    slot = get_object_or_404(EnrollmentSlot, pk=pk)
+    slot.delete()
+    messages.success(request, "Enrollment slot deleted.")
+    return redirect("enrollment_slot_list", semester_id=slot.semester_id)
+
+@admin_required
+def report_list(request):
+    user = request.user
+
+    jobs = ReportJob.objects.select_related("requested_by", "department", "semester")
+    departments = Department.objects.filter(is_active=True).order_by("code")
+    if user.role == "DEPARTMENT_ADMIN":
+        jobs = jobs.filter(department_id=user.departmentadmin.department_id)
+        departments = departments.filter(pk=user.departmentadmin.department_id)
+
+    semesters = Semester.objects.order_by("-start_date")
+
+    if request.method == "POST":
+        kind = request.POST.get("kind")
+        file_format = request.POST.get("file_format", "CSV")
+        if kind not in dict(ReportJob.KIND_CHOICES) or file_format not in dict(ReportJob.FORMAT_CHOICES):
+            messages.error(request, "Choose a report and a format.")
+            return redirect("report_list")
+
+        semester = None
+        if kind in SEMESTER_REPORTS:
+            semester = Semester.all_objects.filter(pk=request.POST.get("semester") or None).first()
+            if semester is None:
+                messages.error(request, "This report needs a semester.")
+                return redirect(f"{reverse('report_list')}?kind={kind}")
+
+        if user.role == "DEPARTMENT_ADMIN":
+            department = user.departmentadmin.department
+        else:
+            department = departments.filter(pk=request.POST.get("department") or None).first()
+
+        job = ReportJob.objects.create(
+            kind=kind,
+            file_format=file_format,
+            requested_by=user,
+            department=department,
+            semester=semester,
+        )
+
+        # Runs outside the request; progress is polled from the detail page
+        threading.Thread(
+            target=run_report_job,
+            args=(job.id, request.build_absolute_uri("/")),
+            daemon=True,
+        ).start()
+
+        messages.success(request, "Report started. You will be emailed when it is ready.")
+        return redirect("report_detail", pk=job.pk)
+
+    return render(request, "enrollment/report_list.html", {
+        "jobs": jobs.order_by("-created_at")[:20],
+        "kind_choices": ReportJob.KIND_CHOICES,
+        "format_choices": ReportJob.FORMAT_CHOICES,
+        "semester_reports": SEMESTER_REPORTS,
+        "selected_kind": request.GET.get("kind", "ENROLLMENT"),
+        "departments": departments,
+        "semesters": semesters,
+        "default_semester": Semester.objects.filter(is_active=True).first(),
+    })
+
+@admin_required
+def report_detail(request, pk):
+    job = get_object_or_404(ReportJob.objects.select_related("department", "semester"), pk=pk)
+
+    if not can_view_report(request.user, job):
+        messages.error(request, "You are not allowed to view this report.")
+        return redirect("report_list")
+
+    return render(request, "enrollment/report_detail.html", {"job": job})
+
+@admin_required
+def report_progress(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk)
+
+    if not can_view_report(request.user, job):
+        return JsonResponse({"error": "Not allowed"}, status=403)
+
+    return JsonResponse({
+        "status": job.status,
+        "departments_total": job.departments_total,
+        "departments_done": job.departments_done,
+        "row_count": job.row_count,
+        "download": reverse("report_download", args=[job.pk]) if job.status == "COMPLETED" else None,
+        "expires_at": job.expires_at.isoformat() if job.expires_at else None,
+        "message": job.message,
+    })
+
+@admin_required
+def report_download(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk)
+
+    if not can_view_report(request.user, job):
+        messages.error(request, "You are not allowed to view this report.")
+        return redirect("report_list")
+
+    if job.status != "COMPLETED" or not job.artifact or job.expires_at <= timezone.now():
+        messages.error(request, "This report is not available for download.")
+        return redirect("report_detail", pk=job.pk)
+
+    return FileResponse(
+        job.artifact.open("rb"),
+        as_attachment=True,
+        filename=os.path.basename(job.artifact.name),
+    )
+
+@api_token_required
+def change_feed(request):
+    """
+    Students, offerings and enrollments changed after `cursor`, as NDJSON:
+    one change per line, then a line with the cursor of the next page.
+    """
+    try:
+        positions = parse_cursor(request.GET.get("cursor", ""))
+        limit = int(request.GET.get("limit") or settings.CHANGE_FEED_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({"error": "Invalid cursor or limit"}, status=400)
+
+    kinds = [kind for kind in request.GET.get("kinds", "").split(",") if kind] or list(FEEDS)
+    unknown = set(kinds) - set(FEEDS)
+    if unknown:
+        return JsonResponse({"error": f"Unknown kinds: {', '.join(sorted(unknown))}"}, status=400)
+
+    limit = max(1, min(limit, settings.CHANGE_FEED_MAX_PAGE_SIZE))
+    lines = (
+        json.dumps(record, cls=DjangoJSONEncoder) + "\n"
+        for record in iter_changes(positions, kinds, limit)
+    )
+    return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+@csrf_exempt
+@api_token_required
+def enrollment_sync(request):
+    """
+    Apply a POSTed NDJSON batch of enroll/drop operations (see
+    enrollment/sync.py) and stream back one result per line, then a summary.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST an NDJSON body"}, status=405)
+
+    results = EnrollmentSync().run(
+        line.decode("utf-8", errors="replace") for line in request
+    )
+    lines = (json.dumps(result) + "\n" for result in results)
+    return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
 @student_required
 def student_course_enrollment(request):
     student = request.user.student
@@ -235,20 +581,22 @@ def student_course_enrollment(request):
         messages.error(request, "Enrollment window is closed.")
         return redirect("dashboard")
 
-    degree = student.degree_program
-    max_credits = degree.max_credits_per_semester
+    # Seats of a preference-mode semester go through the lottery first
+    if semester.enrollment_mode == "PREFERENCE" and not semester.preferences_allocated_at:
+        return redirect("student_course_preferences")
 
-    enrolled_credits = Enrollment.get_enrolled_credits(student, semester)
-
-    enrolled_ids = Enrollment.objects.filter(
-        student=student,
-        course_offering__semester=semester,
-        status="ENROLLED"
-    ).values_list("course_offering_id", flat=True)
+    opens_at = enrollment_opens_at(student, semester)
+    if timezone.now() < opens_at:
+        messages.info(
+            request,
+            f"Your enrollment slot opens on "
+            f"{timezone.localtime(opens_at):%d %b %Y at %H:%M}."
+        )
+        return redirect("dashboard")
 
-    offerings = CourseOffering.objects.select_related(
+    offerings = CourseOffering.with_seats(CourseOffering.objects.select_related(
         "course", "course__department"
-    ).filter(
+    )).prefetch_related("meetings").filter(
         semester=semester,
         is_active=True,
         course__department=student.department
@@ -262,51 +610,102 @@ def student_course_enrollment(request):
             semester=semester
         )
 
-        course_credits = offering.course.credit_points
+        level, message, next_url = enroll_in_offering(student, offering, semester)
+        getattr(messages, level)(request, message)
+        return redirect(next_url)
 
-        # CREDIT LIMIT CHECK
-        if enrolled_credits + course_credits > max_credits:
-            messages.error(
-                request,
-                f"Credit limit exceeded. "
-                f"Allowed: {max_credits}, "
-                f"Current: {enrolled_credits}"
-            )
-            return redirect("student_course_enrollment")
+    # Every displayed offering is checked with the same few queries
+    offerings = list(offerings)
+    eligibility = Eligibility(student, semester)
+    results = eligibility.evaluate(offerings)
+    for o in offerings:
+        o.ineligible = results[o.id]
 
-        if offering.current_enrollment >= offering.course.max_capacity:
-            messages.error(request, "Course capacity is full.")
-            return redirect("student_course_enrollment")
+    return render(
+        request,
+        "enrollment/enroll_course.html",
+        {
+            "offerings": offerings,
+            "semester": semester,
+            "enrolled_credits": eligibility.enrolled_credits,
+            "max_credits": student.degree_program.max_credits_per_semester,
+        },
+    )
 
-        enrollment, created = Enrollment.objects.get_or_create(
-            student=student,
-            course_offering=offering,
-            defaults={"status": "ENROLLED"}
-        )
 
-        if not created:
-            if enrollment.status == "ENROLLED":
-                messages.warning(request, "You are already enrolled in this course.")
-                return redirect("student_course_enrollment")
+@student_required
+def student_course_preferences(request):
+    student = request.user.student
 
-            enrollment.status = "ENROLLED"
-            enrollment.save(update_fields=["status"])
+    if not student.is_active:
+        messages.error(request, "Your academic status is inactive.")
+        return redirect("dashboard")
 
-        offering.current_enrollment += 1
-        offering.save(update_fields=["current_enrollment"])
+    semester = get_enrollment_semester()
+    if not semester or semester.enrollment_mode != "PREFERENCE":
+        return redirect("student_course_enrollment")
+    if semester.preferences_allocated_at:
+        messages.info(request, "Seats have been allocated. Remaining seats are open below.")
+        return redirect("student_course_enrollment")
+
+    offerings = list(
+        CourseOffering.with_seats(CourseOffering.objects.select_related("course")).filter(
+            semester=semester,
+            is_active=True,
+            course__department=student.department,
+        ).order_by("course__course_code")
+    )
 
-        messages.success(request, "Course enrolled successfully.")
-        return redirect("student_my_courses")
+    if request.method == "POST":
+        ranked = []
+        for offering in offerings:
+            value = request.POST.get(f"rank_{offering.id}", "").strip()
+            if not value:
+                continue
+            if not value.isdigit() or int(value) < 1:
+                messages.error(request, "Ranks must be positive whole numbers.")
+                return redirect("student_course_preferences")
+            ranked.append((int(value), offering.id))
+
+        ranks = [rank for rank, _ in ranked]
+        if len(ranks) != len(set(ranks)):
+            messages.error(request, "Each rank can only be used once.")
+            return redirect("student_course_preferences")
+
+        by_id = {offering.id: offering for offering in offerings}
+        failures = Eligibility(student, semester, rules=PREFERENCE_RULES).evaluate(
+            by_id[offering_id] for _, offering_id in ranked
+        )
+        problems = [
+            f"{by_id[offering_id].course.course_code}: {failure.message}"
+            for offering_id, failure in failures.items() if failure
+        ]
+        if problems:
+            messages.error(request, "Preferences not saved. " + " ".join(problems))
+            return redirect("student_course_preferences")
+
+        save_course_preferences(
+            student, semester, [offering_id for _, offering_id in sorted(ranked)]
+        )
+
+        messages.success(request, f"{len(ranked)} preference(s) saved.")
+        return redirect("student_course_preferences")
+
+    ranks = dict(
+        CoursePreference.objects.filter(
+            student=student, course_offering__semester=semester
+        ).values_list("course_offering_id", "rank")
+    )
+    for offering in offerings:
+        offering.preference_rank = ranks.get(offering.id)
 
     return render(
         request,
-        "enrollment/enroll_course.html",
+        "enrollment/course_preferences.html",
         {
             "offerings": offerings,
             "semester": semester,
-            "enrolled_ids": enrolled_ids,
-            "enrolled_credits": enrolled_credits,
-            "max_credits": max_credits,
+            "max_credits": student.degree_program.max_credits_per_semester,
         },
     )
 
@@ -332,13 +731,7 @@ def student_drop_course(request, enrollment_id):
         return redirect("student_my_courses")
 
     offering = enrollment.course_offering
-
-    enrollment.status = "DROPPED"
-    enrollment.save(update_fields=["status"])
-
-    if offering.current_enrollment > 0:
-        offering.current_enrollment -= 1
-        offering.save(update_fields=["current_enrollment"])
+    drop_enrollment(enrollment.id)
 
     messages.success(
         request,
@@ -348,11 +741,94 @@ def student_drop_course(request, enrollment_id):
     return redirect("student_my_courses")
 
 
+@retry_on_lock
+def enroll_in_offering(student, offering, semester):
+    """
+    Enroll the student inside one write transaction. Eligibility is
+    evaluated here so a retry after a lock error sees fresh values.
+    Returns (message level, message, redirect target).
+    """
+    offering = CourseOffering.objects.select_related("course").get(pk=offering.pk)
+
+    failure = Eligibility(student, semester).check(offering)
+    if failure:
+        return failure.level, failure.message, "student_course_enrollment"
+
+    enrollment = Enrollment.objects.filter(student=student, course_offering=offering).first()
+
+    # Sectioned offerings place the student in the least-full section;
+    # the offering row itself is not updated
+    section_id = None
+    if offering.sections.exists():
+        section_id = CourseSection.take_seat(offering.pk)
+        if section_id is None:
+            return "error", "Course capacity is full.", "student_course_enrollment"
+    else:
+        CourseOffering.objects.filter(pk=offering.pk).update(
+            current_enrollment=F("current_enrollment") + 1
+        )
+
+    if enrollment:
+        enrollment.status = "ENROLLED"
+        enrollment.section_id = section_id
+        enrollment.save(update_fields=["status", "section", "updated_at"])
+    else:
+        Enrollment.objects.create(
+            student=student,
+            course_offering=offering,
+            section_id=section_id,
+            status="ENROLLED",
+        )
+
+    return "success", "Course enrolled successfully.", "student_my_courses"
+
+
+@retry_on_lock
+def drop_enrollment(enrollment_id):
+    enrollment = Enrollment.objects.only("section_id", "course_offering_id").get(pk=enrollment_id)
+    # Conditional, so a concurrent or repeated drop releases the seat only once
+    dropped = Enrollment.objects.filter(pk=enrollment_id, status="ENROLLED").update(
+        status="DROPPED", updated_at=timezone.now()
+    )
+    if dropped != 1:
+        return
+
+    if enrollment.section_id:
+        CourseSection.release_seat(enrollment.section_id)
+        return
+
+    CourseOffering.objects.filter(
+        pk=enrollment.course_offering_id,
+        current_enrollment__gt=0,
+    ).update(current_enrollment=F("current_enrollment") - 1)
+
+
 def get_enrollment_semester():
     today = date.today()
-    return Semester.objects.filter(
-        is_active=True,
-        enrollment_open_date__lte=today,
-        enrollment_close_date__gte=today
-    ).order_by("enrollment_open_date").first()
+    return cached_enrollment_semester(
+        today,
+        lambda: Semester.objects.filter(
+            is_active=True,
+            enrollment_open_date__lte=today,
+            enrollment_close_date__gte=today
+        ).order_by("enrollment_open_date").first(),
+    )
 
+
+@retry_on_lock
+def save_course_preferences(student, semester, offering_ids):
+    """Replace the student's preferences; ranks are 1..n in list order."""
+    CoursePreference.objects.filter(
+        student=student, course_offering__semester=semester
+    ).delete()
+    CoursePreference.objects.bulk_create([
+        CoursePreference(student=student, course_offering_id=offering_id, rank=rank)
+        for rank, offering_id in enumerate(offering_ids, start=1)
+    ])
+
+
+def can_view_report(user, job):
+    """Department admins only see their own department's reports."""
+    if user.role == "DEPARTMENT_ADMIN":
+        return job.department_id == user.departmentadmin.department_id
+    return True